@@ -6,6 +6,15 @@
 #
 # All rights reserved.
 
-from .utils import *
+from .utils import __all__
 
-__version__ = '0.0.1'
\ No newline at end of file
+__version__ = '0.0.1'
+
+
+def __getattr__(name):
+    # everything utils exports is loaded on first access, so importing the package costs next to nothing
+    from . import utils
+    try:
+        return getattr(utils, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
@@ -8,4 +8,8 @@
 
 class SafeMode(Exception):
     """Raised when unsafe command is detected in safe mode."""
-    pass
\ No newline at end of file
+    pass
+
+class PoolOverloaded(Exception):
+    """Raised when too many calls are already waiting on an executor pool."""
+    pass
@@ -6,31 +6,76 @@
 #
 # All rights reserved.
 
-import asyncio
-import multiprocessing
-from functools import wraps
-from concurrent.futures.thread import ThreadPoolExecutor
+import importlib
 
+# helpers loaded from their submodule on first access, importing the package stays cheap
+_LAZY_NAMES = {
+    "ExecutorPool": "executors",
+    "ProcessExecutorPool": "executors",
+    "configure_pool": "executors",
+    "get_pool": "executors",
+    "shutdown_pools": "executors",
+    "run_in_exc": "executors",
+    "map_in_exc": "executors",
+    "chunked": "executors",
+}
+_SUBMODULES = frozenset((
+    "convertors", "dedupe", "dirindex", "evaluator", "executors", "file", "image", "jobs", "json_backends", "markup",
+    "mediameta", "metrics", "monitor", "network", "sniffer", "store", "string", "system", "tokens", "useragent", "walker",
+))
+__all__ = [*_LAZY_NAMES, "check_if_package_exists", "lazy_pattern"]
 
-executor = ThreadPoolExecutor(max_workers=multiprocessing.cpu_count() * 5)
+
+def __getattr__(name):
+    # the old shared executor, now the lazily created "io" pool
+    if name == "executor":
+        return __getattr__("get_pool")("io").executor
+    module = _LAZY_NAMES.get(name)
+    if module is not None:
+        value = globals()[name] = getattr(importlib.import_module(f".{module}", __name__), name)
+        return value
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted({*globals(), *_LAZY_NAMES, *_SUBMODULES})
 
 def check_if_package_exists(package: str):
-    """Check if a package exists.
+    """Check if a package exists, without importing it.
     Parameters:
         package (str): Name of the package."""
+    from importlib.util import find_spec
     try:
-        __import__(package)
-    except ImportError:
+        return find_spec(package) is not None
+    except (ImportError, ValueError):
+        # a dotted name whose parent is missing, or a module with a broken __spec__
         return False
-    else:
-        return True
 
-def run_in_exc(func_):
-    """Run a blocking function in a thread pool executor and return an awaitable.
+
+class _LazyPattern:
+    """A regular expression compiled on first use, attributes of the compiled pattern are cached on
+    the instance so later calls cost a plain attribute lookup."""
+    def __init__(self, pattern: str, flags: int) -> None:
+        self._source = (pattern, flags)
+
+    def __getattr__(self, name: str):
+        if name == "_source":
+            raise AttributeError(name)
+        import re
+        value = getattr(re.compile(*self._source), name)
+        setattr(self, name, value)
+        return value
+
+    def __repr__(self) -> str:
+        return f"lazy_pattern({self._source[0]!r})"
+
+
+def lazy_pattern(pattern: str, flags: int = 0) -> _LazyPattern:
+    """Same as re.compile, except the pattern is compiled the first time it is used.
     Parameters:
-        func_ (function): Blocking function to run."""
-    @wraps(func_)
-    async def wrapper(*args, **kwargs):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(executor, lambda: func_(*args, **kwargs))
-    return wrapper
+        pattern (str): Regular expression.
+        flags (int, optional): re flags. Defaults to 0.
+    Returns:
+        _LazyPattern: Behaves like the compiled pattern."""
+    return _LazyPattern(pattern, flags)
@@ -8,25 +8,297 @@
 
 
 from . import *
+import os
 import json
+import asyncio
+import stat
+import tempfile
+import threading
+from itertools import islice
+from contextlib import suppress
+from .json_backends import get_json_backend, set_json_backend
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_START = "-0123456789"
+_NUMBER_END = (",", "]", "}", " ", "\t", "\n", "\r")
+# a decode error this close to the end of the buffer may be a token cut in half, like "-Infinit"
+_PARTIAL_TOKEN = 16
 
 
 @run_in_exc
 def file_to_json(file_path: str) -> dict:
-    """Convert a file to JSON.
+    """Convert a file to JSON, decoded by the selected JSON backend.
     Parameters:
         file_path (str): Path of the file."""
-    with open(file_path, "r") as file:
-        return json.load(file)
+    with open(file_path, "rb") as file:
+        return get_json_backend().loads(file.read())
     
+def _write_atomically(file_path: str, data: bytes) -> None:
+    """Write data to a temporary file next to file_path, fsync it and rename it over file_path.
+    Readers see either the old or the new file, never a half written one."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with suppress(OSError):
+            os.chmod(temp_path, stat.S_IMODE(os.stat(file_path).st_mode) if os.path.exists(file_path) else 0o644)
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        with suppress(OSError):
+            os.unlink(temp_path)
+        raise
+    # make the rename itself durable, not possible on every platform
+    with suppress(OSError, AttributeError):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+@run_in_exc
+def write_to_json(file_path: str, data: dict, indent: int = 4, atomic: bool = False, ensure_ascii: bool = True):
+    """Write data to a JSON file, encoded by the selected JSON backend.
+    Parameters:
+        file_path (str): Path of the file.
+        data (dict): Data to write.
+        indent (int, optional): Indentation, None writes compact JSON without whitespace. Defaults to 4.
+        atomic (bool, optional): Write to a temporary file, fsync and rename it over the file so a crash never leaves it half written. Defaults to False.
+        ensure_ascii (bool, optional): Escape non ASCII characters like json.dump does, False writes them as UTF-8. Defaults to True."""
+    encoded = get_json_backend().dumps(data, indent, ensure_ascii)
+    if atomic:
+        return _write_atomically(file_path, encoded)
+    with open(file_path, "wb") as file:
+        file.write(encoded)
+
+
+class _JsonReader:
+    """Incremental reader decoding one JSON value at a time from a text file."""
+    def __init__(self, file, chunk_size: int) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Read more data, at least doubling what is left so retried decodes stay linear overall."""
+        if self.eof:
+            return False
+        data = self.file.read(max(self.chunk_size, len(self.buffer) - self.pos))
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        self.eof = not data
+        return bool(data)
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, empty at the end of the file."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(f"Expecting one of {chars!r}", self.buffer, self.pos)
+        self.pos += 1
+        return char
+
+    def decode(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as exc:
+                # only a value running into the end of the buffer can be completed by reading more,
+                # anything else is malformed and raised without buffering the rest of the file
+                truncated = exc.pos >= len(self.buffer) - _PARTIAL_TOKEN or exc.msg.startswith("Unterminated string")
+                if not truncated or not self.fill():
+                    raise
+                continue
+            # a number cut by the end of the buffer still decodes, "12" out of "12.5e3"
+            if self.buffer[self.pos] in _NUMBER_START and self.buffer[end:end + 1] not in _NUMBER_END and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json(file_path: str, chunk_size: int = 65536):
+    """Iterate over a JSON file without loading it whole.
+    Parameters:
+        file_path (str): Path of the file.
+        chunk_size (int, optional): Number of characters read at once. Defaults to 65536.
+    Yields:
+        Items of a top level array, or (key, value) pairs of a top level object.
+    Raises:
+        ValueError: If the top level value is neither an array nor an object."""
+    with open(file_path, "r", encoding="utf-8") as file:
+        reader = _JsonReader(file, chunk_size)
+        opening = reader.peek()
+        if opening not in ("[", "{"):
+            raise ValueError("Top level JSON value must be an array or an object to be iterated")
+        reader.pos += 1
+        closing = "]" if opening == "[" else "}"
+        if reader.peek() == closing:
+            reader.pos += 1
+            return
+        while True:
+            if opening == "[":
+                yield reader.decode()
+            else:
+                if reader.peek() != '"':
+                    raise json.JSONDecodeError("Expecting property name enclosed in double quotes", reader.buffer, reader.pos)
+                key = reader.decode()
+                reader.expect(":")
+                yield key, reader.decode()
+            if reader.expect("," + closing) == closing:
+                return
+
+
+def iter_json_lines(file_path: str):
+    """Iterate over a JSON Lines file, one value per line.
+    Parameters:
+        file_path (str): Path of the file.
+    Yields:
+        The value of every non blank line."""
+    loads = get_json_backend().loads
+    with open(file_path, "rb") as file:
+        for line in file:
+            if line.strip():
+                yield loads(line)
+
+
+async def _stream_from(iterator, batch_size: int):
+    """Drive a blocking iterator from the io pool, batch_size items per round trip."""
+    pool = get_pool("io")
+    # a cancelled caller leaves its batch running in the worker, closing waits for it
+    lock = threading.Lock()
+
+    def next_batch() -> list:
+        with lock:
+            return list(islice(iterator, batch_size))
+
+    def close() -> None:
+        with lock:
+            iterator.close()
+
+    try:
+        while True:
+            batch = await pool.run(next_batch)
+            if not batch:
+                return
+            for item in batch:
+                yield item
+    finally:
+        await asyncio.shield(pool.run(close))
+
+
+def stream_json(file_path: str, chunk_size: int = 65536, batch_size: int = 256):
+    """Async version of iter_json, the file is read in the io pool.
+    Parameters:
+        file_path (str): Path of the file.
+        chunk_size (int, optional): Number of characters read at once. Defaults to 65536.
+        batch_size (int, optional): Number of items decoded per executor round trip. Defaults to 256.
+    Returns:
+        Async generator of array items or (key, value) pairs."""
+    return _stream_from(iter_json(file_path, chunk_size), batch_size)
+
+
+def stream_json_lines(file_path: str, batch_size: int = 256):
+    """Async version of iter_json_lines, the file is read in the io pool.
+    Parameters:
+        file_path (str): Path of the file.
+        batch_size (int, optional): Number of lines decoded per executor round trip. Defaults to 256.
+    Returns:
+        Async generator of the values."""
+    return _stream_from(iter_json_lines(file_path), batch_size)
+
+
 @run_in_exc
-def write_to_json(file_path: str, data: dict):
-    """Write data to a JSON file.
+def append_json_lines(file_path: str, records) -> None:
+    """Append values to a JSON Lines file.
+    Parameters:
+        file_path (str): Path of the file.
+        records (iterable): Values to append, one line each."""
+    dumps = get_json_backend().dumps
+    with open(file_path, "ab") as file:
+        file.writelines(dumps(record) + b"\n" for record in records)
+
+
+class _JsonStreamWriter:
+    """Writes a JSON array, object or JSON Lines file a batch at a time."""
+    def __init__(self, file_path: str, indent: int, pairs: bool, lines: bool) -> None:
+        self.file = open(file_path, "wb")
+        self.backend = get_json_backend()
+        self.indent = None if lines else indent
+        self.pairs = pairs
+        self.lines = lines
+        self.count = 0
+        self.newline = b"" if self.indent is None else b"\n" + b" " * self.indent
+        # a write of a cancelled caller may still run in a worker when close is called
+        self.lock = threading.Lock()
+
+    def write(self, batch: list) -> None:
+        with self.lock:
+            self._write(batch)
+
+    def _write(self, batch: list) -> None:
+        parts = []
+        for item in batch:
+            if self.lines:
+                parts.append(self.backend.dumps(item) + b"\n")
+                continue
+            parts.append((b"[{"[self.pairs:self.pairs + 1] if not self.count else b",") + self.newline)
+            if self.pairs:
+                key, item = item
+                parts.append(self.backend.dumps(key) + (b":" if self.indent is None else b": "))
+            # strings can't hold raw newlines, so every newline here is formatting
+            parts.append(self.backend.dumps(item, self.indent).replace(b"\n", self.newline))
+            self.count += 1
+        self.file.write(b"".join(parts))
+
+    def close(self) -> None:
+        with self.lock:
+            self._close()
+
+    def _close(self) -> None:
+        try:
+            if not self.lines:
+                closing = b"]}"[self.pairs:self.pairs + 1]
+                if not self.count:
+                    self.file.write(b"[{"[self.pairs:self.pairs + 1] + closing)
+                else:
+                    self.file.write(self.newline[:1] + closing)
+        finally:
+            self.file.close()
+
+
+async def write_json_stream(file_path: str, items, indent: int = None, pairs: bool = False, lines: bool = False, batch_size: int = 256) -> int:
+    """Write items from an iterable or async iterable to a JSON file without building it in memory.
     Parameters:
         file_path (str): Path of the file.
-        data (dict): Data to write."""
-    with open(file_path, "w") as file:
-        json.dump(data, file, indent=4)
+        items (iterable): Values to write, a generator or async generator works.
+        indent (int, optional): Indentation, None writes compact JSON. Defaults to None.
+        pairs (bool, optional): Items are (key, value) pairs written as a top level object instead of an array. Defaults to False.
+        lines (bool, optional): Write JSON Lines instead of a single document. Defaults to False.
+        batch_size (int, optional): Number of items encoded per executor round trip. Defaults to 256.
+    Returns:
+        int: Number of items written."""
+    pool = get_pool("io")
+    writer = await pool.run(_JsonStreamWriter, file_path, indent, pairs, lines)
+    written = 0
+    try:
+        async for batch in chunked(items, batch_size):
+            await pool.run(writer.write, batch)
+            written += len(batch)
+    finally:
+        await pool.run(writer.close)
+    return written
 
 
 def get_readable_time(seconds: int) -> str:
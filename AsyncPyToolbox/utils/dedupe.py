@@ -0,0 +1,176 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+from . import *
+import os
+import hashlib
+import threading
+from collections import defaultdict
+from .walker import stream_files
+
+# Check if xxhash is installed, it is several times faster than blake2b
+is_xxhash_installed = check_if_package_exists("xxhash")
+
+_CHUNK_SIZE = 1 << 20
+# bytes hashed from each end of a file before hashing all of it
+PARTIAL_SIZE = 1 << 16
+_local = threading.local()
+
+
+def _new_hash():
+    if is_xxhash_installed:
+        import xxhash
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=32)
+
+
+def _buffer() -> memoryview:
+    """A read buffer per worker thread, reused for every file it hashes."""
+    buffer = getattr(_local, "buffer", None)
+    if buffer is None:
+        buffer = _local.buffer = memoryview(bytearray(_CHUNK_SIZE))
+    return buffer
+
+
+def _hash_range(file, hasher, length: int = None) -> None:
+    buffer = _buffer()
+    while length is None or length > 0:
+        read = file.readinto(buffer if length is None or length >= len(buffer) else buffer[:length])
+        if not read:
+            break
+        hasher.update(buffer[:read])
+        if length is not None:
+            length -= read
+
+
+def partial_hash(path: str, size: int = None) -> bytes:
+    """Hash the first and last PARTIAL_SIZE bytes of a file, the whole file if it is not larger than both.
+    Parameters:
+        path (str): Path of the file.
+        size (int, optional): Size of the file if the caller already knows it.
+    Returns:
+        bytes: The digest."""
+    hasher = _new_hash()
+    with open(path, "rb", buffering=0) as file:
+        size = os.fstat(file.fileno()).st_size if size is None else size
+        if size <= 2 * PARTIAL_SIZE:
+            _hash_range(file, hasher)
+        else:
+            _hash_range(file, hasher, PARTIAL_SIZE)
+            file.seek(size - PARTIAL_SIZE)
+            _hash_range(file, hasher, PARTIAL_SIZE)
+    return hasher.digest()
+
+
+def _full_hash(path: str) -> bytes:
+    hasher = _new_hash()
+    with open(path, "rb", buffering=0) as file:
+        _hash_range(file, hasher)
+    return hasher.digest()
+
+
+@run_in_exc
+def hash_file(path: str) -> str:
+    """Hash the whole content of a file with xxh3-128 if xxhash is installed, blake2b otherwise.
+    Parameters:
+        path (str): Path of the file.
+    Returns:
+        str: Hex digest."""
+    return _full_hash(path).hex()
+
+
+def _partial_entry(item: tuple) -> tuple:
+    path, size = item
+    try:
+        # os.stat and not DirEntry.stat, which leaves st_ino and st_dev at 0 on Windows
+        stat_result = os.stat(path)
+        return path, size, partial_hash(path, size), (stat_result.st_dev, stat_result.st_ino)
+    except OSError:
+        return path, size, None, None
+
+
+def _full_entry(item: tuple) -> tuple:
+    path, size = item
+    try:
+        return path, size, _full_hash(path), None
+    except OSError:
+        return path, size, None, None
+
+
+class DuplicateGroup:
+    """Files with identical content.
+    Attributes:
+        size (int): Size of each file.
+        digest (str): Hex digest of the content.
+        paths (list): Sorted paths of the files, hard links to the same file count once."""
+    __slots__ = ("size", "digest", "paths")
+
+    def __init__(self, size: int, digest: str, paths: list) -> None:
+        self.size = size
+        self.digest = digest
+        self.paths = sorted(paths)
+
+    @property
+    def wasted(self) -> int:
+        """Bytes freed by keeping a single copy."""
+        return self.size * (len(self.paths) - 1)
+
+    def __repr__(self) -> str:
+        return f"DuplicateGroup(size={self.size}, digest={self.digest!r}, paths={self.paths!r})"
+
+
+async def _hash_all(func, groups, concurrency: int, chunk_size: int) -> dict:
+    buckets = defaultdict(list)
+    inodes = set()
+    items = ((path, size) for size, paths in groups for path in paths)
+    async for path, size, digest, inode in map_in_exc(func, items, chunk_size=chunk_size, pool="io", concurrency=concurrency):
+        if digest is None or inode in inodes:
+            continue
+        if inode is not None:
+            # hard links to the same file count once
+            inodes.add(inode)
+        buckets[(size, digest)].append(path)
+    return buckets
+
+
+async def find_duplicates(root: str, min_size: int = 1, concurrency: int = 8, **kwargs):
+    """Find files with identical content in a directory tree, reading as little as possible.
+    Files are grouped by size first, files with a unique size are never opened. Files sharing a size
+    are compared by a hash of their first and last PARTIAL_SIZE bytes, and only files that still
+    match are hashed completely. Hard links are recognised when the partial hash is taken. Hashing runs in parallel in the "io" pool.
+    Parameters:
+        root (str): Directory to search.
+        min_size (int, optional): Ignore files smaller than this, empty files are all equal. None keeps every file. Defaults to 1.
+        concurrency (int, optional): Number of hashing batches in flight. Defaults to 8.
+        **kwargs: Other filters of walker.iter_files.
+    Yields:
+        DuplicateGroup: Every group of identical files, small files first."""
+    by_size = defaultdict(list)
+    # a size filter makes the walker stat every entry in its worker thread, so entry.stat() is served
+    # from the cache of the entry and never blocks the event loop, 0 keeps every file
+    async for entry in stream_files(root, min_size=min_size or 0, **kwargs):
+        by_size[entry.stat().st_size].append(entry.path)
+    same_size = [(size, paths) for size, paths in by_size.items() if len(paths) > 1]
+    by_size.clear()
+
+    partial = await _hash_all(_partial_entry, same_size, concurrency, 64)
+    large = []
+    for (size, digest), paths in sorted(partial.items()):
+        if len(paths) < 2:
+            continue
+        if size <= 2 * PARTIAL_SIZE:
+            # the partial hash of a small file covers all of it
+            yield DuplicateGroup(size, digest.hex(), paths)
+        else:
+            large.append((size, paths))
+    partial.clear()
+
+    full = await _hash_all(_full_entry, large, concurrency, 1)
+    for (size, digest), paths in sorted(full.items()):
+        if len(paths) > 1:
+            yield DuplicateGroup(size, digest.hex(), paths)
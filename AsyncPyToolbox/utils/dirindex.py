@@ -0,0 +1,251 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+from . import *
+import os
+import sqlite3
+import threading
+from .sniffer import MediaInfo, sniff
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    mime_type TEXT,
+    kind TEXT NOT NULL,
+    sniffed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+"""
+_FILE_COLUMNS = "path, size, mtime, mime_type, kind, sniffed"
+_INSERT_FILE = "INSERT OR REPLACE INTO files (path, dir, size, mtime, inode, mime_type, kind, sniffed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+def _subtree(path: str) -> tuple:
+    """Bounds of the paths below path, "0" sorts right after the separator so the range uses the index."""
+    # a root already ends with the separator
+    prefix = path if path.endswith(os.sep) else path + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+def _media_info(row: tuple) -> MediaInfo:
+    path, size, mtime, mime_type, kind, sniffed = row
+    return MediaInfo(path, size, mtime, mime_type, kind, os.path.splitext(path)[1][1:].lower(), bool(sniffed))
+
+
+class ScanResult:
+    """Changes found by DirIndex.scan.
+    Attributes:
+        added (list): MediaInfo of new files.
+        changed (list): MediaInfo of files whose size, mtime or inode changed.
+        removed (list): Paths of files that are gone.
+        dirs_scanned (int): Directories that were listed.
+        dirs_skipped (int): Directories skipped because their mtime didn't change."""
+    __slots__ = ("added", "changed", "removed", "dirs_scanned", "dirs_skipped")
+
+    def __init__(self) -> None:
+        self.added = []
+        self.changed = []
+        self.removed = []
+        self.dirs_scanned = 0
+        self.dirs_skipped = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def __repr__(self) -> str:
+        return (f"ScanResult(added={len(self.added)}, changed={len(self.changed)}, removed={len(self.removed)}, "
+                f"dirs_scanned={self.dirs_scanned}, dirs_skipped={self.dirs_skipped})")
+
+
+class DirIndex:
+    """Persistent SQLite index of directory trees and the classification of their files.
+    A rescan only lists directories whose mtime changed and only classifies new or changed files,
+    so its cost follows the churn instead of the size of the tree.
+    A directory mtime changes when entries are created, removed or renamed in it, not when a file is
+    rewritten in place; use scan(verify=True) to also stat the files of unchanged directories.
+    Scans commit one directory at a time and only hold the database while reading or writing it, so get()
+    and files() never wait for a whole scan and see the tree as far as it has been scanned.
+    Parameters:
+        db_path (str): Path of the SQLite database, created if missing. ":memory:" keeps it in memory."""
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        # _lock guards the connection, _scan_lock keeps two scans from interleaving their directories
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+
+    async def scan(self, root: str, verify: bool = False) -> ScanResult:
+        """Bring the index of a tree up to date and report what changed since the last scan.
+        The first scan of a tree reports every file as added.
+        Parameters:
+            root (str): Directory to scan.
+            verify (bool, optional): Stat the known files of unchanged directories to catch in-place rewrites. Defaults to False.
+        Returns:
+            ScanResult: Added, changed and removed files."""
+        return await get_pool("io").run(self.scan_sync, root, verify)
+
+    def scan_sync(self, root: str, verify: bool = False) -> ScanResult:
+        """Blocking version of scan."""
+        root = os.path.abspath(root)
+        result = ScanResult()
+        with self._scan_lock:
+            if os.path.isdir(root):
+                with self._lock:
+                    parent = self._db.execute("SELECT parent FROM dirs WHERE path = ?", (root,)).fetchone()
+                stack = [(root, parent[0] if parent else None)]
+                while stack:
+                    path, parent = stack.pop()
+                    self._scan_dir(path, parent, verify, stack, result)
+            else:
+                with self._lock, self._db:
+                    self._forget_tree(root, result)
+        return result
+
+    def _scan_dir(self, path: str, parent: str, verify: bool, stack: list, result: ScanResult) -> None:
+        db = self._db
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            with self._lock, db:
+                self._forget_tree(path, result)
+            return
+        with self._lock:
+            row = db.execute("SELECT mtime FROM dirs WHERE path = ?", (path,)).fetchone()
+            known_dirs = {child for child, in db.execute("SELECT path FROM dirs WHERE parent = ?", (path,))}
+            unchanged = row is not None and row[0] == mtime
+            if not unchanged:
+                known = {
+                    file_path: (size, file_mtime, inode)
+                    for file_path, size, file_mtime, inode in db.execute("SELECT path, size, mtime, inode FROM files WHERE dir = ?", (path,))
+                }
+        if unchanged:
+            result.dirs_skipped += 1
+            stack.extend((child, path) for child in known_dirs)
+            if verify:
+                self._verify_files(path, result)
+            return
+        result.dirs_scanned += 1
+        rows = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            known_dirs.discard(entry.path)
+                            stack.append((entry.path, path))
+                        elif entry.is_file():
+                            row = self._classify(entry.path, path, entry.stat(), known.pop(entry.path, None), result)
+                            if row is not None:
+                                rows.append(row)
+                    except OSError:
+                        # vanished while listing, it is reported as removed below if it was known
+                        continue
+        except OSError:
+            with self._lock, db:
+                self._forget_tree(path, result)
+            return
+        result.removed.extend(known)
+        with self._lock, db:
+            db.executemany(_INSERT_FILE, rows)
+            db.executemany("DELETE FROM files WHERE path = ?", ((file_path,) for file_path in known))
+            for child in known_dirs:
+                self._forget_tree(child, result)
+            db.execute("INSERT OR REPLACE INTO dirs (path, parent, mtime) VALUES (?, ?, ?)", (path, parent, mtime))
+
+    def _classify(self, path: str, dir_path: str, stat_result: os.stat_result, known: tuple, result: ScanResult) -> tuple:
+        """Classify a new or changed file.
+        Returns:
+            tuple: Its files row, None if the file is unchanged or can't be read."""
+        if known == (stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino):
+            return None
+        try:
+            info = sniff(path, stat_result)
+        except OSError:
+            return None
+        (result.added if known is None else result.changed).append(info)
+        return path, dir_path, info.size, info.mtime, stat_result.st_ino, info.mime_type, info.kind, info.sniffed
+
+    def _verify_files(self, dir_path: str, result: ScanResult) -> None:
+        with self._lock:
+            known = self._db.execute("SELECT path, size, mtime, inode FROM files WHERE dir = ?", (dir_path,)).fetchall()
+        rows, removed = [], []
+        for path, size, mtime, inode in known:
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                # removing a file changes the directory mtime, unless it happened within its timestamp resolution
+                removed.append(path)
+                continue
+            row = self._classify(path, dir_path, stat_result, (size, mtime, inode), result)
+            if row is not None:
+                rows.append(row)
+        if not rows and not removed:
+            return
+        result.removed.extend(removed)
+        with self._lock, self._db:
+            self._db.executemany(_INSERT_FILE, rows)
+            self._db.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in removed))
+
+    def _forget_tree(self, path: str, result: ScanResult) -> None:
+        low, high = _subtree(path)
+        where = "(dir = ? OR (dir >= ? AND dir < ?))"
+        result.removed.extend(file_path for file_path, in self._db.execute(f"SELECT path FROM files WHERE {where}", (path, low, high)))
+        self._db.execute(f"DELETE FROM files WHERE {where}", (path, low, high))
+        self._db.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (path, low, high))
+
+    def get(self, path: str) -> MediaInfo:
+        """Get the indexed classification of a file, without touching the file.
+        Parameters:
+            path (str): Path of the file.
+        Returns:
+            MediaInfo: The classification, None if the file is not indexed."""
+        with self._lock:
+            row = self._db.execute(f"SELECT {_FILE_COLUMNS} FROM files WHERE path = ?", (os.path.abspath(path),)).fetchone()
+        return _media_info(row) if row else None
+
+    def files(self, root: str, kind: str = None) -> list:
+        """List the indexed files of a tree.
+        Parameters:
+            root (str): Directory of the tree.
+            kind (str, optional): Only files of this kind, see MediaInfo.kind.
+        Returns:
+            list: MediaInfo of every file, sorted by path."""
+        root = os.path.abspath(root)
+        low, high = _subtree(root)
+        query = f"SELECT {_FILE_COLUMNS} FROM files WHERE (dir = ? OR (dir >= ? AND dir < ?))"
+        params = [root, low, high]
+        if kind is not None:
+            query += " AND kind = ?"
+            params.append(kind)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY path", params).fetchall()
+        return [_media_info(row) for row in rows]
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "DirIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,374 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import ast
+import sys
+import math
+import pickle
+import signal
+import asyncio
+import hashlib
+import threading
+import inspect
+import traceback
+import contextvars
+from io import StringIO
+from collections import OrderedDict
+from contextlib import contextmanager
+from ..errors import SafeMode
+from . import *
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, isolated evaluations run without CPU and memory limits there
+    resource = None
+
+# names and modules safe mode refuses, as plain names, attributes or imports
+_RESTRICTED_NAMES = frozenset(("open", "os", "sys", "subprocess", "builtins", "io", "pathlib", "importlib"))
+# builtins that reach the names above through strings or introspection, refused as plain names or attributes
+_RESTRICTED_BUILTINS = frozenset((
+    "getattr", "__import__", "eval", "exec", "__builtins__", "globals", "vars", "locals", "dir", "type", "object",
+))
+# the only dunder name safe code may use, for if __name__ == "__main__"
+_ALLOWED_DUNDERS = frozenset(("__name__",))
+# match statements read attributes by keyword, Python 3.10+
+_MATCH_CLASS = getattr(ast, "MatchClass", ())
+CODE_CACHE_SIZE = 256
+_code_cache = OrderedDict()
+_code_cache_lock = threading.Lock()
+_code_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _is_restricted(name: str) -> bool:
+    return name in _RESTRICTED_NAMES or name in _RESTRICTED_BUILTINS
+
+
+def _is_dunder(name: str) -> bool:
+    return len(name) > 4 and name.startswith("__") and name.endswith("__")
+
+
+def _is_safe(tree: ast.AST) -> bool:
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and (_is_restricted(node.id) or _is_dunder(node.id) and node.id not in _ALLOWED_DUNDERS):
+            return False
+        # dunder attributes lead from any object to its class, its subclasses and the builtins of their modules
+        if isinstance(node, ast.Attribute) and (_is_restricted(node.attr) or _is_dunder(node.attr)):
+            return False
+        if isinstance(node, _MATCH_CLASS) and any(_is_restricted(attr) or _is_dunder(attr) for attr in node.kwd_attrs):
+            return False
+        # globals()['__builtins__'] style lookups spell the name as a string
+        if isinstance(node, ast.Constant) and isinstance(node.value, str) and _is_restricted(node.value):
+            return False
+        if isinstance(node, ast.Import) and any(alias.name.split(".")[0] in _RESTRICTED_NAMES for alias in node.names):
+            return False
+        if isinstance(node, ast.ImportFrom) and node.module and node.module.split(".")[0] in _RESTRICTED_NAMES:
+            return False
+    return True
+
+
+def compile_code(code: str, safe_mode: bool = False, mode: str = "exec"):
+    """Compile Python code, top level await is allowed.
+    Code objects are kept in an LRU cache keyed by a hash of the source and the mode, together with
+    the safe mode verdict, so running the same snippet again skips parsing and checking entirely.
+    Parameters:
+        code (str): Python code to compile.
+        safe_mode (bool, optional): Whether to enable safe mode or not. Defaults to False.
+        mode (str, optional): "exec" or "eval". Defaults to "exec".
+    Returns:
+        code: The code object, a coroutine code object if the code uses top level await.
+    Raises:
+        SafeMode: If safe mode is enabled and the code uses open, os, sys, subprocess, builtins, io, pathlib
+            or importlib, or getattr, __import__, eval, exec, __builtins__, globals, vars, locals, dir, type or
+            object that could reach them, as a name, an attribute or a string, or any dunder attribute.
+        SyntaxError: If the code is invalid."""
+    key = (hashlib.blake2b(code.encode("utf-8", "surrogatepass"), digest_size=16).digest(), mode)
+    with _code_cache_lock:
+        entry = _code_cache.get(key)
+        if entry is not None:
+            _code_cache.move_to_end(key)
+            _code_cache_stats["hits"] += 1
+    if entry is None:
+        tree = ast.parse(code, filename="<string>", mode=mode)
+        entry = (compile(tree, filename="<string>", mode=mode, flags=ast.PyCF_ALLOW_TOP_LEVEL_AWAIT), _is_safe(tree))
+        with _code_cache_lock:
+            _code_cache_stats["misses"] += 1
+            _code_cache[key] = entry
+            if len(_code_cache) > CODE_CACHE_SIZE:
+                _code_cache.popitem(last=False)
+    compiled, safe = entry
+    if safe_mode and not safe:
+        raise SafeMode("Unsafe command detected in safe mode")
+    return compiled
+
+
+def code_cache_info() -> dict:
+    """Get statistics of the compiled code cache.
+    Returns:
+        dict: hits, misses, size and maxsize."""
+    with _code_cache_lock:
+        return {**_code_cache_stats, "size": len(_code_cache), "maxsize": CODE_CACHE_SIZE}
+
+
+def clear_code_cache() -> None:
+    """Forget every compiled code object and reset the statistics."""
+    with _code_cache_lock:
+        _code_cache.clear()
+        _code_cache_stats.update(hits=0, misses=0)
+
+
+def is_async_code(compiled) -> bool:
+    """Whether a compiled code object uses top level await and has to be awaited."""
+    return bool(compiled.co_flags & inspect.CO_COROUTINE)
+
+
+_captured = contextvars.ContextVar("AsyncPyToolbox_captured_output", default=None)
+
+
+class _OutputProxy:
+    """Stands in for sys.stdout or sys.stderr and writes to the buffers of the capture active in the
+    current context, to the real stream otherwise. Tasks and threads started with a copy of the
+    context are captured too, unrelated tasks are not."""
+    def __init__(self, index: int, stream) -> None:
+        self._index = index
+        self._stream = stream
+
+    def write(self, text: str) -> int:
+        buffers = _captured.get()
+        return (self._stream if buffers is None else buffers[self._index]).write(text)
+
+    def flush(self) -> None:
+        if _captured.get() is None:
+            self._stream.flush()
+
+    def __getattr__(self, name: str):
+        return getattr(self._stream, name)
+
+
+def _install_proxies() -> None:
+    if not isinstance(sys.stdout, _OutputProxy):
+        sys.stdout = _OutputProxy(0, sys.stdout)
+    if not isinstance(sys.stderr, _OutputProxy):
+        sys.stderr = _OutputProxy(1, sys.stderr)
+
+
+@contextmanager
+def capture_output():
+    """Capture what is printed in the current context, without touching other tasks.
+    Yields:
+        tuple: (stdout, stderr) StringIO buffers."""
+    _install_proxies()
+    buffers = (StringIO(), StringIO())
+    token = _captured.set(buffers)
+    try:
+        yield buffers
+    finally:
+        _captured.reset(token)
+
+
+class _CpuLimitExceeded(Exception):
+    pass
+
+
+def _on_cpu_limit(signum, frame) -> None:
+    raise _CpuLimitExceeded("CPU time limit exceeded")
+
+
+def _picklable_namespace(namespace: dict) -> dict:
+    """Values that can't be sent back to the parent process are replaced by their repr."""
+    result = {}
+    for key, value in namespace.items():
+        if key.startswith("__"):
+            continue
+        try:
+            pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            value = repr(value)
+        result[key] = value
+    return result
+
+
+def _evaluate_in_worker(code: str, safe_mode: bool) -> tuple:
+    stdout, stderr = StringIO(), StringIO()
+    namespace = {}
+    exc = None
+    old_stdout, old_stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = stdout, stderr
+    try:
+        compiled = compile_code(code, safe_mode)
+        result = eval(compiled, namespace)
+        if is_async_code(compiled):
+            asyncio.run(result)
+    except (Exception, SystemExit):
+        exc = traceback.format_exc()
+    finally:
+        sys.stdout, sys.stderr = old_stdout, old_stderr
+    return exc, stdout.getvalue(), stderr.getvalue(), _picklable_namespace(namespace)
+
+
+def _worker_main(conn, memory_mb: int) -> None:
+    """Loop of an evaluation worker process, one request at a time until the pipe closes."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if resource is not None:
+        if memory_mb:
+            limit = memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+        hard_cpu_limit = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+        code, safe_mode, cpu_seconds = request
+        if resource is not None and cpu_seconds:
+            # RLIMIT_CPU counts the whole life of the process, move the soft limit past what is used so far
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            soft = math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)
+            if hard_cpu_limit != resource.RLIM_INFINITY:
+                soft = min(soft, hard_cpu_limit)
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, hard_cpu_limit))
+        try:
+            result = _evaluate_in_worker(code, safe_mode)
+        finally:
+            if resource is not None and cpu_seconds:
+                resource.setrlimit(resource.RLIMIT_CPU, (hard_cpu_limit, hard_cpu_limit))
+        conn.send(result)
+
+
+class _Worker:
+    __slots__ = ("process", "conn")
+
+    def __init__(self, memory_mb: int) -> None:
+        import multiprocessing
+        context = multiprocessing.get_context("spawn")
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child, memory_mb), daemon=True, name="AsyncPyToolbox-eval")
+        self.process.start()
+        child.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    async def receive(self):
+        """Wait for the answer of the worker on the event loop, without holding a thread.
+        The worker sends each answer in one go, so once the pipe is readable the rest of it follows
+        right away. Where the loop can't watch pipes (Windows) a thread of the "io" pool waits instead."""
+        loop = asyncio.get_running_loop()
+        fd = self.conn.fileno()
+        readable = loop.create_future()
+        try:
+            loop.add_reader(fd, lambda: readable.done() or readable.set_result(None))
+        except (NotImplementedError, ValueError, OSError):
+            return await get_pool("io").run(self.conn.recv)
+        try:
+            await readable
+        finally:
+            loop.remove_reader(fd)
+        return self.conn.recv()
+
+
+class EvalPool:
+    """Pre-started worker processes evaluating Python code in parallel, away from the event loop.
+    Each evaluation gets a fresh namespace in a worker, with a CPU time and an address space limit
+    (POSIX only) and a wall clock timeout. A worker that hits the timeout, crashes or is cancelled
+    is killed and replaced, workers that finish normally are reused.
+    Parameters:
+        workers (int, optional): Number of worker processes. Defaults to 2.
+        cpu_seconds (int, optional): CPU seconds each evaluation may use. Defaults to 10.
+        memory_mb (int, optional): Address space limit of each worker in MiB, 0 for none. Defaults to 512.
+        timeout (float, optional): Wall clock seconds each evaluation may take. Defaults to 30."""
+    def __init__(self, workers: int = 2, cpu_seconds: int = 10, memory_mb: int = 512, timeout: float = 30.0) -> None:
+        self.workers = workers
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.timeout = timeout
+        self._idle = None
+        self._all = set()
+        self._replacing = set()
+
+    async def _spawn(self) -> None:
+        worker = await get_pool("io").run(_Worker, self.memory_mb)
+        if self._idle is None:
+            # closed while the worker was starting
+            await get_pool("io").run(worker.kill)
+            return
+        self._all.add(worker)
+        self._idle.put_nowait(worker)
+
+    async def start(self) -> None:
+        """Start the worker processes, evaluate() calls it on first use."""
+        if self._idle is not None:
+            return
+        self._idle = asyncio.Queue()
+        await asyncio.gather(*(self._spawn() for _ in range(self.workers)))
+
+    async def _replace(self, worker: _Worker) -> None:
+        await get_pool("io").run(worker.kill)
+        if self._idle is not None:
+            await self._spawn()
+
+    def _discard(self, worker: _Worker) -> None:
+        """Kill a worker and start another one, both in the "io" pool, joining a killed process blocks."""
+        self._all.discard(worker)
+        task = asyncio.ensure_future(self._replace(worker))
+        self._replacing.add(task)
+        task.add_done_callback(self._replacing.discard)
+
+    async def evaluate(self, code: str, safe_mode: bool = False) -> tuple:
+        """Evaluate Python code in a worker process.
+        Parameters:
+            code (str): Python code to evaluate, top level await is allowed.
+            safe_mode (bool, optional): Whether to enable safe mode or not. Defaults to False.
+        Returns:
+            tuple: (exception, stdout, stderr, namespace), namespace values that can't be pickled are replaced by their repr."""
+        await self.start()
+        worker = await self._idle.get()
+        try:
+            worker.conn.send((code, safe_mode, self.cpu_seconds))
+            result = await asyncio.wait_for(worker.receive(), self.timeout)
+        except asyncio.TimeoutError:
+            self._discard(worker)
+            return f"TimeoutError: evaluation took longer than {self.timeout} seconds\n", "", "", {}
+        except (EOFError, OSError):
+            exitcode = worker.process.exitcode
+            self._discard(worker)
+            return f"RuntimeError: evaluation worker died (exit code {exitcode})\n", "", "", {}
+        except BaseException:
+            self._discard(worker)
+            raise
+        self._idle.put_nowait(worker)
+        return result
+
+    async def close(self) -> None:
+        """Stop every worker process."""
+        idle, self._idle = self._idle, None
+        workers, self._all = self._all, set()
+        await asyncio.gather(*(get_pool("io").run(worker.kill) for worker in workers), *self._replacing, return_exceptions=True)
+
+    async def __aenter__(self) -> "EvalPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+_default_pool = None
+
+
+def get_eval_pool() -> EvalPool:
+    """Get the EvalPool used by evaluate_code(isolated=True), created with default settings on first use."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = EvalPool()
+    return _default_pool
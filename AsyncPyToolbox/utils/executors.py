@@ -0,0 +1,426 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import os
+import atexit
+import pickle
+import asyncio
+import weakref
+import importlib
+import threading
+from time import perf_counter
+from functools import wraps
+from collections import deque
+from concurrent.futures import BrokenExecutor
+from concurrent.futures.thread import ThreadPoolExecutor
+from ..errors import PoolOverloaded
+
+
+def _cpu_count() -> int:
+    """Number of CPUs this process is allowed to run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+class _Limiter:
+    """Per event loop concurrency limit with a bounded wait queue.
+    Parameters:
+        name (str): Name used in error messages.
+        limit (int): Maximum number of holders at once.
+        max_queued (int, optional): Maximum number of waiters. Defaults to unbounded."""
+    def __init__(self, name: str, limit: int, max_queued: int = None) -> None:
+        self.name = name
+        self.limit = limit
+        self.max_queued = max_queued
+        self.inflight = 0
+        self.queued = 0
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self, loop) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.limit)
+        return semaphore
+
+    async def acquire(self, loop) -> None:
+        semaphore = self._semaphore(loop)
+        if semaphore.locked() and self.max_queued is not None and self.queued >= self.max_queued:
+            raise PoolOverloaded(f"{self.name}: {self.queued} calls already waiting")
+        self.queued += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.inflight += 1
+
+    def release(self, loop) -> None:
+        self.inflight -= 1
+        self._semaphore(loop).release()
+
+
+class ExecutorPool:
+    """A named executor that is only created on first use.
+    Parameters:
+        name (str): Name of the pool.
+        max_workers (int): Maximum number of workers.
+        max_inflight (int, optional): Maximum number of calls submitted at once. Defaults to max_workers.
+        max_queued (int, optional): Maximum number of calls waiting for a slot, PoolOverloaded is raised past it. Defaults to unbounded."""
+    def __init__(self, name: str, max_workers: int, max_inflight: int = None, max_queued: int = None) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self.limiter = _Limiter(f"pool {name!r}", max_inflight or max_workers, max_queued)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _create_executor(self):
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"AsyncPyToolbox-{self.name}")
+
+    @property
+    def executor(self):
+        """The underlying executor, created on first access."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._create_executor()
+        return self._executor
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    def stats(self) -> dict:
+        """Get current load of the pool.
+        Returns:
+            dict: started, inflight and queued counts."""
+        return {"started": self.started, "inflight": self.limiter.inflight, "queued": self.limiter.queued}
+
+    async def submit(self, func, args: tuple = (), kwargs: dict = None, limiters: tuple = ()):
+        """Run func(*args, **kwargs) in the pool once a slot is free.
+        Slots are only released when the call actually finishes, so cancelling the awaiting task
+        does not let more work pile up behind a still running call.
+        Parameters:
+            func (function): Blocking function to run.
+            args (tuple, optional): Positional arguments.
+            kwargs (dict, optional): Keyword arguments.
+            limiters (tuple, optional): Extra limiters to hold while the call runs.
+        Raises:
+            PoolOverloaded: If the wait queue of the pool or of an extra limiter is full."""
+        loop = asyncio.get_running_loop()
+        acquired = []
+        try:
+            for limiter in (*limiters, self.limiter):
+                await limiter.acquire(loop)
+                acquired.append(limiter)
+            future = self.executor.submit(func, *args, **(kwargs or {}))
+        except BaseException:
+            for limiter in acquired:
+                limiter.release(loop)
+            raise
+
+        def _release():
+            for limiter in acquired:
+                limiter.release(loop)
+
+        def _on_done(_):
+            try:
+                loop.call_soon_threadsafe(_release)
+            except RuntimeError:
+                pass
+
+        future.add_done_callback(_on_done)
+        return await asyncio.wrap_future(future, loop=loop)
+
+    async def run(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) in the pool and return its result."""
+        return await self.submit(func, args, kwargs)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """Shut the executor down, it is created again on next use.
+        Parameters:
+            wait (bool, optional): Wait for running calls to finish. Defaults to True.
+            cancel_futures (bool, optional): Cancel calls that did not start yet. Defaults to False."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+class ProcessExecutorPool(ExecutorPool):
+    """An ExecutorPool backed by worker processes, for CPU bound work that the GIL would serialize.
+    Workers are spawned, not forked, the process already runs thread pools and forking it can copy
+    locks held by other threads. Like with EvalPool, scripts starting the pool need the
+    if __name__ == "__main__" guard. A pool whose worker died is replaced on next use instead of
+    failing every later call."""
+    def _create_executor(self):
+        # multiprocessing is only imported once a process pool is actually used
+        import multiprocessing
+        from concurrent.futures.process import ProcessPoolExecutor
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    async def submit(self, func, args: tuple = (), kwargs: dict = None, limiters: tuple = ()):
+        try:
+            return await super().submit(func, args, kwargs, limiters)
+        except BrokenExecutor:
+            self.shutdown(wait=False)
+            raise
+
+
+def _call_by_reference(module: str, qualname: str, payload: bytes):
+    """Import and call a function inside a worker process.
+    Decorated functions are shadowed by their wrapper in their module, so they can't be pickled
+    directly; the worker looks the wrapper up by name and calls the original behind it.
+    The arguments arrive already pickled, so the executor only has to copy the bytes."""
+    target = importlib.import_module(module)
+    for part in qualname.split("."):
+        target = getattr(target, part)
+    while hasattr(target, "__wrapped__"):
+        target = target.__wrapped__
+    args, kwargs = pickle.loads(payload)
+    return target(*args, **kwargs)
+
+
+def _pickled(value):
+    """Pickled bytes of value, None if it can't be pickled."""
+    try:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return None
+
+
+def _input_size(args: tuple, kwargs: dict) -> int:
+    """Rough size of the arguments of a call, the length of sized ones and 1 for the others."""
+    size = 0
+    for value in (*args, *kwargs.values()):
+        try:
+            size += len(value)
+        except TypeError:
+            size += 1
+    return size or 1
+
+
+class _CallCost:
+    """Moving average of how long a function takes to run per unit of input size, in seconds."""
+    __slots__ = ("average",)
+
+    def __init__(self) -> None:
+        self.average = None
+
+    def add(self, elapsed: float, size: int = 1) -> None:
+        elapsed /= size
+        self.average = elapsed if self.average is None else self.average + (elapsed - self.average) * 0.2
+
+    def estimate(self, size: int = 1) -> float:
+        """Expected cost of a call with an input of the given size, None before the first call."""
+        return None if self.average is None else self.average * size
+
+
+def _timed_call(func, cost: _CallCost, args: tuple, kwargs: dict, size: int = 1):
+    start = perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        cost.add(perf_counter() - start, size)
+
+
+_CPU_COUNT = _cpu_count()
+_POOL_DEFAULTS = {
+    # blocking file and network calls
+    "io": {"max_workers": min(32, _CPU_COUNT + 4)},
+    # heavier pure python work, one thread per core is plenty with the GIL
+    "cpu": {"max_workers": _CPU_COUNT},
+    # tiny calls that should never queue behind io or cpu work
+    "short": {"max_workers": min(4, _CPU_COUNT), "max_inflight": min(4, _CPU_COUNT) * 4},
+    # CPU bound work that needs real parallelism
+    "process": {"max_workers": _CPU_COUNT, "kind": "process"},
+}
+_POOL_KINDS = {"thread": ExecutorPool, "process": ProcessExecutorPool}
+# calls averaging less than this run directly on the loop in "auto" mode,
+# a round trip through a thread costs about as much
+INLINE_THRESHOLD = 50e-6
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _new_pool(name: str, settings: dict) -> ExecutorPool:
+    settings = dict(settings)
+    return _POOL_KINDS[settings.pop("kind", "thread")](name, **settings)
+
+
+def configure_pool(name: str, max_workers: int = None, max_inflight: int = None, max_queued: int = None, kind: str = None) -> ExecutorPool:
+    """Register a pool or change the settings of an existing one.
+    A pool that is already running is shut down (without waiting) and recreated on next use.
+    Parameters:
+        name (str): Name of the pool.
+        max_workers (int, optional): Maximum number of workers. Defaults to the pool default or the number of CPUs.
+        max_inflight (int, optional): Maximum number of calls submitted at once. Defaults to max_workers.
+        max_queued (int, optional): Maximum number of calls waiting for a slot. Defaults to unbounded.
+        kind (str, optional): "thread" or "process". Defaults to the pool default or "thread".
+    Returns:
+        ExecutorPool: The configured pool."""
+    settings = dict(_POOL_DEFAULTS.get(name, {"max_workers": _CPU_COUNT}))
+    if max_workers is not None:
+        settings["max_workers"] = max_workers
+        settings.pop("max_inflight", None)
+    if max_inflight is not None:
+        settings["max_inflight"] = max_inflight
+    if max_queued is not None:
+        settings["max_queued"] = max_queued
+    if kind is not None:
+        if kind not in _POOL_KINDS:
+            raise ValueError(f"Unknown pool kind {kind!r}, expected one of {', '.join(_POOL_KINDS)}")
+        settings["kind"] = kind
+    with _pools_lock:
+        old = _pools.get(name)
+        _pools[name] = pool = _new_pool(name, settings)
+    if old is not None:
+        old.shutdown(wait=False)
+    return pool
+
+
+def get_pool(name: str = "io") -> ExecutorPool:
+    """Get a pool by name, unknown names get a pool with default settings.
+    Parameters:
+        name (str, optional): Name of the pool. Defaults to "io"."""
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = _pools[name] = _new_pool(name, _POOL_DEFAULTS.get(name, {"max_workers": _CPU_COUNT}))
+    return pool
+
+
+def shutdown_pools(wait: bool = True, cancel_futures: bool = False) -> None:
+    """Shut down every running pool.
+    Parameters:
+        wait (bool, optional): Wait for running calls to finish. Defaults to True.
+        cancel_futures (bool, optional): Cancel calls that did not start yet. Defaults to False."""
+    for pool in list(_pools.values()):
+        pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+atexit.register(shutdown_pools)
+
+
+def run_in_exc(func_=None, *, pool: str = None, mode: str = "thread", max_inflight: int = None, max_queued: int = None, inline_below: float = INLINE_THRESHOLD):
+    """Run a blocking function in a thread pool executor and return an awaitable.
+    Can be used bare (@run_in_exc) or with arguments (@run_in_exc(pool="cpu", max_inflight=2)).
+    Modes:
+        thread: run in a thread pool.
+        process: run in a process pool, calls with arguments that can't be pickled fall back to the "cpu" thread pool.
+        inline: run directly on the event loop, for calls cheaper than a thread hop.
+        auto: run inline while the expected cost of a call, measured per unit of input size, stays below inline_below, in a thread pool otherwise.
+    Parameters:
+        func_ (function): Blocking function to run.
+        pool (str, optional): Name of the pool to run in. Defaults to "process" in process mode and "io" otherwise.
+        mode (str, optional): One of "thread", "process", "inline" or "auto". Defaults to "thread".
+        max_inflight (int, optional): Maximum number of calls of this function running at once. Defaults to the pool limit.
+        max_queued (int, optional): Maximum number of calls of this function waiting for a slot, only used with max_inflight. Defaults to unbounded.
+        inline_below (float, optional): Average call cost in seconds under which auto mode runs inline. Defaults to INLINE_THRESHOLD."""
+    if mode not in ("thread", "process", "inline", "auto"):
+        raise ValueError(f"Unknown mode {mode!r}, expected thread, process, inline or auto")
+    pool_name = pool or ("process" if mode == "process" else "io")
+
+    def decorator(func):
+        limiters = (_Limiter(func.__qualname__, max_inflight, max_queued),) if max_inflight else ()
+
+        if mode == "inline":
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                return func(*args, **kwargs)
+
+        elif mode == "auto":
+            cost = _CallCost()
+
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                # the cost is tracked per unit of input, so a large input isn't run inline after a few small ones
+                size = _input_size(args, kwargs)
+                estimate = cost.estimate(size)
+                if estimate is not None and estimate < inline_below:
+                    return _timed_call(func, cost, args, kwargs, size)
+                return await get_pool(pool_name).submit(_timed_call, (func, cost, args, kwargs, size), None, limiters)
+            wrapper.call_cost = cost
+
+        elif mode == "process":
+            by_reference = "<locals>" not in func.__qualname__
+
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                # pickled once here, the executor then only copies the bytes
+                payload = _pickled((args, kwargs)) if by_reference else None
+                if payload is not None:
+                    return await get_pool(pool_name).submit(
+                        _call_by_reference, (func.__module__, func.__qualname__, payload), None, limiters
+                    )
+                return await get_pool("cpu").submit(func, args, kwargs, limiters)
+
+        else:
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                return await get_pool(pool_name).submit(func, args, kwargs, limiters)
+        return wrapper
+
+    if func_ is not None:
+        return decorator(func_)
+    return decorator
+
+
+async def chunked(values, size: int):
+    """Group an iterable or async iterable into lists of at most size items.
+    Parameters:
+        values (iterable): An iterable or async iterable.
+        size (int): Maximum number of items per list."""
+    chunk = []
+    if hasattr(values, "__aiter__"):
+        async for value in values:
+            chunk.append(value)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    else:
+        for value in values:
+            chunk.append(value)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _apply_to_chunk(func, chunk: list, kwargs: dict) -> list:
+    return [func(value, **kwargs) for value in chunk]
+
+
+async def map_in_exc(func, values, kwargs: dict = None, chunk_size: int = 256, pool: str = "short", concurrency: int = 2):
+    """Apply a blocking function to many values with one executor round trip per chunk.
+    Results are yielded in input order; up to concurrency chunks are in flight at once.
+    Parameters:
+        func (function): Blocking function taking one value.
+        values (iterable): Values to process, an iterable or async iterable.
+        kwargs (dict, optional): Extra keyword arguments passed to every call.
+        chunk_size (int, optional): Number of values per executor call. Defaults to 256.
+        pool (str, optional): Name of the pool to run in. Defaults to "short".
+        concurrency (int, optional): Number of chunks in flight. Defaults to 2.
+    Yields:
+        The result for every value, in order."""
+    executor_pool = get_pool(pool)
+    pending = deque()
+    try:
+        async for chunk in chunked(values, chunk_size):
+            pending.append(asyncio.ensure_future(executor_pool.submit(_apply_to_chunk, (func, chunk, kwargs or {}))))
+            if len(pending) >= concurrency:
+                for result in await pending.popleft():
+                    yield result
+        while pending:
+            for result in await pending.popleft():
+                yield result
+    finally:
+        for task in pending:
+            task.cancel()
@@ -8,12 +8,15 @@
 
 from . import *
 import os
+import asyncio
 import mimetypes
+from .sniffer import MediaInfo, sniff
+from .mediameta import MediaMetadata, read_metadata
+from .image import resize_image
+from .walker import iter_files
 
 # Check if PIL is installed
 is_pil_installed = check_if_package_exists("PIL")
-if is_pil_installed:
-    from PIL import Image
 
 
 class FileHelpers:
@@ -30,56 +33,52 @@ class FileHelpers:
     def _get_metadata(self, is_audio=True) -> tuple:
         """Get metadata of a file.
         Parameters:
-            is_audio (bool, optional): Whether the file is audio or not. Defaults to True."""
-        dur, title = 0, None
-        if is_audio:
-            try:
-                with open(self.__file__, 'rb') as file:
-                    file.seek(-128, 2)
-                    tag = file.read(128).decode('utf-8')
-                    title = tag[3:32].strip('\x00')
-            except Exception:
-                pass
-        else:
-            dur = self.get_meta_data_video()[0] or 0
-        return dur, title
+            is_audio (bool, optional): Whether the file is audio or not, video files have no title. Defaults to True.
+        Returns:
+            tuple: (duration in seconds, title)"""
+        meta = self.metadata()
+        return round(meta.duration), (meta.title if is_audio else None)
 
     def _resize_if_req(self, image_size_allowed=1280) -> None:
         """Resize an image if it's size is greater than the allowed size.
+        The format and JPEG quality are kept and the file is replaced atomically, see utils.image.resize_image.
         Parameters:
             image_size_allowed (int, optional): Maximum size of the image. Defaults to 1280."""
         if is_pil_installed:
-            im = Image.open(self.__file__)
-            if max(im.size) > image_size_allowed:
-                im.thumbnail((image_size_allowed, image_size_allowed))
-                im.save(self.__file__)
-        pass
+            resize_image.__wrapped__(self.__file__, image_size_allowed)
 
     def get_meta_data_video(self) -> tuple:
         """Get metadata of a video file.
         Returns:
-            tuple: (duration, width, height)"""
+            tuple: (duration in seconds, width, height)"""
+        meta = self.metadata()
+        return round(meta.duration), meta.width, meta.height
+
+    def metadata(self) -> MediaMetadata:
+        """Read duration, dimensions and tags from the container, touching only the needed parts of the file.
+        Returns:
+            MediaMetadata: The metadata, empty if the file can't be read."""
         try:
-            with open(self.__file__, 'rb') as file:
-                data = file.read(200)
-                dur = data.find(b'\x96\x9e') + 6 if b'\x96\x9e' in data else 0
-                width = data.find(b'\x00\x00\x00\x01\x67') + 9 if b'\x00\x00\x00\x01\x67' in data else 0
-                height = data.find(b'\x00\x00\x00\x01\x68') + 9 if b'\x00\x00\x00\x01\x68' in data else 0
-            return dur, width, height
-        except Exception:
-            return 0, 0, 0
+            return read_metadata(self.__file__)
+        except OSError:
+            return MediaMetadata()
+
+    @property
+    def media_info(self) -> MediaInfo:
+        """Classification of the file, the header is read once per (path, size, mtime).
+        Returns:
+            MediaInfo: Mime type, kind, extension and size of the file."""
+        return sniff(self.__file__)
 
     def get_by_reading(self) -> str:
         """Get mime type of a file by reading it.
         Returns:
             str: Mime type of the file."""
         try:
-            with open(self.__file__, 'rb') as file:
-                data = file.read(200)
-                mime_type = data.find(b'ftyp') + 8
-                return data[mime_type:mime_type + 8].decode('utf-8')
-        except Exception:
+            info = self.media_info
+        except OSError:
             return None
+        return info.mime_type if info.sniffed else None
 
     def guess_mime_type_from_mimetypes(self) -> str:
         """Guess mime type of a file from mimetypes.
@@ -91,7 +90,10 @@ class FileHelpers:
         """Guess mime type of a file.
         Returns:
             str: Mime type of the file."""
-        return self.get_by_reading() or self.guess_mime_type_from_mimetypes()
+        try:
+            return self.media_info.mime_type
+        except OSError:
+            return self.guess_mime_type_from_mimetypes()
 
     def _is_media(self, media_type) -> bool:
         """Check if a file is a media file.
@@ -100,7 +102,13 @@ class FileHelpers:
         Returns:
             bool: Whether the file is a media file or not."""
         mt = self.guess_mime_type()
-        return mt and mt.startswith(media_type)
+        return bool(mt and mt.startswith(media_type))
+
+    def _is_kind(self, kind: str) -> bool:
+        try:
+            return self.media_info.kind == kind
+        except OSError:
+            return False
 
     @property
     def is_audio(self) -> bool:
@@ -108,7 +116,7 @@ class FileHelpers:
         Returns:
             bool: Whether the file is an audio file or not.
         """
-        return self._is_media("audio/")
+        return self._is_kind("audio")
 
     @property
     def is_audio_note(self) -> bool:
@@ -116,7 +124,7 @@ class FileHelpers:
         Returns:
             bool: Whether the file is an audio note or not.
         """
-        return self.is_audio and self.guess_mime_type().endswith((".ogg"))
+        return self.is_audio and self.guess_mime_type() == "audio/ogg"
 
     @property
     def is_video(self) -> bool:
@@ -124,7 +132,7 @@ class FileHelpers:
         Returns:
             bool: Whether the file is a video file or not.
         """
-        return self._is_media("video/")
+        return self._is_kind("video")
 
     @property
     def is_photo(self) -> bool:
@@ -132,7 +140,7 @@ class FileHelpers:
         Returns:
             bool: Whether the file is a photo file or not.
         """
-        return self._is_media("image/")
+        return self._is_kind("photo")
 
     @property
     def get_ext(self) -> str:
@@ -147,7 +155,7 @@ class FileHelpers:
         Returns:
             bool: Whether the file is an animated sticker or not.
         """
-        return self.get_ext == "tgs" and not any([self.is_audio, self.is_video, self.is_photo, self.is_sticker])
+        return self._is_kind("animated_sticker")
 
     @property
     def is_sticker(self) -> bool:
@@ -155,7 +163,7 @@ class FileHelpers:
         Returns:
             bool: Whether the file is a sticker or not.
         """
-        return self.get_ext == "webp" and not any([self.is_audio, self.is_video, self.is_photo])
+        return self._is_kind("sticker")
 
     @property
     def is_document(self) -> bool:
@@ -163,25 +171,142 @@ class FileHelpers:
         Returns:
             bool: Whether the file is a document or not.
         """
-        return not any([self.is_audio, self.is_video, self.is_photo, self.is_sticker, self.is_animated_sticker])
+        return self._is_kind("document")
+
+
+
+class AsyncFileHelpers:
+    """Async counterpart of FileHelpers, the file is only stat-ed and read off the event loop.
+    Parameters:
+        file (str): Path of the file."""
+    def __init__(self, file) -> None:
+        self.__file__ = file
+
+    async def exists(self) -> bool:
+        """Check if the file exists.
+        Returns:
+            bool: Whether the file exists or not."""
+        return await get_pool("io").run(os.path.exists, self.__file__)
+
+    async def media_info(self) -> MediaInfo:
+        """Classification of the file, the header is read once per (path, size, mtime).
+        Returns:
+            MediaInfo: Mime type, kind, extension and size of the file.
+        Raises:
+            OSError: If the file doesn't exist or can't be read."""
+        return await get_pool("io").run(sniff, self.__file__)
+
+    async def metadata(self) -> MediaMetadata:
+        """Read duration, dimensions and tags from the container.
+        Returns:
+            MediaMetadata: The metadata, empty if the file can't be read."""
+        try:
+            return await get_pool("io").run(read_metadata, self.__file__)
+        except OSError:
+            return MediaMetadata()
+
+    async def guess_mime_type(self) -> str:
+        """Guess mime type of a file.
+        Returns:
+            str: Mime type of the file."""
+        try:
+            return (await self.media_info()).mime_type
+        except OSError:
+            return mimetypes.guess_type(self.__file__)[0]
+
+    async def _is_kind(self, kind: str) -> bool:
+        try:
+            return (await self.media_info()).kind == kind
+        except OSError:
+            return False
+
+    async def is_audio(self) -> bool:
+        """Check if a file is an audio file."""
+        return await self._is_kind("audio")
+
+    async def is_audio_note(self) -> bool:
+        """Check if a file is an audio note."""
+        try:
+            return (await self.media_info()).mime_type == "audio/ogg"
+        except OSError:
+            return False
+
+    async def is_video(self) -> bool:
+        """Check if a file is a video file."""
+        return await self._is_kind("video")
+
+    async def is_photo(self) -> bool:
+        """Check if a file is a photo file."""
+        return await self._is_kind("photo")
+
+    async def is_sticker(self) -> bool:
+        """Check if a file is a sticker."""
+        return await self._is_kind("sticker")
+
+    async def is_animated_sticker(self) -> bool:
+        """Check if a file is an animated sticker."""
+        return await self._is_kind("animated_sticker")
+
+    async def is_document(self) -> bool:
+        """Check if a file is a document."""
+        return await self._is_kind("document")
+
+    @property
+    def get_ext(self) -> str:
+        """Get extension of a file.
+        Returns:
+            str: Extension of the file."""
+        return os.path.splitext(self.__file__)[1][1:]
 
+    @staticmethod
+    async def classify_many(paths, concurrency: int = 32, return_exceptions: bool = False):
+        """Classify many files concurrently, yielding each result as soon as it is ready.
+        Parameters:
+            paths (iterable): Paths to classify, an iterable or async iterable.
+            concurrency (int, optional): Maximum number of files read at once. Defaults to 32.
+            return_exceptions (bool, optional): Yield the OSError of unreadable files instead of raising it. Defaults to False.
+        Yields:
+            tuple: (path, MediaInfo) for every file, or (path, OSError) for unreadable ones with return_exceptions, in completion order."""
+        pool = get_pool("io")
+        pending = {}
+        try:
+            # chunked() takes both iterables and async iterables
+            async for batch in chunked(paths, 1):
+                pending[asyncio.ensure_future(pool.run(sniff, batch[0]))] = batch[0]
+                if len(pending) < concurrency:
+                    continue
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for result in _results(done, pending, return_exceptions):
+                    yield result
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for result in _results(done, pending, return_exceptions):
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def _results(done: set, pending: dict, return_exceptions: bool):
+    for task in done:
+        path = pending.pop(task)
+        exc = task.exception()
+        if exc is None:
+            yield path, task.result()
+        elif return_exceptions and isinstance(exc, OSError):
+            yield path, exc
+        else:
+            raise exc
 
 
-def scandir(dir, ext=None, subfolders=[], files=[]) -> list:
+def scandir(dir, ext=None, subfolders=None, files=None) -> list:
     """Scans a directory for files and returns a list of files found.
+    Use walker.iter_files to get the files lazily, with more filters.
     Parameters:
         dir (str): The directory to scan.
         ext (list, optional): A list of extensions to filter by. Defaults to None.
-        subfolders (list, optional): A list of subfolders to scan. Defaults to [].
-        files (list, optional): A list of files to append to. Defaults to []."""
-    for f in os.scandir(dir):
-        if f.is_dir():
-            scandir(f.path, ext, subfolders, files)
-        if f.is_file():
-            if ext and os.path.splitext(f.name)[1].lower() in ext:
-                files.append(f.path)
-            else:
-                files.append(f.path)
+        subfolders (list, optional): Unused, kept for compatibility.
+        files (list, optional): A list of files to append to. Defaults to a new list."""
+    files = [] if files is None else files
+    files.extend(entry.path for entry in iter_files(dir, ext=ext))
     return files
-
-
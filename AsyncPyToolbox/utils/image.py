@@ -0,0 +1,171 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+from . import *
+import io
+import struct
+from .convertors import _write_atomically
+from .sniffer import _webp_size
+
+# JPEG start of frame markers, C4 (huffman tables), C8 (reserved) and CC (arithmetic coding) are not frames
+_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# markers without a length field that can be skipped, RST0-7, SOI and TEM, EOI is handled by _jpeg_size
+_STANDALONE_MARKERS = frozenset(range(0xD0, 0xD9)) | {0x01}
+# sum of the IJG standard luminance quantization table, every libjpeg quality setting scales it
+_STANDARD_LUMA_SUM = 3688
+
+
+def _jpeg_size(file) -> tuple:
+    file.seek(2)
+    while True:
+        byte = file.read(1)
+        while byte and byte != b"\xff":
+            byte = file.read(1)
+        while byte == b"\xff":
+            byte = file.read(1)
+        if not byte:
+            return 0, 0
+        marker = byte[0]
+        if marker in _STANDALONE_MARKERS:
+            continue
+        if marker == 0xD9 or marker == 0xDA:
+            # end of image or start of scan before any frame header
+            return 0, 0
+        length = file.read(2)
+        if len(length) < 2:
+            return 0, 0
+        if marker in _SOF_MARKERS:
+            frame = file.read(5)
+            if len(frame) < 5:
+                return 0, 0
+            height, width = struct.unpack(">xHH", frame)
+            return width, height
+        # skip the segment, EXIF thumbnails can make these tens of kilobytes
+        file.seek(struct.unpack(">H", length)[0] - 2, io.SEEK_CUR)
+
+
+def read_image_size(path: str) -> tuple:
+    """Read the dimensions of a JPEG, PNG, GIF, WebP or BMP image from its header, without decoding it.
+    Parameters:
+        path (str): Path of the image.
+    Returns:
+        tuple: (width, height), (0, 0) if the format is unknown or the header is damaged.
+    Raises:
+        OSError: If the file can't be read."""
+    with open(path, "rb") as file:
+        header = file.read(32)
+        try:
+            if header.startswith(b"\xff\xd8"):
+                return _jpeg_size(file)
+            if header.startswith(b"\x89PNG\r\n\x1a\n") and header[12:16] == b"IHDR":
+                return struct.unpack(">II", header[16:24])
+            if header[:6] in (b"GIF87a", b"GIF89a"):
+                return struct.unpack("<HH", header[6:10])
+            if header.startswith(b"BM"):
+                width, height = struct.unpack("<ii", header[18:26])
+                # bottom-up bitmaps store a negative height
+                return width, abs(height)
+            if header.startswith(b"RIFF") and header[8:12] == b"WEBP":
+                return _webp_size(header)
+        except struct.error:
+            pass
+    return 0, 0
+
+
+def _import_pil():
+    try:
+        from PIL import Image, JpegImagePlugin
+    except ImportError:
+        raise ModuleNotFoundError("This function requires Pillow to be installed. Install it by running pip install Pillow") from None
+    return Image, JpegImagePlugin
+
+
+def _jpeg_quality(quantization: dict) -> int:
+    """Estimate the libjpeg quality setting a JPEG was saved with from its luminance table."""
+    table = quantization.get(0) if quantization else None
+    if not table:
+        return 75
+    scale = sum(table) * 100 / _STANDARD_LUMA_SUM
+    quality = (200 - scale) / 2 if scale <= 100 else 5000 / scale
+    return max(1, min(95, round(quality)))
+
+
+def _save_options(image, jpeg_plugin, quality: int = None) -> dict:
+    options = {key: image.info[key] for key in ("icc_profile", "exif", "dpi") if image.info.get(key)}
+    if image.format == "JPEG":
+        options["quality"] = quality or _jpeg_quality(getattr(image, "quantization", None))
+        options["subsampling"] = jpeg_plugin.get_sampling(image)
+        options["progressive"] = "progressive" in image.info or "progression" in image.info
+        options["optimize"] = True
+    elif image.format == "WEBP":
+        options["quality"] = quality or 90
+    elif quality:
+        options["quality"] = quality
+    return options
+
+
+@run_in_exc(mode="process")
+def resize_image(path: str, max_size: int = 1280, quality: int = None) -> bool:
+    """Shrink an image in place so its longest side is at most max_size, keeping its format.
+    The dimensions are read from the header first, so images that already fit are never decoded.
+    JPEGs are decoded at 1/2, 1/4 or 1/8 scale when that is still large enough, a 50 MP photo never
+    reaches memory at full size. The result is written atomically (temporary file, fsync, rename).
+    Animated images are left alone.
+    Parameters:
+        path (str): Path of the image.
+        max_size (int, optional): Maximum width and height. Defaults to 1280.
+        quality (int, optional): Encoder quality, defaults to the quality of the original JPEG or 90 for WebP.
+    Returns:
+        bool: Whether the image was resized.
+    Raises:
+        ModuleNotFoundError: If the image needs resizing and Pillow is not installed.
+        OSError: If the image can't be read or written."""
+    width, height = read_image_size(path)
+    if width and height and max(width, height) <= max_size:
+        return False
+    Image, JpegImagePlugin = _import_pil()
+    with Image.open(path) as image:
+        if max(image.size) <= max_size or getattr(image, "is_animated", False):
+            return False
+        image_format = image.format
+        options = _save_options(image, JpegImagePlugin, quality)
+        ratio = max_size / max(image.size)
+        # only JPEG honours draft, it picks the smallest DCT scale still at least this large
+        image.draft(image.mode, (max(1, round(image.width * ratio)), max(1, round(image.height * ratio))))
+        image.thumbnail((max_size, max_size))
+        output = io.BytesIO()
+        image.save(output, format=image_format, **options)
+    _write_atomically(path, output.getvalue())
+    return True
+
+
+def _try_resize_image(path: str, **kwargs) -> tuple:
+    try:
+        return path, resize_image.__wrapped__(path, **kwargs)
+    except OSError as exc:
+        return path, exc
+
+
+async def resize_images(paths, max_size: int = 1280, quality: int = None, concurrency: int = None, return_exceptions: bool = False):
+    """Resize many images on the "process" pool, see resize_image.
+    Parameters:
+        paths (iterable): Paths of the images, an iterable or async iterable.
+        max_size (int, optional): Maximum width and height. Defaults to 1280.
+        quality (int, optional): Encoder quality, defaults to the quality of every original JPEG.
+        concurrency (int, optional): Number of images processed at once. Defaults to the number of workers of the pool.
+        return_exceptions (bool, optional): Yield the OSError of unreadable images instead of raising it. Defaults to False.
+    Yields:
+        tuple: (path, whether it was resized or the OSError), in input order."""
+    pool = get_pool("process")
+    async for path, result in map_in_exc(
+        _try_resize_image, paths, {"max_size": max_size, "quality": quality},
+        chunk_size=1, pool="process", concurrency=concurrency or pool.max_workers,
+    ):
+        if isinstance(result, OSError) and not return_exceptions:
+            raise result
+        yield path, result
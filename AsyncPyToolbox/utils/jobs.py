@@ -0,0 +1,236 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+from itertools import count
+from .system import exec_terminal
+
+
+class Job:
+    """A command submitted to a CommandRunner, await it to get the exec_terminal result.
+    Attributes:
+        id (int): Number of the job in its runner.
+        command (str): Command to execute.
+        priority (int): Lower runs first.
+        state (str): "queued", "running", "done" or "cancelled".
+        submitted (float): Loop time of submission.
+        started (float): Loop time the command started, None while queued.
+        finished (float): Loop time the command ended, None until then.
+        holders (int): Number of submissions sharing this job through deduplication."""
+    __slots__ = ("id", "command", "priority", "timeout", "max_bytes", "state", "submitted", "started", "finished", "holders", "_future", "_task", "_runner")
+
+    def __init__(self, runner: "CommandRunner", id: int, command: str, priority: int, timeout: float, max_bytes: int) -> None:
+        self.id = id
+        self.command = command
+        self.priority = priority
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.state = "queued"
+        self.submitted = asyncio.get_running_loop().time()
+        self.started = None
+        self.finished = None
+        self.holders = 1
+        self._future = asyncio.get_running_loop().create_future()
+        self._task = None
+        self._runner = runner
+
+    @property
+    def wait_time(self) -> float:
+        """Seconds spent in the queue so far."""
+        end = self.started if self.started is not None else (self.finished or asyncio.get_running_loop().time())
+        return end - self.submitted
+
+    @property
+    def run_time(self) -> float:
+        """Seconds spent running so far, None while queued."""
+        if self.started is None:
+            return None
+        return (self.finished or asyncio.get_running_loop().time()) - self.started
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def cancel(self) -> bool:
+        """Cancel the job, a running command has its process group killed.
+        A deduplicated job is shared, cancelling it cancels it for every submitter.
+        Returns:
+            bool: Whether the job was still queued or running."""
+        if self.state == "queued":
+            self._runner._finish(self, "cancelled")
+            return True
+        if self.state == "running":
+            self._task.cancel()
+            return True
+        return False
+
+    def __await__(self):
+        return asyncio.shield(self._future).__await__()
+
+    def __repr__(self) -> str:
+        return f"Job(id={self.id}, command={self.command!r}, state={self.state!r})"
+
+
+class CommandRunner:
+    """Run terminal commands through a priority queue with a bounded number running at once.
+    Parameters:
+        concurrency (int, optional): Maximum number of commands running at once. Defaults to 4.
+        timeout (float, optional): Default seconds a command may run, see exec_terminal. Defaults to none.
+        max_bytes (int, optional): Default output bytes kept per command. Defaults to unlimited.
+        dedupe (bool, optional): Share one job between identical commands submitted while the first is queued or running. Defaults to True."""
+    def __init__(self, concurrency: int = 4, timeout: float = None, max_bytes: int = None, dedupe: bool = True) -> None:
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.dedupe = dedupe
+        self._queue = None
+        self._workers = []
+        self._ids = count(1)
+        self._inflight = {}
+        self._unfinished = 0
+        self._running = 0
+        self._idle = None
+        self._metrics = {
+            "completed": 0, "cancelled": 0, "deduplicated": 0, "started": 0, "runs": 0,
+            "wait_total": 0.0, "wait_max": 0.0, "run_total": 0.0, "run_max": 0.0,
+        }
+
+    def _start(self) -> None:
+        self._queue = asyncio.PriorityQueue()
+        self._idle = asyncio.Event()
+        self._workers = [asyncio.ensure_future(self._worker()) for _ in range(self.concurrency)]
+
+    def submit(self, command: str, priority: int = 0, timeout: float = None, max_bytes: int = None) -> Job:
+        """Queue a command, must be called from a running event loop.
+        Parameters:
+            command (str): Command to execute.
+            priority (int, optional): Lower runs first, equal priorities run in submission order. Defaults to 0.
+            timeout (float, optional): Seconds the command may run. Defaults to the runner timeout.
+            max_bytes (int, optional): Output bytes to keep. Defaults to the runner max_bytes.
+        Returns:
+            Job: The job, an existing one if an identical command is already queued or running."""
+        if self._queue is None:
+            self._start()
+        timeout = self.timeout if timeout is None else timeout
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        key = (command, timeout, max_bytes)
+        if self.dedupe:
+            job = self._inflight.get(key)
+            if job is not None:
+                job.holders += 1
+                self._metrics["deduplicated"] += 1
+                return job
+        job = Job(self, next(self._ids), command, priority, timeout, max_bytes)
+        self._inflight[key] = job
+        self._unfinished += 1
+        self._idle.clear()
+        self._queue.put_nowait((priority, job.id, job))
+        return job
+
+    async def run(self, command: str, priority: int = 0, timeout: float = None, max_bytes: int = None) -> tuple:
+        """Queue a command and wait for it, see submit.
+        Returns:
+            tuple: (success, output, return_code) as returned by exec_terminal.
+        Raises:
+            asyncio.CancelledError: If the job was cancelled."""
+        return await self.submit(command, priority, timeout, max_bytes)
+
+    def _finish(self, job: Job, state: str, result: tuple = None) -> None:
+        loop_time = asyncio.get_running_loop().time()
+        job.state = state
+        job.finished = loop_time
+        if self._inflight.get((job.command, job.timeout, job.max_bytes)) is job:
+            del self._inflight[(job.command, job.timeout, job.max_bytes)]
+        metrics = self._metrics
+        if state == "cancelled":
+            metrics["cancelled"] += 1
+            job._future.cancel()
+        else:
+            metrics["completed"] += 1
+            job._future.set_result(result)
+        if job.started is not None:
+            run_time = loop_time - job.started
+            metrics["runs"] += 1
+            metrics["run_total"] += run_time
+            metrics["run_max"] = max(metrics["run_max"], run_time)
+        self._unfinished -= 1
+        if not self._unfinished:
+            self._idle.set()
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, job = await self._queue.get()
+            if job.state != "queued":
+                # cancelled while queued
+                continue
+            job.state = "running"
+            job.started = loop.time()
+            wait_time = job.started - job.submitted
+            self._metrics["started"] += 1
+            self._metrics["wait_total"] += wait_time
+            self._metrics["wait_max"] = max(self._metrics["wait_max"], wait_time)
+            self._running += 1
+            job._task = asyncio.ensure_future(exec_terminal(job.command, timeout=job.timeout, max_bytes=job.max_bytes))
+            try:
+                await asyncio.wait((job._task,))
+            except asyncio.CancelledError:
+                # the runner is closing
+                job._task.cancel()
+                await asyncio.wait((job._task,))
+                raise
+            finally:
+                self._running -= 1
+                if job._task.cancelled():
+                    self._finish(job, "cancelled")
+                else:
+                    self._finish(job, "done", job._task.result())
+
+    def stats(self) -> dict:
+        """Get queue and timing metrics, wait time is spent queued and run time is spent executing.
+        Returns:
+            dict: queued, running, completed, cancelled and deduplicated counts, average and maximum wait and run times in seconds."""
+        metrics = self._metrics
+        return {
+            "queued": self._unfinished - self._running,
+            "running": self._running,
+            "completed": metrics["completed"],
+            "cancelled": metrics["cancelled"],
+            "deduplicated": metrics["deduplicated"],
+            "wait_avg": metrics["wait_total"] / metrics["started"] if metrics["started"] else 0.0,
+            "wait_max": metrics["wait_max"],
+            "run_avg": metrics["run_total"] / metrics["runs"] if metrics["runs"] else 0.0,
+            "run_max": metrics["run_max"],
+        }
+
+    async def join(self) -> None:
+        """Wait until every submitted job finished or was cancelled."""
+        if self._idle is not None:
+            await self._idle.wait()
+
+    async def close(self, cancel: bool = False) -> None:
+        """Stop the workers.
+        Parameters:
+            cancel (bool, optional): Cancel queued and running jobs instead of waiting for them. Defaults to False."""
+        if self._queue is None:
+            return
+        if cancel:
+            while not self._queue.empty():
+                self._queue.get_nowait()[2].cancel()
+        else:
+            await self.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    async def __aenter__(self) -> "CommandRunner":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -0,0 +1,201 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import json
+from . import check_if_package_exists
+
+# 2**64 has 20 digits, a run that long may be an integer orjson would turn into a float.
+# translate + find is several times faster than a regex search over large documents.
+_DIGITS_ONLY = bytes(b"0"[0] if b"0"[0] <= byte <= b"9"[0] else b" "[0] for byte in range(256))
+_LONG_NUMBER = b"0" * 20
+# documents are scanned a slice at a time, so the scan never copies a whole large document
+_SCAN_CHUNK = 1 << 20
+
+
+def _reindent(encoded: bytes, step: int, indent: int) -> bytes:
+    """Turn indentation of step spaces per level into indent spaces per level.
+    Strings never hold a raw newline or carriage return, so every newline starts an indented line. Levels are
+    rewritten deepest first and marked with a carriage return, so a shallower level never matches a rewritten line."""
+    if indent == step:
+        return encoded
+    depth = 0
+    while b"\n" + b" " * (step * (depth + 1)) in encoded:
+        depth += 1
+    for level in range(depth, 0, -1):
+        encoded = encoded.replace(b"\n" + b" " * (step * level), b"\r" + b" " * (indent * level))
+    return encoded.replace(b"\r", b"\n")
+
+
+def _refuse(value):
+    # a faster backend must not encode what the standard library refuses (datetime, dataclasses)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _has_long_number(data: bytes) -> bool:
+    for start in range(0, len(data), _SCAN_CHUNK):
+        # slices overlap by one digit less than a long number, so a run across a boundary is still found
+        if _LONG_NUMBER in data[max(start - len(_LONG_NUMBER) + 1, 0):start + _SCAN_CHUNK].translate(_DIGITS_ONLY):
+            return True
+    return False
+
+
+class JsonBackend:
+    """Standard library JSON backend, the reference every other backend is checked against.
+    Every backend encodes to UTF-8 bytes, without escaping non ASCII characters unless ensure_ascii is set,
+    writes compact JSON (no spaces) when indent is None and json.dumps style indentation otherwise.
+    Anything a faster backend refuses (integers past 64 bits, NaN literals) is handled by this one,
+    and types the standard library can't encode (datetime, dataclasses) raise TypeError on every backend.
+    One difference remains: orjson and msgspec write NaN and Infinity as null, while json and ujson
+    write the NaN and Infinity literals. Select the json backend if non-finite floats must round trip."""
+    name = "json"
+
+    def dumps(self, data, indent: int = None, ensure_ascii: bool = False) -> bytes:
+        return json.dumps(
+            data, indent=indent, ensure_ascii=ensure_ascii, separators=(",", ":") if indent is None else (",", ": ")
+        ).encode("utf-8")
+
+    def loads(self, data: bytes):
+        return json.loads(data)
+
+
+_stdlib = JsonBackend()
+
+
+class OrjsonBackend(JsonBackend):
+    """orjson backend. orjson only indents by two spaces, other indents are made by rewriting the line indentation
+    of its two space output, which is still much faster than the pure Python indenting encoder of the standard library.
+    orjson reads integers past 64 bits as floats, so documents with such long digit runs are read by the standard library.
+    NaN and Infinity are written as null, and UUIDs, which orjson always encodes, as strings."""
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+        self._orjson = orjson
+        self._option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def dumps(self, data, indent: int = None, ensure_ascii: bool = False) -> bytes:
+        if indent is not None and not isinstance(indent, int):
+            return _stdlib.dumps(data, indent, ensure_ascii)
+        try:
+            encoded = self._orjson.dumps(
+                data, default=_refuse, option=self._option if indent is None else self._option | self._orjson.OPT_INDENT_2
+            )
+        except TypeError:
+            # integers past 64 bits and refused types, the latter raise again there
+            return _stdlib.dumps(data, indent, ensure_ascii)
+        # orjson can't escape, the common all ASCII document keeps the fast path
+        if ensure_ascii and not encoded.isascii():
+            return _stdlib.dumps(data, indent, True)
+        return encoded if indent is None else _reindent(encoded, 2, indent)
+
+    def loads(self, data: bytes):
+        if _has_long_number(data):
+            return _stdlib.loads(data)
+        try:
+            return self._orjson.loads(data)
+        except ValueError:
+            return _stdlib.loads(data)
+
+
+class MsgspecBackend(JsonBackend):
+    """msgspec backend, indentation is applied by msgspec.json.format. NaN and Infinity are written as null.
+    msgspec encodes datetime, date, time, UUID, Decimal, Enum, bytes and dataclasses natively and has no option
+    to refuse them, select another backend if those must raise TypeError like they do with the standard library."""
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec
+        self._json = msgspec.json
+        self._encoder = msgspec.json.Encoder(enc_hook=_refuse)
+        self._decoder = msgspec.json.Decoder()
+        self._error = msgspec.MsgspecError
+
+    def dumps(self, data, indent: int = None, ensure_ascii: bool = False) -> bytes:
+        try:
+            encoded = self._encoder.encode(data)
+        except (TypeError, self._error):
+            return _stdlib.dumps(data, indent, ensure_ascii)
+        if ensure_ascii and not encoded.isascii():
+            return _stdlib.dumps(data, indent, True)
+        return encoded if indent is None else self._json.format(encoded, indent=indent)
+
+    def loads(self, data: bytes):
+        try:
+            return self._decoder.decode(data)
+        except self._error:
+            return _stdlib.loads(data)
+
+
+class UjsonBackend(JsonBackend):
+    """ujson backend, it writes indent 0 compact so that indent is made from its one space output."""
+    name = "ujson"
+
+    def __init__(self) -> None:
+        import ujson
+        self._ujson = ujson
+
+    def dumps(self, data, indent: int = None, ensure_ascii: bool = False) -> bytes:
+        try:
+            encoded = self._ujson.dumps(
+                data, ensure_ascii=ensure_ascii, escape_forward_slashes=False, default=_refuse,
+                # ujson writes indent 0 compact, json.dumps puts every value on its own line
+                indent=0 if indent is None else max(indent, 1)
+            ).encode("utf-8")
+        except (TypeError, OverflowError, ValueError):
+            return _stdlib.dumps(data, indent, ensure_ascii)
+        return encoded if indent is None or indent > 0 else _reindent(encoded, 1, 0)
+
+    def loads(self, data: bytes):
+        try:
+            return self._ujson.loads(data)
+        except ValueError:
+            return _stdlib.loads(data)
+
+
+# fastest first
+BACKENDS = {
+    "orjson": OrjsonBackend,
+    "msgspec": MsgspecBackend,
+    "ujson": UjsonBackend,
+    "json": JsonBackend,
+}
+_backend = None
+
+
+def available_json_backends() -> list:
+    """Get the names of the JSON backends that are installed, fastest first.
+    Returns:
+        list: Names usable with set_json_backend."""
+    return [name for name in BACKENDS if name == "json" or check_if_package_exists(name)]
+
+
+def set_json_backend(name: str = "auto") -> JsonBackend:
+    """Select the JSON backend used by the convertors.
+    Parameters:
+        name (str, optional): "orjson", "msgspec", "ujson", "json" or "auto" for the fastest installed one. Defaults to "auto".
+    Returns:
+        JsonBackend: The selected backend.
+    Raises:
+        ValueError: If the backend is unknown.
+        ModuleNotFoundError: If the backend is not installed."""
+    global _backend
+    if name == "auto":
+        name = available_json_backends()[0]
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend {name!r}, expected one of auto, {', '.join(BACKENDS)}")
+    if name != "json" and not check_if_package_exists(name):
+        raise ModuleNotFoundError(f"This backend requires {name} to be installed. Install it by running pip install {name}")
+    _backend = BACKENDS[name]()
+    return _backend
+
+
+def get_json_backend() -> JsonBackend:
+    """Get the JSON backend in use, the fastest installed one unless set_json_backend was called.
+    Returns:
+        JsonBackend: The backend."""
+    return _backend or set_json_backend()
@@ -0,0 +1,257 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import re
+import html
+from . import *
+
+# same entity syntax as html.unescape, so decoding token by token gives the same result
+_ENTITY = r"(?P<entity>&(?:\#[0-9]+;?|\#[xX][0-9a-fA-F]+;?|[^\t\n\f <&#;]{1,32};?))"
+_HTML = (
+    r"(?P<comment>(?s:<!--.*?(?:-->|\Z)))",
+    r"(?P<tag></?[A-Za-z][^>]*>|<![^>]*>|<\?[^>]*>)",
+    _ENTITY,
+)
+# every alternative is a named group wrapping its inner groups, so match.lastgroup names the alternative
+_MARKDOWN = (
+    r"(?P<fence>^[ ]{0,3}(?P<fence_mark>`{3,}|~{3,})[^\n]*\n(?P<fence_body>(?s:.*?))(?:^[ ]{0,3}(?P=fence_mark)[ \t]*$\n?|\Z))",
+    r"(?P<code>(?P<ticks>`+)(?P<code_body>.+?)(?P=ticks))",
+    r"(?P<autolink><(?P<url>(?:https?|ftp|mailto):[^\s<>]*)>)",
+    *_HTML,
+    r"(?P<escape>\\(?P<escaped>[\\`*_{}\[\]()#+\-.!>~|]))",
+    r"(?P<image>!\[(?P<alt>[^\]]*)\]\([^)]*\))",
+    r"(?P<link>\[(?P<link_text>[^\]]+)\](?:\([^)]*\)|\[[^\]]*\]))",
+    r"(?P<reference>^[ ]{0,3}\[[^\]]+\]:[^\n]*\n?)",
+    r"(?P<rule>^[ ]{0,3}(?:(?:\*[ \t]*){3,}|(?:-[ \t]*){3,}|(?:_[ \t]*){3,}|=+[ \t]*)$\n?)",
+    r"(?P<strong>(?P<strong_mark>\*\*|__|~~)(?=\S)(?P<strong_body>.+?)(?<=\S)(?P=strong_mark))",
+    r"(?P<emphasis>\*(?=[^\s*])(?P<star_body>.+?)(?<=[^\s*])\*|(?<!\w)_(?=[^\s_])(?P<underscore_body>.+?)(?<=[^\s_])_(?!\w))",
+    r"(?P<block>^[ \t]*(?:>[ \t]?)*(?:\#{1,6}[ \t]+|(?:[-*+]|[0-9]{1,9}[.)])[ \t]+)|^[ \t]*(?:>[ \t]?)+)",
+)
+_HTML_TOKENS = lazy_pattern("|".join(_HTML))
+_TAGS = lazy_pattern("|".join(_HTML[:2]))
+_MARKDOWN_TOKENS = lazy_pattern("|".join(_MARKDOWN), re.MULTILINE)
+# an HTML tag or comment still open at the end of a line
+_OPEN_TAG = lazy_pattern(r"<[A-Za-z/!?][^>]*\Z")
+# a line opening a fenced code block, the fence closes on a line holding only the same mark
+_FENCE = lazy_pattern(r"[ ]{0,3}(`{3,}|~{3,})")
+# escapes and code spans of one line, a < or [ inside them can't start a tag or link
+_LITERAL = lazy_pattern(r"\\[\\`*_{}\[\]()#+\-.!>~|]|(`+).+?\1")
+# converted text stream_text collects before a round trip to the executor
+_STREAM_BATCH = 1 << 16
+
+def _replace_html(match: re.Match) -> str:
+    if match.lastgroup == "entity":
+        return html.unescape(match.group())
+    return ""
+
+
+def _replace_markdown(match: re.Match) -> str:
+    kind = match.lastgroup
+    if kind == "entity":
+        return html.unescape(match.group())
+    if kind == "fence":
+        return match.group("fence_body")
+    if kind == "code":
+        body = match.group("code_body")
+        # one space of padding is how code spans starting or ending with backticks are written
+        return body[1:-1] if len(body) > 2 and body[0] == body[-1] == " " else body
+    if kind == "autolink":
+        return match.group("url")
+    if kind == "escape":
+        return match.group("escaped")
+    if kind == "image":
+        return match.group("alt")
+    if kind == "link":
+        return _MARKDOWN_TOKENS.sub(_replace_markdown, match.group("link_text"))
+    if kind == "strong":
+        return _MARKDOWN_TOKENS.sub(_replace_markdown, match.group("strong_body"))
+    if kind == "emphasis":
+        return _MARKDOWN_TOKENS.sub(_replace_markdown, match.group("star_body") or match.group("underscore_body"))
+    # comments, tags, reference definitions, rules and block markers
+    return ""
+
+
+def to_text(text: str, markdown: bool = True) -> str:
+    """Convert markdown and HTML to plain text in a single scan.
+    Tags and comments are removed and every HTML entity is decoded. With markdown, emphasis, links,
+    images, code, headings, quotes, list markers, rules and escapes are reduced to their text;
+    code spans and fenced blocks are kept verbatim.
+    Parameters:
+        text (str): Text to convert.
+        markdown (bool, optional): Whether to handle markdown syntax too, HTML only otherwise. Defaults to True.
+    Returns:
+        str: Plain text."""
+    if markdown:
+        return _MARKDOWN_TOKENS.sub(_replace_markdown, text)
+    return _HTML_TOKENS.sub(_replace_html, text)
+
+
+def strip_tags(text: str) -> str:
+    """Remove HTML tags and comments, entities are left as they are.
+    Parameters:
+        text (str): Text to clean.
+    Returns:
+        str: Text without tags."""
+    return _TAGS.sub("", text)
+
+
+def _toggle(state: bool, line: str, opener: str, closer: str) -> bool:
+    # whichever comes last on the line decides, a line with neither leaves the state alone
+    opened, closed = line.rfind(opener), line.rfind(closer)
+    if opened > closed:
+        return True
+    return False if closed >= 0 else state
+
+
+def _in_comment(state: bool, line: str) -> bool:
+    # --> only closes a comment after its <!--, so <!--> stays open
+    position = 0
+    while True:
+        if state:
+            end = line.find("-->", position)
+            if end < 0:
+                return True
+            state, position = False, end + 3
+        else:
+            start = line.find("<!--", position)
+            if start < 0:
+                return False
+            state, position = True, start + 4
+
+
+class _Splitter:
+    """Cuts a growing document where it can be converted without waiting for more text.
+    Cuts fall after the last complete line that leaves no code fence, comment, tag or link open.
+    Every line is scanned once and held lines are kept as a list, however long a construct stays open.
+    Parameters:
+        markdown (bool): Whether markdown constructs are tracked too.
+        max_buffer (int): Characters held while a construct stays open, past it the held text is cut anyway."""
+    __slots__ = ("markdown", "max_buffer", "_held", "_held_size", "_partial", "_fence", "_comment", "_tag", "_bracket", "_target")
+
+    def __init__(self, markdown: bool, max_buffer: int) -> None:
+        self.markdown = markdown
+        self.max_buffer = max_buffer
+        # complete lines waiting for a construct to close, and the incomplete last line
+        self._held = []
+        self._held_size = 0
+        self._partial = ""
+        self._reset()
+
+    def _reset(self) -> None:
+        self._fence = None
+        self._comment = self._tag = self._bracket = self._target = False
+
+    def _scan_line(self, line: str) -> bool:
+        """Update the open constructs with one line, returns whether any is still open after it."""
+        if self._fence is not None:
+            # nothing inside a fence is markup
+            stripped = line.lstrip(" ")
+            if len(line) - len(stripped) <= 3 and stripped.rstrip(" \t") == self._fence:
+                self._fence = None
+            return self._fence is not None
+        if self.markdown and not (self._comment or self._tag):
+            match = _FENCE.match(line)
+            if match:
+                self._fence = match.group(1)
+                return True
+        self._comment = _in_comment(self._comment, line)
+        if self.markdown:
+            line = _LITERAL.sub("", line)
+            # link text and link targets can both span lines
+            self._bracket = _toggle(self._bracket, line, "[", "]")
+            self._target = _toggle(self._target, line, "](", ")")
+        if _OPEN_TAG.search(line):
+            self._tag = True
+        elif ">" in line:
+            self._tag = False
+        return self._comment or self._tag or self._bracket or self._target
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk, returns the text that can be converted now, possibly empty."""
+        partial = self._partial + chunk
+        end = partial.rfind("\n") + 1
+        text = ""
+        if end:
+            block, self._partial = partial[:end], partial[end:]
+            safe = 0
+            position = 0
+            for line in block[:-1].split("\n"):
+                position += len(line) + 1
+                if not self._scan_line(line):
+                    safe = position
+            if safe:
+                self._held.append(block[:safe])
+                text = "".join(self._held)
+                block = block[safe:]
+                self._held, self._held_size = [], 0
+            if block:
+                self._held.append(block)
+                self._held_size += len(block)
+        else:
+            self._partial = partial
+        if self._held_size + len(self._partial) <= self.max_buffer:
+            return text
+        # the construct never closed, convert it as it is and start over
+        self._reset()
+        if self._held:
+            text += "".join(self._held)
+            self._held, self._held_size = [], 0
+        else:
+            text, self._partial = text + self._partial, ""
+        return text
+
+    def flush(self) -> str:
+        """Everything still held, at the end of the document."""
+        text = "".join(self._held) + self._partial
+        self._held, self._held_size, self._partial = [], 0, ""
+        return text
+
+
+def iter_text(chunks, markdown: bool = True, max_buffer: int = 1 << 20):
+    """Convert a large document chunk by chunk, see to_text.
+    Text is converted up to the last complete line that doesn't leave a code fence, comment, tag or link
+    open, so the output matches to_text on the whole document while only a few lines are held.
+    Parameters:
+        chunks (iterable): Text chunks of any size.
+        markdown (bool, optional): Whether to handle markdown syntax too. Defaults to True.
+        max_buffer (int, optional): Characters held while a construct stays open, past it the buffer is converted anyway. Defaults to 1 MiB.
+    Yields:
+        str: Converted text."""
+    splitter = _Splitter(markdown, max_buffer)
+    for chunk in chunks:
+        text = splitter.feed(chunk)
+        if text:
+            yield to_text(text, markdown)
+    text = splitter.flush()
+    if text:
+        yield to_text(text, markdown)
+
+
+async def stream_text(chunks, markdown: bool = True, max_buffer: int = 1 << 20):
+    """Like iter_text, chunks can also be an async iterable, such as a response body.
+    Convertible text is collected into batches of about 64 KiB, each converted in one round trip to the "short" pool.
+    Yields:
+        str: Converted text."""
+    pool = get_pool("short")
+    splitter = _Splitter(markdown, max_buffer)
+    ready = []
+    size = 0
+    # chunked() takes both iterables and async iterables
+    async for batch in chunked(chunks, 1):
+        text = splitter.feed(batch[0])
+        if not text:
+            continue
+        ready.append(text)
+        size += len(text)
+        if size >= _STREAM_BATCH:
+            yield await pool.run(to_text, "".join(ready), markdown)
+            ready, size = [], 0
+    ready.append(splitter.flush())
+    text = "".join(ready)
+    if text:
+        yield await pool.run(to_text, text, markdown)
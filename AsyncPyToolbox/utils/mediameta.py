@@ -0,0 +1,494 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import os
+import struct
+from .sniffer import detect_mime_type, HEADER_SIZE
+
+# the largest possible ogg page, enough to find the last page from the end of the file
+_OGG_TAIL_SIZE = 65307
+# comment headers with embedded cover art can be huge, titles come first
+_MAX_COMMENT_SIZE = 1 << 16
+
+
+class MediaMetadata:
+    """Metadata of an audio or video file.
+    Attributes:
+        duration (float): Duration in seconds, 0 if unknown.
+        width (int): Width in pixels, 0 for audio or if unknown.
+        height (int): Height in pixels, 0 for audio or if unknown.
+        title (str): Title tag, None if missing.
+        artist (str): Artist tag, None if missing."""
+    __slots__ = ("duration", "width", "height", "title", "artist")
+
+    def __init__(self, duration: float = 0.0, width: int = 0, height: int = 0, title: str = None, artist: str = None) -> None:
+        self.duration = duration
+        self.width = width
+        self.height = height
+        self.title = title
+        self.artist = artist
+
+    def __repr__(self) -> str:
+        return (
+            f"MediaMetadata(duration={self.duration!r}, width={self.width}, height={self.height}, "
+            f"title={self.title!r}, artist={self.artist!r})"
+        )
+
+
+def _read_at(file, offset: int, size: int) -> bytes:
+    file.seek(offset)
+    return file.read(size)
+
+
+# MP4 / MOV
+
+def _iter_boxes(file, start: int, end: int):
+    """Yield (type, payload start, payload end) of the boxes between start and end, seeking over payloads."""
+    offset = start
+    while offset + 8 <= end:
+        header = _read_at(file, offset, 16)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack(">I4s", header[:8])
+        header_size = 8
+        if size == 1:
+            if len(header) < 16:
+                return
+            size = struct.unpack(">Q", header[8:16])[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size:
+            return
+        yield box_type, offset + header_size, min(offset + size, end)
+        offset += size
+
+
+def _parse_mp4(file, file_size: int, meta: MediaMetadata) -> None:
+    for box_type, start, end in _iter_boxes(file, 0, file_size):
+        if box_type == b"moov":
+            _parse_mp4_moov(file, start, end, meta)
+            return
+
+
+def _parse_mp4_moov(file, start: int, end: int, meta: MediaMetadata) -> None:
+    for box_type, box_start, box_end in _iter_boxes(file, start, end):
+        if box_type == b"mvhd":
+            data = _read_at(file, box_start, 32)
+            if data[:1] == b"\x01":
+                timescale, duration = struct.unpack(">IQ", data[20:32])
+            else:
+                timescale, duration = struct.unpack(">II", data[12:20])
+            if timescale:
+                meta.duration = duration / timescale
+        elif box_type == b"trak":
+            _parse_mp4_trak(file, box_start, box_end, meta)
+        elif box_type == b"udta":
+            _parse_mp4_udta(file, box_start, box_end, meta)
+
+
+def _parse_mp4_trak(file, start: int, end: int, meta: MediaMetadata) -> None:
+    for box_type, box_start, box_end in _iter_boxes(file, start, end):
+        if box_type == b"tkhd":
+            # version 1 widens the times and duration to 64 bits, the dimensions end the box in both
+            data = _read_at(file, box_start, min(box_end - box_start, 96))
+            offset = 88 if data[:1] == b"\x01" else 76
+            if len(data) >= offset + 8:
+                # 16.16 fixed point, zero for audio tracks
+                width, height = struct.unpack(">II", data[offset:offset + 8])
+                if width and height and not meta.width:
+                    meta.width, meta.height = width >> 16, height >> 16
+            return
+
+
+def _parse_mp4_udta(file, start: int, end: int, meta: MediaMetadata) -> None:
+    for box_type, box_start, box_end in _iter_boxes(file, start, end):
+        if box_type != b"meta":
+            continue
+        # iso meta is a full box with 4 bytes of version and flags, quicktime meta is not
+        if _read_at(file, box_start + 4, 4) != b"hdlr":
+            box_start += 4
+        for child_type, child_start, child_end in _iter_boxes(file, box_start, box_end):
+            if child_type != b"ilst":
+                continue
+            for item_type, item_start, item_end in _iter_boxes(file, child_start, child_end):
+                field = {b"\xa9nam": "title", b"\xa9ART": "artist"}.get(item_type)
+                if field is None:
+                    continue
+                for data_type, data_start, data_end in _iter_boxes(file, item_start, item_end):
+                    if data_type == b"data" and data_end - data_start > 8:
+                        value = _read_at(file, data_start + 8, min(data_end - data_start - 8, 4096))
+                        setattr(meta, field, value.decode("utf-8", "replace"))
+                        break
+
+
+# Matroska / WebM
+
+_EBML_SEGMENT = 0x18538067
+_EBML_INFO = 0x1549A966
+_EBML_TRACKS = 0x1654AE6B
+_EBML_CLUSTER = 0x1F43B675
+_EBML_TRACK_ENTRY = 0xAE
+_EBML_VIDEO = 0xE0
+_EBML_UNKNOWN_SIZE = object()
+
+
+def _read_vint(file, keep_marker: bool):
+    first = file.read(1)
+    if not first:
+        return None, 0
+    byte = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not byte & mask:
+        mask >>= 1
+        length += 1
+    if length > 8:
+        return None, 0
+    value = byte if keep_marker else byte & (mask - 1)
+    rest = file.read(length - 1)
+    if len(rest) < length - 1:
+        return None, 0
+    for extra in rest:
+        value = (value << 8) | extra
+    if not keep_marker and value == (1 << (7 * length)) - 1:
+        return _EBML_UNKNOWN_SIZE, length
+    return value, length
+
+
+def _iter_elements(file, start: int, end: int):
+    """Yield (id, payload start, payload size) of the EBML elements between start and end."""
+    file.seek(start)
+    offset = start
+    while offset < end:
+        element_id, id_length = _read_vint(file, keep_marker=True)
+        size, size_length = _read_vint(file, keep_marker=False)
+        if element_id is None or size is None:
+            return
+        payload = offset + id_length + size_length
+        if size is _EBML_UNKNOWN_SIZE:
+            size = end - payload
+        yield element_id, payload, size
+        offset = payload + size
+        file.seek(offset)
+
+
+def _ebml_uint(data: bytes) -> int:
+    return int.from_bytes(data, "big") if data else 0
+
+
+def _parse_matroska(file, file_size: int, meta: MediaMetadata) -> None:
+    for element_id, start, size in _iter_elements(file, 0, file_size):
+        if element_id == _EBML_SEGMENT:
+            _parse_matroska_segment(file, start, min(start + size, file_size), meta)
+            return
+
+
+def _parse_matroska_segment(file, start: int, end: int, meta: MediaMetadata) -> None:
+    seen_info = seen_tracks = False
+    for element_id, child_start, size in _iter_elements(file, start, end):
+        if element_id == _EBML_INFO:
+            seen_info = True
+            timecode_scale, duration = 1000000, 0.0
+            for info_id, info_start, info_size in _iter_elements(file, child_start, child_start + size):
+                data = _read_at(file, info_start, min(info_size, 4096))
+                if info_id == 0x2AD7B1:
+                    timecode_scale = _ebml_uint(data)
+                elif info_id == 0x4489 and info_size in (4, 8):
+                    duration = struct.unpack(">f" if info_size == 4 else ">d", data)[0]
+                elif info_id == 0x7BA9:
+                    meta.title = data.decode("utf-8", "replace").rstrip("\x00")
+            meta.duration = duration * timecode_scale / 1e9
+        elif element_id == _EBML_TRACKS:
+            seen_tracks = True
+            _parse_matroska_tracks(file, child_start, child_start + size, meta)
+        elif element_id == _EBML_CLUSTER and seen_info and seen_tracks:
+            # everything after this is media data
+            return
+
+
+def _parse_matroska_tracks(file, start: int, end: int, meta: MediaMetadata) -> None:
+    for entry_id, entry_start, entry_size in _iter_elements(file, start, end):
+        if entry_id != _EBML_TRACK_ENTRY:
+            continue
+        for field_id, field_start, field_size in _iter_elements(file, entry_start, entry_start + entry_size):
+            if field_id != _EBML_VIDEO or meta.width:
+                continue
+            for video_id, video_start, video_size in _iter_elements(file, field_start, field_start + field_size):
+                if video_id == 0xB0:
+                    meta.width = _ebml_uint(_read_at(file, video_start, video_size))
+                elif video_id == 0xBA:
+                    meta.height = _ebml_uint(_read_at(file, video_start, video_size))
+
+
+# Vorbis comments, shared by ogg and flac
+
+def _parse_vorbis_comments(data: bytes, meta: MediaMetadata) -> None:
+    try:
+        vendor_length = struct.unpack_from("<I", data, 0)[0]
+        offset = 4 + vendor_length
+        count = struct.unpack_from("<I", data, offset)[0]
+        offset += 4
+        for _ in range(count):
+            length = struct.unpack_from("<I", data, offset)[0]
+            comment = data[offset + 4:offset + 4 + length].decode("utf-8", "replace")
+            offset += 4 + length
+            key, _, value = comment.partition("=")
+            key = key.upper()
+            if key == "TITLE" and meta.title is None:
+                meta.title = value
+            elif key == "ARTIST" and meta.artist is None:
+                meta.artist = value
+    except struct.error:
+        # truncated by _MAX_COMMENT_SIZE, keep what was read
+        pass
+
+
+# Ogg
+
+def _ogg_packets(data: bytes, count: int) -> list:
+    """Reassemble the first count packets from consecutive ogg pages."""
+    packets, current, offset = [], b"", 0
+    while len(packets) < count and data.startswith(b"OggS", offset) and offset + 27 <= len(data):
+        segments = data[offset + 26]
+        lacing = data[offset + 27:offset + 27 + segments]
+        position = offset + 27 + segments
+        for length in lacing:
+            current += data[position:position + length]
+            position += length
+            if length < 255:
+                packets.append(current)
+                current = b""
+                if len(packets) == count:
+                    break
+        offset = position
+    if current and len(packets) < count:
+        packets.append(current)
+    return packets
+
+
+def _parse_ogg(file, file_size: int, meta: MediaMetadata) -> None:
+    packets = _ogg_packets(_read_at(file, 0, _MAX_COMMENT_SIZE), 2)
+    if not packets:
+        return
+    identification = packets[0]
+    comments = packets[1] if len(packets) > 1 else b""
+    if identification.startswith(b"OpusHead"):
+        pre_skip = struct.unpack_from("<H", identification, 10)[0]
+        rate = 48000
+        if comments.startswith(b"OpusTags"):
+            _parse_vorbis_comments(comments[8:], meta)
+    elif identification.startswith(b"\x01vorbis"):
+        pre_skip = 0
+        rate = struct.unpack_from("<I", identification, 12)[0]
+        if comments.startswith(b"\x03vorbis"):
+            _parse_vorbis_comments(comments[7:], meta)
+    else:
+        return
+    tail_start = max(0, file_size - _OGG_TAIL_SIZE)
+    tail = _read_at(file, tail_start, _OGG_TAIL_SIZE)
+    index = tail.rfind(b"OggS")
+    while index != -1:
+        # the granule position of the last page is the total number of samples
+        granule = struct.unpack_from("<q", tail, index + 6)[0] if index + 14 <= len(tail) else -1
+        if tail[index + 4:index + 5] == b"\x00" and granule >= 0:
+            if rate:
+                meta.duration = max(0, granule - pre_skip) / rate
+            return
+        index = tail.rfind(b"OggS", 0, index)
+
+
+# FLAC
+
+def _parse_flac(file, file_size: int, meta: MediaMetadata) -> None:
+    offset = 4
+    while offset + 4 <= file_size:
+        header = _read_at(file, offset, 4)
+        if len(header) < 4:
+            return
+        last, block_type = header[0] & 0x80, header[0] & 0x7F
+        length = int.from_bytes(header[1:4], "big")
+        if block_type == 0:
+            info = file.read(18)
+            if len(info) == 18:
+                packed = int.from_bytes(info[10:18], "big")
+                rate = packed >> 44
+                total_samples = packed & ((1 << 36) - 1)
+                if rate:
+                    meta.duration = total_samples / rate
+        elif block_type == 4:
+            _parse_vorbis_comments(file.read(min(length, _MAX_COMMENT_SIZE)), meta)
+        if last:
+            return
+        offset += 4 + length
+
+
+# MP3
+
+_MPEG_BITRATES = {
+    # (version is mpeg1, layer): kbps by index
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MPEG_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+_ID3_TEXT_ENCODINGS = {0: "latin-1", 1: "utf-16", 2: "utf-16-be", 3: "utf-8"}
+
+
+def _syncsafe(data: bytes) -> int:
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _id3_text(data: bytes) -> str:
+    if not data:
+        return ""
+    encoding = _ID3_TEXT_ENCODINGS.get(data[0], "latin-1")
+    return data[1:].decode(encoding, "replace").split("\x00")[0]
+
+
+def _parse_id3v2(file, meta: MediaMetadata) -> tuple:
+    """Read the ID3v2 text frames, returns (end of the tag, length from TLEN in seconds or 0)."""
+    header = _read_at(file, 0, 10)
+    if len(header) < 10 or not header.startswith(b"ID3"):
+        return 0, 0
+    major, flags = header[3], header[5]
+    tag_size = _syncsafe(header[6:10])
+    end = 10 + tag_size + (10 if flags & 0x10 else 0)
+    data = file.read(min(tag_size, _MAX_COMMENT_SIZE))
+    offset = 0
+    if flags & 0x40 and major >= 3:
+        # skip the extended header
+        offset = _syncsafe(data[:4]) if major == 4 else 4 + int.from_bytes(data[:4], "big")
+    length = 0
+    frame_header_size, id_size = (6, 3) if major == 2 else (10, 4)
+    fields = {b"TIT2": "title", b"TT2": "title", b"TPE1": "artist", b"TP1": "artist"}
+    while offset + frame_header_size <= len(data):
+        frame_id = data[offset:offset + id_size]
+        if not frame_id.strip(b"\x00"):
+            break
+        if major == 2:
+            size = int.from_bytes(data[offset + 3:offset + 6], "big")
+        elif major == 4:
+            size = _syncsafe(data[offset + 4:offset + 8])
+        else:
+            size = int.from_bytes(data[offset + 4:offset + 8], "big")
+        body = data[offset + frame_header_size:offset + frame_header_size + size]
+        if frame_id in fields and getattr(meta, fields[frame_id]) is None:
+            setattr(meta, fields[frame_id], _id3_text(body))
+        elif frame_id in (b"TLEN", b"TLE"):
+            text = _id3_text(body).strip()
+            if text.isdigit():
+                length = int(text) / 1000
+        offset += frame_header_size + size
+    return end, length
+
+
+def _parse_mpeg_audio(file, file_size: int, meta: MediaMetadata) -> None:
+    audio_start, length = _parse_id3v2(file, meta)
+    tail = _read_at(file, max(0, file_size - 128), 128)
+    has_id3v1 = tail.startswith(b"TAG")
+    if has_id3v1 and meta.title is None:
+        meta.title = tail[3:33].decode("latin-1").strip("\x00 ") or None
+    if length:
+        meta.duration = length
+        return
+    data = _read_at(file, audio_start, HEADER_SIZE)
+    index = 0
+    while True:
+        index = data.find(b"\xff", index)
+        if index == -1 or index + 4 > len(data):
+            return
+        if data[index + 1] & 0xE0 == 0xE0:
+            break
+        index += 1
+    frame = int.from_bytes(data[index:index + 4], "big")
+    version_bits = (frame >> 19) & 3
+    layer = 4 - ((frame >> 17) & 3)
+    bitrate_index = (frame >> 12) & 0xF
+    rate_index = (frame >> 10) & 3
+    channel_mode = (frame >> 6) & 3
+    if version_bits == 1 or layer == 4 or rate_index == 3 or bitrate_index in (0, 15):
+        return
+    mpeg1 = version_bits == 3
+    sample_rate = _MPEG_SAMPLE_RATES[version_bits][rate_index]
+    samples_per_frame = 384 if layer == 1 else 1152 if mpeg1 or layer == 2 else 576
+    # a Xing/Info header after the side information holds the frame count of vbr files
+    side_info = (32 if channel_mode != 3 else 17) if mpeg1 else (17 if channel_mode != 3 else 9)
+    xing = index + 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info") and data[xing + 7] & 1:
+        frames = struct.unpack_from(">I", data, xing + 8)[0]
+        meta.duration = frames * samples_per_frame / sample_rate
+        return
+    vbri = index + 36
+    if data[vbri:vbri + 4] == b"VBRI":
+        frames = struct.unpack_from(">I", data, vbri + 14)[0]
+        meta.duration = frames * samples_per_frame / sample_rate
+        return
+    bitrate = _MPEG_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    audio_size = file_size - audio_start - index - (128 if has_id3v1 else 0)
+    meta.duration = max(0, audio_size) * 8 / bitrate
+
+
+# WAV
+
+def _parse_wav(file, file_size: int, meta: MediaMetadata) -> None:
+    offset, byte_rate = 12, 0
+    while offset + 8 <= file_size:
+        header = _read_at(file, offset, 8)
+        if len(header) < 8:
+            return
+        chunk_id, size = struct.unpack("<4sI", header)
+        if chunk_id == b"fmt ":
+            byte_rate = struct.unpack_from("<I", file.read(12), 8)[0]
+        elif chunk_id == b"data":
+            if byte_rate:
+                meta.duration = min(size, file_size - offset - 8) / byte_rate
+            return
+        offset += 8 + size + (size & 1)
+
+
+_PARSERS = {
+    "video/mp4": _parse_mp4,
+    "video/quicktime": _parse_mp4,
+    "video/3gpp": _parse_mp4,
+    "video/3gpp2": _parse_mp4,
+    "audio/mp4": _parse_mp4,
+    "video/webm": _parse_matroska,
+    "video/x-matroska": _parse_matroska,
+    "audio/ogg": _parse_ogg,
+    "video/ogg": _parse_ogg,
+    "audio/flac": _parse_flac,
+    "audio/mpeg": _parse_mpeg_audio,
+    "audio/wav": _parse_wav,
+}
+
+
+def read_metadata(path: str) -> MediaMetadata:
+    """Read duration, dimensions and tags of an audio or video file.
+    Only the needed boxes, elements or pages are read, never the whole file.
+    Supports MP4/MOV/M4A, Matroska/WebM, Ogg Vorbis/Opus, FLAC, MP3 (ID3v1/ID3v2, Xing/VBRI) and WAV.
+    Parameters:
+        path (str): Path of the file.
+    Returns:
+        MediaMetadata: The metadata, fields stay at their defaults when unknown or malformed.
+    Raises:
+        OSError: If the file can't be read."""
+    meta = MediaMetadata()
+    with open(path, "rb") as file:
+        file_size = os.fstat(file.fileno()).st_size
+        parser = _PARSERS.get(detect_mime_type(file.read(HEADER_SIZE)))
+        if parser is not None:
+            try:
+                parser(file, file_size, meta)
+            except (struct.error, IndexError, ValueError, OverflowError):
+                # malformed file, keep whatever was parsed before the error
+                pass
+    return meta
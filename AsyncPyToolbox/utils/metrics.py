@@ -0,0 +1,265 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+from . import *
+import os
+import time
+import asyncio
+import threading
+from contextlib import suppress
+from .executors import _cpu_count
+
+# Check if psutil is installed
+is_psutil_installed = check_if_package_exists("psutil")
+
+
+def _import_psutil():
+    if not is_psutil_installed:
+        raise ModuleNotFoundError("This function requires psutil to be installed. Install it by running pip install psutil")
+    import psutil
+    return psutil
+
+
+class HostInfo:
+    """Facts about the host that don't change while the process runs, collected once.
+    Attributes:
+        platform (str): Operating system name, like "Linux".
+        release (str): Operating system release.
+        version (str): Operating system version.
+        architecture (str): Machine type, like "x86_64".
+        processor (str): Processor name, may be empty.
+        hostname (str): Host name.
+        ip_address (str): Address the host name resolves to, None if it doesn't.
+        mac_address (str): MAC address of a network interface, None if it can't be read.
+        cpu_count (int): Number of CPUs this process may run on.
+        memory_total (int): Physical memory in bytes.
+        boot_time (float): Unix time the host booted."""
+    __slots__ = ("platform", "release", "version", "architecture", "processor", "hostname", "ip_address", "mac_address", "cpu_count", "memory_total", "boot_time")
+
+    def __init__(self, **facts) -> None:
+        for name in self.__slots__:
+            setattr(self, name, facts[name])
+
+    def __repr__(self) -> str:
+        return f"HostInfo({self.hostname}, {self.platform} {self.release}, {self.architecture}, {self.cpu_count} CPUs)"
+
+
+class SystemMetrics:
+    """One sample of the dynamic counters. Rates and CPU usage cover the time since the previous sample
+    of the same collector and are None in its first sample.
+    Attributes:
+        timestamp (float): Unix time of the sample.
+        elapsed (float): Seconds since the previous sample, None in the first one.
+        cpu_percent (float): CPU usage over all cores, from 0 to 100.
+        cpu_per_core (tuple): CPU usage of each core, from 0 to 100.
+        cpu_freq_per_core (tuple): Current frequency of each core in MHz, empty if the platform doesn't report it.
+        memory_total (int): Physical memory in bytes.
+        memory_used (int): Memory in use in bytes.
+        memory_available (int): Memory available without swapping in bytes.
+        memory_percent (float): Share of memory in use, from 0 to 100.
+        disk_path (str): Path the disk usage was read for.
+        disk_total (int): Size of the disk in bytes.
+        disk_used (int): Bytes used on the disk.
+        disk_percent (float): Share of the disk in use, from 0 to 100.
+        disk_read_rate (float): Bytes read per second over all disks.
+        disk_write_rate (float): Bytes written per second over all disks.
+        net_sent_rate (float): Bytes sent per second over all interfaces.
+        net_recv_rate (float): Bytes received per second over all interfaces."""
+    __slots__ = (
+        "timestamp", "elapsed", "cpu_percent", "cpu_per_core", "cpu_freq_per_core",
+        "memory_total", "memory_used", "memory_available", "memory_percent",
+        "disk_path", "disk_total", "disk_used", "disk_percent",
+        "disk_read_rate", "disk_write_rate", "net_sent_rate", "net_recv_rate",
+    )
+
+    def __init__(self, **values) -> None:
+        for name in self.__slots__:
+            setattr(self, name, values[name])
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return f"SystemMetrics(cpu={self.cpu_percent}%, memory={self.memory_percent}%, disk={self.disk_percent}%)"
+
+
+def _busy_and_total(times) -> tuple:
+    """Busy and total CPU seconds of a psutil cpu_times entry."""
+    total = sum(times)
+    # guest time is already counted in user and nice on Linux
+    total -= getattr(times, "guest", 0) + getattr(times, "guest_nice", 0)
+    return total - times.idle - getattr(times, "iowait", 0), total
+
+
+def _percent(busy: float, total: float) -> float:
+    if total <= 0:
+        return 0.0
+    return round(min(max(busy / total * 100, 0.0), 100.0), 1)
+
+
+def _rate(current, previous, elapsed: float):
+    if current is None or previous is None or not elapsed:
+        return None
+    # counters wrap or are reset when a disk or interface goes away
+    return max(current - previous, 0) / elapsed
+
+
+class MetricsCollector:
+    """Collect system metrics cheaply enough to call on every request.
+    Host facts, including the host name lookup, are gathered once. Each sample only reads the
+    dynamic counters, and CPU usage and I/O rates are computed from the difference with the previous
+    sample, so a sample never sleeps. With start(), a background task keeps latest up to date and
+    readers don't touch psutil at all.
+    Parameters:
+        disk_path (str, optional): Path whose disk usage is reported. Defaults to the current directory at sample time.
+        interval (float, optional): Seconds between background samples. Defaults to 5.
+    Attributes:
+        latest (SystemMetrics): Last sample, None before the first one and after a failed background sample.
+        error (Exception): Why the last background sample failed, None if it succeeded."""
+    def __init__(self, disk_path: str = None, interval: float = 5.0) -> None:
+        self.disk_path = disk_path
+        self.interval = interval
+        self.latest = None
+        self.error = None
+        self._host = None
+        self._previous = None
+        self._lock = threading.Lock()
+        self._task = None
+
+    @property
+    def host(self) -> HostInfo:
+        """Static host facts, collected on first access.
+        Raises:
+            ModuleNotFoundError: If psutil is not installed."""
+        if self._host is None:
+            with self._lock:
+                if self._host is None:
+                    self._host = self._collect_host()
+        return self._host
+
+    @staticmethod
+    def _collect_host() -> HostInfo:
+        import uuid
+        import socket
+        import platform
+        psutil = _import_psutil()
+        hostname = socket.gethostname()
+        ip_address = None
+        with suppress(OSError):
+            ip_address = socket.gethostbyname(hostname)
+        mac_address = None
+        with suppress(Exception):
+            mac_address = ":".join(f"{uuid.getnode():012x}"[i:i + 2] for i in range(0, 12, 2))
+        return HostInfo(
+            platform=platform.system(), release=platform.release(), version=platform.version(),
+            architecture=platform.machine(), processor=platform.processor(), hostname=hostname,
+            ip_address=ip_address, mac_address=mac_address, cpu_count=_cpu_count(),
+            memory_total=psutil.virtual_memory().total, boot_time=psutil.boot_time(),
+        )
+
+    def sample(self) -> SystemMetrics:
+        """Read the dynamic counters now, blocking, see collect for the async version.
+        Returns:
+            SystemMetrics: The sample, also stored as latest.
+        Raises:
+            ModuleNotFoundError: If psutil is not installed."""
+        psutil = _import_psutil()
+        cores = [_busy_and_total(times) for times in psutil.cpu_times(percpu=True)]
+        frequencies = ()
+        with suppress(Exception):
+            frequencies = tuple(round(freq.current, 1) for freq in psutil.cpu_freq(percpu=True) or ())
+        memory = psutil.virtual_memory()
+        disk_path = self.disk_path or os.getcwd()
+        disk = psutil.disk_usage(disk_path)
+        disk_io = psutil.disk_io_counters()
+        net_io = psutil.net_io_counters()
+        counters = (
+            time.monotonic(), cores,
+            disk_io.read_bytes if disk_io else None, disk_io.write_bytes if disk_io else None,
+            net_io.bytes_sent if net_io else None, net_io.bytes_recv if net_io else None,
+        )
+        with self._lock:
+            previous, self._previous = self._previous, counters
+        elapsed = cpu_percent = disk_read = disk_write = net_sent = net_recv = None
+        per_core = ()
+        if previous is not None and len(previous[1]) == len(cores):
+            elapsed = counters[0] - previous[0]
+            deltas = [(busy - old_busy, total - old_total) for (busy, total), (old_busy, old_total) in zip(cores, previous[1])]
+            per_core = tuple(_percent(busy, total) for busy, total in deltas)
+            cpu_percent = _percent(sum(busy for busy, _ in deltas), sum(total for _, total in deltas))
+            disk_read, disk_write, net_sent, net_recv = (
+                _rate(current, old, elapsed) for current, old in zip(counters[2:], previous[2:])
+            )
+        metrics = SystemMetrics(
+            timestamp=time.time(), elapsed=elapsed, cpu_percent=cpu_percent, cpu_per_core=per_core,
+            cpu_freq_per_core=frequencies, memory_total=memory.total, memory_used=memory.used,
+            memory_available=memory.available, memory_percent=memory.percent, disk_path=disk_path,
+            disk_total=disk.total, disk_used=disk.used, disk_percent=disk.percent, disk_read_rate=disk_read,
+            disk_write_rate=disk_write, net_sent_rate=net_sent, net_recv_rate=net_recv,
+        )
+        self.latest, self.error = metrics, None
+        return metrics
+
+    async def collect(self) -> SystemMetrics:
+        """Take a sample in the "io" pool.
+        Returns:
+            SystemMetrics: The sample, also stored as latest."""
+        return await get_pool("io").run(self.sample)
+
+    @property
+    def running(self) -> bool:
+        """Whether the background sampler is running."""
+        return self._task is not None
+
+    def recent(self) -> SystemMetrics:
+        """The sample of the background sampler if it is running and the sample is younger than two intervals.
+        Returns:
+            SystemMetrics: The sample, None if there is no fresh one."""
+        latest = self.latest
+        if self._task is None or latest is None or time.time() - latest.timestamp > 2 * self.interval:
+            return None
+        return latest
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.collect()
+            except Exception as exc:
+                # keep sampling, but don't let readers take the previous sample for a current one
+                self.latest, self.error = None, exc
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Sample every interval seconds in the background, must be called from a running event loop."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background sampling."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def __aenter__(self) -> "MetricsCollector":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+
+_default_collector = None
+
+
+def get_metrics_collector() -> MetricsCollector:
+    """Get the MetricsCollector used by get_system_info, created on first use."""
+    global _default_collector
+    if _default_collector is None:
+        _default_collector = MetricsCollector()
+    return _default_collector
@@ -0,0 +1,258 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import math
+import heapq
+import random
+import asyncio
+from array import array
+from itertools import count
+from .network import PingResult, ping
+
+_NAN = float("nan")
+
+
+def _percentile(ordered: list, percent: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+class TargetStats:
+    """Rolling statistics of a monitored target, over its last window probes.
+    Attributes:
+        host (str): Host of the target.
+        port (int): Port of the target.
+        samples (int): Number of probes in the window.
+        availability (float): Share of successful probes in the window, from 0 to 1. None before the first probe.
+        p50 (float): Median connect latency in microseconds, None without successful probes.
+        p95 (float): 95th percentile latency in microseconds.
+        p99 (float): 99th percentile latency in microseconds.
+        jitter (float): Smoothed variation between consecutive latencies in microseconds (RFC 3550 style).
+        last_error (str): Reason of the last failed probe, None if the last probe succeeded."""
+    __slots__ = ("host", "port", "samples", "availability", "p50", "p95", "p99", "jitter", "last_error")
+
+    def __init__(self, host: str, port: int, samples: int, availability: float, p50: float, p95: float, p99: float, jitter: float, last_error: str) -> None:
+        self.host = host
+        self.port = port
+        self.samples = samples
+        self.availability = availability
+        self.p50 = p50
+        self.p95 = p95
+        self.p99 = p99
+        self.jitter = jitter
+        self.last_error = last_error
+
+    def __repr__(self) -> str:
+        return (f"TargetStats({self.host}:{self.port}, samples={self.samples}, availability={self.availability}, "
+                f"p50={self.p50}, p95={self.p95}, p99={self.p99}, jitter={self.jitter})")
+
+
+class _Target:
+    """A monitored target, its latencies live in a ring of doubles, failures are stored as NaN."""
+    __slots__ = ("host", "port", "interval", "ring", "position", "filled", "jitter", "last_latency", "last_error", "removed")
+
+    def __init__(self, host: str, port: int, interval: float, window: int) -> None:
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.ring = array("d", bytes(8 * window))
+        self.position = 0
+        self.filled = 0
+        self.jitter = 0.0
+        self.last_latency = None
+        self.last_error = None
+        self.removed = False
+
+    def record(self, result: PingResult) -> None:
+        latency = result.latency_us if result.ok else _NAN
+        self.ring[self.position] = latency
+        self.position = (self.position + 1) % len(self.ring)
+        self.filled = min(self.filled + 1, len(self.ring))
+        self.last_error = result.error
+        if result.ok:
+            if self.last_latency is not None:
+                self.jitter += (abs(latency - self.last_latency) - self.jitter) / 16
+            self.last_latency = latency
+
+    def stats(self) -> TargetStats:
+        window = self.ring if self.filled == len(self.ring) else self.ring[:self.filled]
+        # NaN is the only value not equal to itself
+        ordered = sorted(value for value in window if value == value)
+        availability = len(ordered) / self.filled if self.filled else None
+        return TargetStats(
+            self.host, self.port, self.filled, availability, _percentile(ordered, 50), _percentile(ordered, 95),
+            _percentile(ordered, 99), self.jitter, self.last_error,
+        )
+
+
+class HealthMonitor:
+    """Probe many TCP endpoints on a schedule and keep rolling latency statistics for each.
+    A single scheduler task keeps every target in a heap ordered by its next probe time, so an idle
+    target costs nothing but its window (8 bytes per sample). Probe times are spread over the first interval
+    and every next probe is moved by up to jitter * interval, so probes never fire in lockstep.
+    Parameters:
+        interval (float, optional): Seconds between probes of a target. Defaults to 30.
+        timeout (float, optional): Seconds allowed for each probe. Defaults to 5.
+        window (int, optional): Number of recent probes the statistics are computed over. Defaults to 256.
+        concurrency (int, optional): Maximum number of probes in flight. Defaults to 100.
+        jitter (float, optional): Random spread of probe times as a fraction of the interval. Defaults to 0.1."""
+    def __init__(self, interval: float = 30.0, timeout: float = 5.0, window: int = 256, concurrency: int = 100, jitter: float = 0.1) -> None:
+        self.interval = interval
+        self.timeout = timeout
+        self.window = window
+        self.concurrency = concurrency
+        self.jitter = jitter
+        self.probes = 0
+        self._targets = {}
+        self._heap = []
+        self._sequence = count()
+        self._wakeup = None
+        self._slots = None
+        self._task = None
+        self._probing = set()
+
+    def add(self, host: str, port: int, interval: float = None) -> None:
+        """Start monitoring a target, adding it again only changes its interval.
+        Parameters:
+            host (str): Host name or IP address.
+            port (int): Port to probe.
+            interval (float, optional): Seconds between probes of this target. Defaults to the monitor interval."""
+        key = (host, port)
+        target = self._targets.get(key)
+        if target is not None:
+            target.interval = interval or self.interval
+            return
+        target = self._targets[key] = _Target(host, port, interval or self.interval, self.window)
+        self._schedule(target, random.uniform(0, target.interval))
+
+    def remove(self, host: str, port: int) -> None:
+        """Stop monitoring a target.
+        Raises:
+            KeyError: If the target isn't monitored."""
+        # the heap entry is dropped when it comes up
+        self._targets.pop((host, port)).removed = True
+
+    def __contains__(self, target: tuple) -> bool:
+        return tuple(target) in self._targets
+
+    def __len__(self) -> int:
+        return len(self._targets)
+
+    def stats(self, host: str, port: int) -> TargetStats:
+        """Get the statistics of a target.
+        Raises:
+            KeyError: If the target isn't monitored."""
+        return self._targets[(host, port)].stats()
+
+    def all_stats(self) -> list:
+        """Get the statistics of every target.
+        Returns:
+            list: TargetStats of every target."""
+        return [target.stats() for target in self._targets.values()]
+
+    def _schedule(self, target: _Target, delay: float) -> None:
+        loop_time = asyncio.get_running_loop().time() if self._task is not None else 0.0
+        heapq.heappush(self._heap, (loop_time + delay, next(self._sequence), target))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _next_delay(self, target: _Target) -> float:
+        return target.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    async def probe(self, host: str, port: int) -> PingResult:
+        """Probe a target now and record the result, outside of its schedule.
+        Raises:
+            KeyError: If the target isn't monitored."""
+        target = self._targets[(host, port)]
+        result = await ping(host, port, self.timeout)
+        target.record(result)
+        self.probes += 1
+        return result
+
+    async def probe_all(self) -> None:
+        """Probe every target once now, at most concurrency at a time."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def probe(target: _Target) -> None:
+            async with semaphore:
+                target.record(await ping(target.host, target.port, self.timeout))
+                self.probes += 1
+
+        await asyncio.gather(*(probe(target) for target in list(self._targets.values())))
+
+    async def _probe(self, target: _Target) -> None:
+        try:
+            result = await ping(target.host, target.port, self.timeout)
+            if not target.removed:
+                target.record(result)
+                self.probes += 1
+        finally:
+            self._slots.release()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        heap = self._heap
+        while True:
+            if not heap:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            due, _, target = heap[0]
+            delay = due - loop.time()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(heap)
+            if target.removed:
+                continue
+            await self._slots.acquire()
+            task = asyncio.ensure_future(self._probe(target))
+            self._probing.add(task)
+            task.add_done_callback(self._probing.discard)
+            # keep the cadence unless the monitor fell a whole interval behind
+            now = loop.time()
+            next_due = due + self._next_delay(target)
+            heapq.heappush(heap, (next_due if next_due > now else now + self._next_delay(target), next(self._sequence), target))
+
+    def start(self) -> None:
+        """Start probing in the background, must be called from a running event loop."""
+        if self._task is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        # targets added before start were scheduled relative to 0
+        self._heap = [(loop.time() + due, sequence, target) for due, sequence, target in self._heap]
+        heapq.heapify(self._heap)
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop probing, running probes are cancelled."""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        for running in (task, *self._probing):
+            running.cancel()
+        await asyncio.gather(task, *self._probing, return_exceptions=True)
+        loop_time = asyncio.get_running_loop().time()
+        # keep the schedule relative, so a later start picks it up again
+        self._heap = [(due - loop_time, sequence, target) for due, sequence, target in self._heap]
+        self._wakeup = None
+
+    async def __aenter__(self) -> "HealthMonitor":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
@@ -0,0 +1,201 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import os
+import socket
+import asyncio
+import ipaddress
+from time import perf_counter
+
+DNS_TTL = 60.0
+# failed lookups are retried sooner than successful ones expire
+DNS_NEGATIVE_TTL = 5.0
+_DNS_CACHE_SIZE = 4096
+# errors a ping reports instead of raising, bad host names raise UnicodeError, a ValueError,
+# and ports out of range OverflowError
+_PING_ERRORS = (OSError, asyncio.TimeoutError, ValueError, OverflowError)
+
+
+class PingResult:
+    """Outcome of a TCP ping.
+    Attributes:
+        host (str): Host that was pinged.
+        port (int): Port that was pinged.
+        ok (bool): Whether the connection was accepted.
+        latency_us (int): Time to connect in microseconds, DNS excluded. None if it failed.
+        address (str): Address that was connected to, None if the host didn't resolve.
+        error (str): Short reason of the failure, None if it succeeded."""
+    __slots__ = ("host", "port", "ok", "latency_us", "address", "error")
+
+    def __init__(self, host: str, port: int, ok: bool, latency_us: int = None, address: str = None, error: str = None) -> None:
+        self.host = host
+        self.port = port
+        self.ok = ok
+        self.latency_us = latency_us
+        self.address = address
+        self.error = error
+
+    def __repr__(self) -> str:
+        if self.ok:
+            return f"PingResult({self.host}:{self.port}, ok, {self.latency_us}us)"
+        return f"PingResult({self.host}:{self.port}, failed, {self.error!r})"
+
+
+def _describe(exc: BaseException) -> str:
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return "timed out"
+    if isinstance(exc, socket.gaierror):
+        return f"DNS lookup failed: {exc.strerror or exc}"
+    if isinstance(exc, OSError) and exc.errno:
+        # asyncio puts the address in strerror, the errno alone reads better
+        return os.strerror(exc.errno).lower()
+    if isinstance(exc, OSError) and exc.strerror:
+        return exc.strerror.lower()
+    return f"{type(exc).__name__}: {exc}"
+
+
+class _DnsCache:
+    """getaddrinfo results per (host, port), concurrent lookups of the same name share one query."""
+    def __init__(self) -> None:
+        self._entries = {}
+        self._lookups = {}
+
+    async def resolve(self, host: str, port: int) -> list:
+        try:
+            ip = ipaddress.ip_address(host)
+        except ValueError:
+            pass
+        else:
+            family = socket.AF_INET6 if ip.version == 6 else socket.AF_INET
+            return [(family, (host, port))]
+        loop = asyncio.get_running_loop()
+        key = (host, port)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > loop.time():
+            if isinstance(entry[1], Exception):
+                raise entry[1]
+            return entry[1]
+        lookup = self._lookups.get(key)
+        if lookup is None:
+            lookup = self._lookups[key] = asyncio.ensure_future(self._lookup(loop, host, port))
+            lookup.add_done_callback(lambda _: self._lookups.pop(key, None))
+        # a caller timing out must not cancel the lookup other callers wait for
+        return await asyncio.shield(lookup)
+
+    async def _lookup(self, loop, host: str, port: int) -> list:
+        try:
+            infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror as exc:
+            self._store((host, port), loop.time() + DNS_NEGATIVE_TTL, exc)
+            raise
+        addresses = [(family, address) for family, _, _, _, address in infos]
+        self._store((host, port), loop.time() + DNS_TTL, addresses)
+        return addresses
+
+    def _store(self, key: tuple, expires: float, value) -> None:
+        self._entries.pop(key, None)
+        self._entries[key] = (expires, value)
+        if len(self._entries) > _DNS_CACHE_SIZE:
+            del self._entries[next(iter(self._entries))]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_dns = _DnsCache()
+
+
+def clear_dns_cache() -> None:
+    """Forget every cached DNS lookup."""
+    _dns.clear()
+
+
+async def _connect(loop, family: int, address: tuple) -> None:
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.setblocking(False)
+        await loop.sock_connect(sock, address)
+    finally:
+        sock.close()
+
+
+async def ping(host: str, port: int, timeout: float = 5.0) -> PingResult:
+    """Check that a TCP port accepts connections, the connection is closed right away.
+    Every resolved address is tried in turn until one connects or the timeout, DNS included, runs out.
+    Parameters:
+        host (str): Host name or IP address.
+        port (int): Port to connect to.
+        timeout (float, optional): Seconds for the whole attempt. Defaults to 5.
+    Returns:
+        PingResult: The outcome, failures are reported in it instead of raised."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    address = None
+    try:
+        addresses = await asyncio.wait_for(_dns.resolve(host, port), timeout)
+        error = None
+        for family, address in addresses:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            start = perf_counter()
+            try:
+                await asyncio.wait_for(_connect(loop, family, address), remaining)
+            except _PING_ERRORS as exc:
+                error = exc
+                continue
+            return PingResult(host, port, True, round((perf_counter() - start) * 1e6), address[0])
+        raise error or OSError(0, "no address")
+    except _PING_ERRORS as exc:
+        return PingResult(host, port, False, None, address[0] if address else None, _describe(exc))
+
+
+async def ping_many(targets, concurrency: int = 100, timeout: float = 5.0, deadline: float = None):
+    """Ping many targets at once, yielding every result as soon as it is known.
+    Parameters:
+        targets (iterable): (host, port) pairs.
+        concurrency (int, optional): Maximum number of pings in flight. Defaults to 100.
+        timeout (float, optional): Seconds allowed for each target. Defaults to 5.
+        deadline (float, optional): Seconds allowed for the whole sweep, targets not done by then are reported as failed. Defaults to none.
+    Yields:
+        PingResult: One per target, in completion order."""
+    loop = asyncio.get_running_loop()
+    end = None if deadline is None else loop.time() + deadline
+    targets = iter(targets)
+    running = {}
+    try:
+        while True:
+            while len(running) < concurrency:
+                target = next(targets, None)
+                if target is None:
+                    break
+                host, port = target
+                budget = timeout if end is None else min(timeout, end - loop.time())
+                running[asyncio.ensure_future(ping(host, port, max(budget, 0)))] = target
+            if not running:
+                return
+            remaining = None if end is None else max(end - loop.time(), 0)
+            done, _ = await asyncio.wait(running, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                for task, (host, port) in running.items():
+                    task.cancel()
+                    yield PingResult(host, port, False, error="deadline exceeded")
+                running.clear()
+                for host, port in targets:
+                    yield PingResult(host, port, False, error="deadline exceeded")
+                return
+            for task in done:
+                host, port = running.pop(task)
+                if task.exception() is not None:
+                    # anything ping doesn't report itself fails this target, not the sweep
+                    yield PingResult(host, port, False, error=_describe(task.exception()))
+                else:
+                    yield task.result()
+    finally:
+        for task in running:
+            task.cancel()
@@ -0,0 +1,202 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import os
+import struct
+import mimetypes
+import threading
+from collections import OrderedDict
+
+# bytes read from the start of a file, enough for every signature below
+HEADER_SIZE = 4096
+_CACHE_SIZE = 4096
+
+# (offset, signature, mime type), checked in order, the first match wins
+MAGIC_TABLE = (
+    (0, b"\xff\xd8\xff", "image/jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "image/png"),
+    (0, b"GIF87a", "image/gif"),
+    (0, b"GIF89a", "image/gif"),
+    (0, b"II*\x00", "image/tiff"),
+    (0, b"MM\x00*", "image/tiff"),
+    (0, b"fLaC", "audio/flac"),
+    (0, b"ID3", "audio/mpeg"),
+    (0, b"#!AMR", "audio/amr"),
+    (0, b"FLV\x01", "video/x-flv"),
+    (0, b"%PDF-", "application/pdf"),
+    (0, b"PK\x03\x04", "application/zip"),
+    (0, b"Rar!\x1a\x07", "application/vnd.rar"),
+    (0, b"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+    (0, b"\x1f\x8b", "application/gzip"),
+)
+# RIFF containers, the form type sits at offset 8
+_RIFF_TYPES = {b"WEBP": "image/webp", b"WAVE": "audio/wav", b"AVI ": "video/x-msvideo"}
+# ISO base media brands at offset 8, everything else with an ftyp box is treated as mp4 video
+_FTYP_BRANDS = {
+    b"M4A ": "audio/mp4", b"M4B ": "audio/mp4", b"M4P ": "audio/mp4", b"F4A ": "audio/mp4",
+    b"qt  ": "video/quicktime", b"3gp4": "video/3gpp", b"3gp5": "video/3gpp", b"3gp6": "video/3gpp",
+    b"3g2a": "video/3gpp2", b"heic": "image/heic", b"heix": "image/heic", b"mif1": "image/heif",
+    b"msf1": "image/heif", b"avif": "image/avif",
+}
+_KINDS_BY_PREFIX = {"image/": "photo", "video/": "video", "audio/": "audio"}
+# sizes of the BMP info headers (OS/2 1.x, Windows 3.x, the Adobe variants, OS/2 2.x, Windows 4.x and 5.x)
+_BMP_HEADER_SIZES = frozenset((12, 40, 52, 56, 64, 108, 124))
+# telegram stickers are WebP images with their longer side exactly this many pixels
+STICKER_SIZE = 512
+
+
+def _is_bmp(header: bytes) -> bool:
+    # "BM" alone starts plenty of text files, the info header size at offset 14 has only a few valid values
+    return header.startswith(b"BM") and len(header) >= 18 and struct.unpack("<I", header[14:18])[0] in _BMP_HEADER_SIZES
+
+
+def _is_ico(header: bytes) -> bool:
+    # reserved 0, type 1 (icon), at least one image, whose directory entry has a zero reserved byte and 0 or 1 planes
+    if not header.startswith(b"\x00\x00\x01\x00") or len(header) < 12:
+        return False
+    count, reserved, planes = struct.unpack("<H3xBH", header[4:12])
+    return count > 0 and reserved == 0 and planes <= 1
+
+
+def _webp_size(header: bytes) -> tuple:
+    """Read the dimensions of a WebP image from its first 30 bytes.
+    Parameters:
+        header (bytes): Start of the file.
+    Returns:
+        tuple: (width, height), (0, 0) if the header is not a WebP one or is damaged."""
+    if not header.startswith(b"RIFF") or header[8:12] != b"WEBP" or len(header) < 30:
+        return 0, 0
+    chunk = header[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        bits = struct.unpack("<I", header[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(header[24:27], "little") + 1, int.from_bytes(header[27:30], "little") + 1
+    return 0, 0
+
+
+def detect_mime_type(header: bytes) -> str:
+    """Detect the mime type of a file from its first bytes.
+    Parameters:
+        header (bytes): Start of the file, HEADER_SIZE bytes are enough.
+    Returns:
+        str: Mime type, None if the format is unknown."""
+    if header[4:8] == b"ftyp":
+        return _FTYP_BRANDS.get(header[8:12], "video/mp4")
+    for offset, signature, mime_type in MAGIC_TABLE:
+        if header.startswith(signature, offset):
+            return mime_type
+    if _is_bmp(header):
+        return "image/bmp"
+    if _is_ico(header):
+        return "image/x-icon"
+    if header.startswith(b"RIFF"):
+        return _RIFF_TYPES.get(header[8:12])
+    if header.startswith(b"\x1a\x45\xdf\xa3"):
+        # EBML, the doctype element tells webm from matroska
+        return "video/webm" if b"webm" in header[:64] else "video/x-matroska"
+    if header.startswith(b"OggS"):
+        if b"\x80theora" in header[:128]:
+            return "video/ogg"
+        return "audio/ogg"
+    if len(header) > 1 and header[0] == 0xFF:
+        if header[1] & 0xF6 == 0xF0:
+            return "audio/aac"
+        if header[1] & 0xE0 == 0xE0:
+            # mpeg audio frame sync without an ID3 tag
+            return "audio/mpeg"
+    return None
+
+
+class MediaInfo:
+    """Classification of a file.
+    Attributes:
+        path (str): Path of the file.
+        size (int): Size in bytes.
+        mtime (int): Modification time in nanoseconds.
+        mime_type (str): Mime type, from the file contents or from the extension when the contents are unknown.
+        kind (str): One of photo, video, audio, sticker, animated_sticker or document. Only WebP images whose
+            longer side is STICKER_SIZE pixels are stickers, other WebP images are photos.
+        extension (str): Lower case extension without the dot.
+        sniffed (bool): Whether the mime type was detected from the contents."""
+    __slots__ = ("path", "size", "mtime", "mime_type", "kind", "extension", "sniffed")
+
+    def __init__(self, path: str, size: int, mtime: int, mime_type: str, kind: str, extension: str, sniffed: bool) -> None:
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.mime_type = mime_type
+        self.kind = kind
+        self.extension = extension
+        self.sniffed = sniffed
+
+    def __repr__(self) -> str:
+        return f"MediaInfo(path={self.path!r}, mime_type={self.mime_type!r}, kind={self.kind!r}, size={self.size})"
+
+
+def classify(path: str, header: bytes, size: int = 0, mtime: int = 0) -> MediaInfo:
+    """Classify a file from its header, no I/O.
+    Parameters:
+        path (str): Path of the file, only its extension is used.
+        header (bytes): Start of the file.
+        size (int, optional): Size of the file. Defaults to 0.
+        mtime (int, optional): Modification time of the file in nanoseconds. Defaults to 0.
+    Returns:
+        MediaInfo: The classification."""
+    extension = os.path.splitext(path)[1][1:].lower()
+    mime_type = detect_mime_type(header)
+    sniffed = mime_type is not None
+    if not sniffed:
+        mime_type = mimetypes.guess_type(path)[0]
+    if mime_type == "application/gzip" and extension == "tgs":
+        # telegram animated stickers are gzipped lottie json
+        mime_type, kind = "application/x-tgsticker", "animated_sticker"
+    elif mime_type == "image/webp" and sniffed and max(_webp_size(header)) == STICKER_SIZE:
+        kind = "sticker"
+    else:
+        kind = next((kind for prefix, kind in _KINDS_BY_PREFIX.items() if mime_type and mime_type.startswith(prefix)), "document")
+    return MediaInfo(path, size, mtime, mime_type, kind, extension, sniffed)
+
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def sniff(path: str, stat_result: os.stat_result = None) -> MediaInfo:
+    """Classify a file, reading its header at most once per (path, size, mtime).
+    Parameters:
+        path (str): Path of the file.
+        stat_result (os.stat_result, optional): Stat of the file if the caller already has it.
+    Returns:
+        MediaInfo: The classification.
+    Raises:
+        OSError: If the file can't be read."""
+    stat_result = stat_result or os.stat(path)
+    key = (path, stat_result.st_size, stat_result.st_mtime_ns)
+    with _cache_lock:
+        info = _cache.get(key)
+        if info is not None:
+            _cache.move_to_end(key)
+            return info
+    with open(path, "rb") as file:
+        header = file.read(HEADER_SIZE)
+    info = classify(path, header, stat_result.st_size, stat_result.st_mtime_ns)
+    with _cache_lock:
+        _cache[key] = info
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return info
+
+
+def clear_sniff_cache() -> None:
+    """Forget every cached classification."""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,196 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import os
+import time
+import asyncio
+from . import *
+from .convertors import file_to_json, append_json_lines, _write_atomically
+from .json_backends import get_json_backend
+
+# attempts at encoding a document whose nested values keep changing size, before encoding it on the loop
+_ENCODE_ATTEMPTS = 3
+
+
+def _encode(data: dict, indent: int) -> bytes:
+    for _ in range(_ENCODE_ATTEMPTS - 1):
+        try:
+            return get_json_backend().dumps(data, indent)
+        except RuntimeError as exc:
+            # a nested dict or list changed size while it was encoded, RecursionError is a real failure
+            if isinstance(exc, RecursionError):
+                raise
+    return None
+
+
+class JsonStore:
+    """A JSON document kept in memory and written to disk in the background.
+    Reads never touch the disk. Changes are coalesced: the first change after a write schedules
+    the next write delay seconds later, and everything changed until then goes out in that one write.
+    Writes are atomic (temporary file, fsync, rename), so a crash leaves either the old or the new file.
+    The document is encoded and written in a thread, from a copy of its top level taken when the write
+    starts, so set() and delete() during a write go out with the next one. Values mutated in place are
+    written too, but only set() and delete() schedule a write, and a value mutated in place while it is
+    being encoded may go out half updated. A failed background write is retried delay seconds later.
+    Parameters:
+        file_path (str): Path of the JSON file.
+        data (dict, optional): Initial document, use JsonStore.load to read it from file_path. Defaults to {}.
+        delay (float, optional): Seconds to collect changes before writing them. Defaults to 1.
+        changelog (str, optional): Path of an append-only JSON Lines log, every change is appended to it before the file is rewritten. Defaults to None.
+        indent (int, optional): Indentation of the written file, None writes compact JSON. Defaults to 4."""
+    def __init__(self, file_path: str, data: dict = None, delay: float = 1.0, changelog: str = None, indent: int = 4) -> None:
+        self.file_path = file_path
+        self.delay = delay
+        self.changelog = changelog
+        self.indent = indent
+        self.data = data if data is not None else {}
+        self.changes = 0
+        self.writes = 0
+        self._pending = []
+        self._dirty = False
+        self._timer = None
+        self._flushing = None
+        self._lock = None
+        self._error = None
+
+    @classmethod
+    async def load(cls, file_path: str, **kwargs) -> "JsonStore":
+        """Create a store from an existing file, an empty store if it doesn't exist yet.
+        Parameters:
+            file_path (str): Path of the JSON file.
+            **kwargs: Passed to JsonStore.
+        Returns:
+            JsonStore: The store."""
+        data = await file_to_json(file_path) if os.path.exists(file_path) else {}
+        return cls(file_path, data, **kwargs)
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value) -> None:
+        self.set(key, value)
+
+    def __delitem__(self, key) -> None:
+        self.delete(key)
+
+    def __contains__(self, key) -> bool:
+        return key in self.data
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def get(self, key, default=None):
+        """Get a value without any I/O.
+        Parameters:
+            key (str): Key to get.
+            default (optional): Returned if key is missing. Defaults to None."""
+        return self.data.get(key, default)
+
+    def set(self, key, value) -> None:
+        """Set a value, it is written with the next coalesced write.
+        Parameters:
+            key (str): Key to set.
+            value: JSON serializable value."""
+        self.data[key] = value
+        self._changed({"op": "set", "key": key, "value": value})
+
+    def update(self, values: dict) -> None:
+        """Set several values at once.
+        Parameters:
+            values (dict): Keys and values to set."""
+        for key, value in values.items():
+            self.set(key, value)
+
+    def delete(self, key) -> None:
+        """Delete a key, it is written with the next coalesced write.
+        Parameters:
+            key (str): Key to delete.
+        Raises:
+            KeyError: If the key doesn't exist."""
+        del self.data[key]
+        self._changed({"op": "delete", "key": key})
+
+    def _changed(self, change: dict) -> None:
+        self.changes += 1
+        self._dirty = True
+        if self.changelog:
+            change["time"] = time.time()
+            self._pending.append(change)
+        if self._timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # no loop yet, the change goes out with the next flush()
+                return
+            self._timer = loop.call_later(self.delay, self._start_flush)
+
+    def _start_flush(self) -> None:
+        self._timer = None
+        self._flushing = asyncio.ensure_future(self._flush_in_background())
+
+    async def _flush_in_background(self) -> None:
+        try:
+            await self.flush()
+        except Exception as exc:
+            self._error = exc
+            # nothing else would write the kept changes until the next one
+            if self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.delay, self._start_flush)
+
+    async def flush(self) -> None:
+        """Write pending changes now.
+        A failed background write doesn't stop this one, it is only reported if this write fails too.
+        Raises:
+            Exception: Whatever failed in this write, chained to the failure of a previous background write."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # one write at a time, so an older snapshot can never land after a newer one
+        async with self._lock:
+            # the changes a failed background write kept are retried right here
+            error, self._error = self._error, None
+            if not self._dirty:
+                return
+            # the top level copy keeps set() and delete() out of the document being encoded
+            snapshot, pending = dict(self.data), self._pending
+            self._dirty, self._pending = False, []
+            try:
+                if pending:
+                    await append_json_lines(self.changelog, pending)
+                    pending = []
+                pool = get_pool("io")
+                encoded = await pool.run(_encode, snapshot, self.indent)
+                if encoded is None:
+                    encoded = get_json_backend().dumps(snapshot, self.indent)
+                await pool.run(_write_atomically, self.file_path, encoded)
+            except BaseException as exc:
+                # keep the changes so the next flush retries them
+                self._dirty = True
+                self._pending = pending + self._pending
+                if error is not None and isinstance(exc, Exception):
+                    raise exc from error
+                raise
+            self.writes += 1
+
+    async def close(self) -> None:
+        """Write pending changes and stop the background writer."""
+        if self._flushing is not None:
+            await self._flushing
+            self._flushing = None
+        await self.flush()
+
+    async def __aenter__(self) -> "JsonStore":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -7,96 +7,120 @@
 # All rights reserved.
 
 import re
+import html
 from . import *
-import random
 import string
+import ipaddress
+from functools import lru_cache
+from .tokens import HEX_ALPHABET, get_token_generator, random_tokens
+from .useragent import UserAgentPool, get_useragent_pool
+from .markup import to_text, strip_tags, iter_text, stream_text
 
-ip_middle_octet = r"(?:\.(?:1?\d{1,2}|2[0-4]\d|25[0-5]))"
-ip_last_octet = r"(?:\.(?:0|[1-9]\d?|1\d\d|2[0-4]\d|25[0-5]))"
-regex = re.compile(
-    r"^"
-    # protocol identifier
-    r"(?:(?:https?|ftp)://)"
-    # user:pass authentication
-    r"(?:[-a-z\u00a1-\uffff0-9._~%!$&'()*+,;=:]+"
-    r"(?::[-a-z0-9._~%!$&'()*+,;=:]*)?@)?"
-    r"(?:"
-    r"(?P<private_ip>"
-    # IP address exclusion
-    # private & local networks
-    r"(?:(?:10|127)" + ip_middle_octet + r"{2}" + ip_last_octet + r")|"
-    r"(?:(?:169\.254|192\.168)" + ip_middle_octet + ip_last_octet + r")|"
-    r"(?:172\.(?:1[6-9]|2\d|3[0-1])" + ip_middle_octet + ip_last_octet + r"))"
-    r"|"
-    # private & local hosts
-    r"(?P<private_host>" r"(?:localhost))" r"|"
-    # IP address dotted notation octets
-    # excludes loopback network 0.0.0.0
-    # excludes reserved space >= 224.0.0.0
-    # excludes network & broadcast addresses
-    # (first & last IP address of each class)
-    r"(?P<public_ip>"
-    r"(?:[1-9]\d?|1\d\d|2[01]\d|22[0-3])"
-    r"" + ip_middle_octet + r"{2}"
-    r"" + ip_last_octet + r")"
-    r"|"
-    # IPv6 RegEx from https://stackoverflow.com/a/17871737
-    r"\[("
-    # 1:2:3:4:5:6:7:8
-    r"([0-9a-fA-F]{1,4}:){7,7}[0-9a-fA-F]{1,4}|"
-    # 1::                              1:2:3:4:5:6:7::
-    r"([0-9a-fA-F]{1,4}:){1,7}:|"
-    # 1::8             1:2:3:4:5:6::8  1:2:3:4:5:6::8
-    r"([0-9a-fA-F]{1,4}:){1,6}:[0-9a-fA-F]{1,4}|"
-    # 1::7:8           1:2:3:4:5::7:8  1:2:3:4:5::8
-    r"([0-9a-fA-F]{1,4}:){1,5}(:[0-9a-fA-F]{1,4}){1,2}|"
-    # 1::6:7:8         1:2:3:4::6:7:8  1:2:3:4::8
-    r"([0-9a-fA-F]{1,4}:){1,4}(:[0-9a-fA-F]{1,4}){1,3}|"
-    # 1::5:6:7:8       1:2:3::5:6:7:8  1:2:3::8
-    r"([0-9a-fA-F]{1,4}:){1,3}(:[0-9a-fA-F]{1,4}){1,4}|"
-    # 1::4:5:6:7:8     1:2::4:5:6:7:8  1:2::8
-    r"([0-9a-fA-F]{1,4}:){1,2}(:[0-9a-fA-F]{1,4}){1,5}|"
-    # 1::3:4:5:6:7:8   1::3:4:5:6:7:8  1::8
-    r"[0-9a-fA-F]{1,4}:((:[0-9a-fA-F]{1,4}){1,6})|"
-    # ::2:3:4:5:6:7:8  ::2:3:4:5:6:7:8 ::8       ::
-    r":((:[0-9a-fA-F]{1,4}){1,7}|:)|"
-    # fe80::7:8%eth0   fe80::7:8%1
-    # (link-local IPv6 addresses with zone index)
-    r"fe80:(:[0-9a-fA-F]{0,4}){0,4}%[0-9a-zA-Z]{1,}|"
-    r"::(ffff(:0{1,4}){0,1}:){0,1}"
-    r"((25[0-5]|(2[0-4]|1{0,1}[0-9]){0,1}[0-9])\.){3,3}"
-    # ::255.255.255.255   ::ffff:255.255.255.255  ::ffff:0:255.255.255.255
-    # (IPv4-mapped IPv6 addresses and IPv4-translated addresses)
-    r"(25[0-5]|(2[0-4]|1{0,1}[0-9]){0,1}[0-9])|"
-    r"([0-9a-fA-F]{1,4}:){1,4}:"
-    r"((25[0-5]|(2[0-4]|1{0,1}[0-9]){0,1}[0-9])\.){3,3}"
-    # 2001:db8:3:4::192.0.2.33  64:ff9b::192.0.2.33
-    # (IPv4-Embedded IPv6 Address)
-    r"(25[0-5]|(2[0-4]|1{0,1}[0-9]){0,1}[0-9])" r")\]|"
-    # host name
-    r"(?:(?:(?:xn--)|[a-z\u00a1-\uffff\U00010000-\U0010ffff0-9]-?)*"
-    r"[a-z\u00a1-\uffff\U00010000-\U0010ffff0-9]+)"
-    # domain name
-    r"(?:\.(?:(?:xn--)|[a-z\u00a1-\uffff\U00010000-\U0010ffff0-9]-?)*"
-    r"[a-z\u00a1-\uffff\U00010000-\U0010ffff0-9]+)*"
-    # TLD identifier
-    r"(?:\.(?:(?:xn--[a-z\u00a1-\uffff\U00010000-\U0010ffff0-9]{2,})|"
-    r"[a-z\u00a1-\uffff\U00010000-\U0010ffff]{2,}))"
-    r")"
-    # port number
-    r"(?::\d{2,5})?"
-    # resource path
-    r"(?:/[-a-z\u00a1-\uffff\U00010000-\U0010ffff0-9._~%!$&'()*+,;=:@/]*)?"
-    # query string
-    r"(?:\?\S*)?"
-    # fragment
-    r"(?:#\S*)?" r"$",
-    re.UNICODE | re.IGNORECASE,
+_URL_SCHEMES = {"http": 7, "https": 8, "ftp": 6}
+# shortest possible url is something like ftp://a.bc
+_MIN_URL_LENGTH = 10
+_URL_CACHE_SIZE = 4096
+# longer values are checked without caching them, keeps the cache memory bounded
+_URL_CACHE_MAX_LENGTH = 2048
+_WHITESPACE = lazy_pattern(r"\s")
+_URL_PARTS = lazy_pattern(r"([^/?#]*)([^?#]*)")
+_ZONE_ID = lazy_pattern(r"[0-9a-z]+", re.IGNORECASE)
+_USERINFO = lazy_pattern(r"[-a-z\u00a1-\uffff0-9._~%!$&'()*+,;=:]+", re.IGNORECASE)
+_PATH = lazy_pattern(r"[-a-z\u00a1-\uffff\U00010000-\U0010ffff0-9._~%!$&'()*+,;=:@/]*", re.IGNORECASE)
+_HOST_LABELS = lazy_pattern(r"[-.a-z\u00a1-\uffff\U00010000-\U0010ffff0-9]+", re.IGNORECASE)
+_TLD = lazy_pattern(
+    r"xn--[a-z\u00a1-\uffff\U00010000-\U0010ffff0-9]{2,}|[a-z\u00a1-\uffff\U00010000-\U0010ffff]{2,}",
+    re.IGNORECASE,
 )
+_PRIVATE_NETWORKS = tuple(
+    ipaddress.IPv4Network(network)
+    for network in ("10.0.0.0/8", "127.0.0.0/8", "169.254.0.0/16", "192.168.0.0/16", "172.16.0.0/12")
+)
+
+
+def _are_host_labels(labels: str) -> bool:
+    """Dot separated labels of letters, digits and single inner hyphens, "xn--" may appear anywhere."""
+    if not _HOST_LABELS.fullmatch(labels):
+        return False
+    labels = "." + labels.replace("xn--", "x-") + "."
+    return not ("--" in labels or ".-" in labels or "-." in labels or ".." in labels)
+
+def _ipv4_address(host: str) -> ipaddress.IPv4Address:
+    """Parse a dotted quad, None if it isn't one. Like the pattern this parser replaced, the two middle
+    octets may be written with a leading zero ("1.01.1.1"), the first and last may not."""
+    octets = host.split(".")
+    if len(octets) != 4:
+        return None
+    for index, octet in enumerate(octets):
+        if not (octet.isascii() and octet.isdigit() and len(octet) <= 3):
+            return None
+        if octet[0] == "0" and len(octet) > 1 and not (index in (1, 2) and len(octet) == 2):
+            return None
+    values = [int(octet) for octet in octets]
+    if max(values) > 255:
+        return None
+    return ipaddress.IPv4Address(bytes(values))
+
+def _is_port(port: str) -> bool:
+    return 2 <= len(port) <= 5 and port.isascii() and port.isdigit()
+
+def _parse_url(value: str, start: int, public: bool) -> bool:
+    """Validate the authority and path of an URL whose scheme ends at start."""
+    parts = _URL_PARTS.match(value, start)
+    netloc = parts.group(1)
+    if parts.end(2) > parts.end(1) and not _PATH.fullmatch(value, parts.end(1), parts.end(2)):
+        return False
+
+    userinfo, at, hostport = netloc.rpartition("@")
+    if at and not _USERINFO.fullmatch(userinfo):
+        return False
+
+    if hostport.startswith("["):
+        host, bracket, port = hostport[1:].partition("]")
+        if not bracket or (port and not (port.startswith(":") and _is_port(port[1:]))):
+            return False
+        host, percent, zone = host.partition("%")
+        try:
+            address = ipaddress.IPv6Address(host)
+        except ValueError:
+            return False
+        # zone indexes only make sense on link-local addresses
+        return not percent or (address.is_link_local and bool(_ZONE_ID.fullmatch(zone)))
 
-pattern = re.compile(regex)
+    host, colon, port = hostport.partition(":")
+    if colon and not _is_port(port):
+        return False
+    host = host.lower()
+    if host == "localhost":
+        return not public
+    labels, dot, tld = host.rpartition(".")
+    if tld.isascii() and tld.isdigit():
+        address = _ipv4_address(host)
+        if address is None:
+            return False
+        # no 0.0.0.0/8 and nothing from the multicast and reserved space
+        if not 1 <= address.packed[0] <= 223:
+            return False
+        return not (public and any(address in network for network in _PRIVATE_NETWORKS))
+    return bool(dot) and bool(_TLD.fullmatch(tld)) and _are_host_labels(labels)
 
-@run_in_exc
+@lru_cache(maxsize=_URL_CACHE_SIZE)
+def _cached_parse_url(value: str, start: int, public: bool) -> bool:
+    return _parse_url(value, start, public)
+
+def _check_url(value: str, public: bool = False) -> bool:
+    """Check a value in stages: scheme and length, then the cached verdict, then a full parse."""
+    if len(value) < _MIN_URL_LENGTH:
+        return False
+    scheme, sep, _ = value[:8].partition("://")
+    start = _URL_SCHEMES.get(scheme.lower()) if sep else None
+    if start is None or _WHITESPACE.search(value):
+        return False
+    if len(value) > _URL_CACHE_MAX_LENGTH:
+        return _parse_url(value, start, public)
+    return _cached_parse_url(value, start, public)
+
+@run_in_exc(pool="short", mode="auto")
 def is_url(value: str, public: bool =False) -> bool:
     """Check if value is URL.
     Parameters:
@@ -104,15 +128,10 @@ def is_url(value: str, public: bool =False) -> bool:
         public (bool, optional): Whether to check for public URLs or not.
     Returns:
         bool: Whether the value is URL or not."""
-    result = pattern.match(value)
-    if not public:
-        return result
-    return result and not any(
-        (result.groupdict().get(key) for key in ("private_ip", "private_host"))
-    )
+    return _check_url(value, public)
 
 
-@run_in_exc
+@run_in_exc(pool="short", mode="auto")
 def is_valid_email(value: str) -> bool:
     """Check if value is valid email.
     Parameters:
@@ -121,7 +140,7 @@ def is_valid_email(value: str) -> bool:
         bool: Whether the value is valid email or not."""
     return bool(re.search(r"^[\w\.\+\-]+\@[\w]+\.[a-z]{2,3}$", value))
 
-@run_in_exc
+@run_in_exc(pool="short", mode="auto")
 def validate_phone_any_country(phone: str) -> bool:
     """Validate phone number.
     Parameters:
@@ -131,107 +150,116 @@ def validate_phone_any_country(phone: str) -> bool:
     return bool(re.search(r"^\+?[0-9]{6,14}$", phone))
 
 
-@run_in_exc
-def random_hash(length=8) -> str:
-    """Generate a random hash.
+async def _collect(results) -> list:
+    return [result async for result in results]
+
+def _validate_many(func, values, kwargs=None, stream=False, chunk_size=256):
+    results = map_in_exc(func, values, kwargs=kwargs, chunk_size=chunk_size, pool="short")
+    return results if stream else _collect(results)
+
+def is_url_many(values, public: bool = False, stream: bool = False, chunk_size: int = 256):
+    """Check many values with is_url, one executor round trip per chunk.
+    Parameters:
+        values (iterable): Values to check, an iterable or async iterable.
+        public (bool, optional): Whether to check for public URLs or not.
+        stream (bool, optional): Return an async generator instead of a list. Defaults to False.
+        chunk_size (int, optional): Number of values checked per executor call. Defaults to 256.
+    Returns:
+        Awaitable list of bools in input order, or an async generator of them if stream is True."""
+    return _validate_many(_check_url, values, {"public": public}, stream, chunk_size)
+
+def is_valid_email_many(values, stream: bool = False, chunk_size: int = 256):
+    """Check many values with is_valid_email, one executor round trip per chunk.
+    Parameters:
+        values (iterable): Values to check, an iterable or async iterable.
+        stream (bool, optional): Return an async generator instead of a list. Defaults to False.
+        chunk_size (int, optional): Number of values checked per executor call. Defaults to 256.
+    Returns:
+        Awaitable list of bools in input order, or an async generator of them if stream is True."""
+    return _validate_many(is_valid_email.__wrapped__, values, None, stream, chunk_size)
+
+def validate_phone_many(values, stream: bool = False, chunk_size: int = 256):
+    """Check many phone numbers with validate_phone_any_country, one executor round trip per chunk.
+    Parameters:
+        values (iterable): Phone numbers to check, an iterable or async iterable.
+        stream (bool, optional): Return an async generator instead of a list. Defaults to False.
+        chunk_size (int, optional): Number of values checked per executor call. Defaults to 256.
+    Returns:
+        Awaitable list of bools in input order, or an async generator of them if stream is True."""
+    return _validate_many(validate_phone_any_country.__wrapped__, values, None, stream, chunk_size)
+
+
+@run_in_exc(mode="inline")
+def random_hash(length=8, n: int = None):
+    """Generate a random hash, from the operating system CSPRNG.
     Parameters:
         length (int, optional): Length of the hash.
+        n (int, optional): Number of hashes to generate at once. Defaults to a single one.
     Returns:
-        str: Random hash."""
-    return "".join(random.choice("0123456789abcdef") for _ in range(length))
+        str: Random hash, a list of n hashes if n is given."""
+    generator = get_token_generator(HEX_ALPHABET, length)
+    return generator.token() if n is None else generator.tokens(n)
 
-@run_in_exc
-def generate_random_password(length: int, lowercase: bool = True, uppercase: bool = True, digits: bool = True, special_chars: bool = True) -> str:
-    """Generate a random password.
+@run_in_exc(mode="inline")
+def generate_random_password(length: int, lowercase: bool = True, uppercase: bool = True, digits: bool = True, special_chars: bool = True, n: int = None):
+    """Generate a random password, from the operating system CSPRNG.
+    It contains at least one character of every enabled class, unless it is shorter than the number of enabled classes.
     Parameters:
         length (int): Length of the password.
         lowercase (bool, optional): Whether to include lowercase letters or not. Defaults to True.
         uppercase (bool, optional): Whether to include uppercase letters or not. Defaults to True.
         digits (bool, optional): Whether to include digits or not. Defaults to True.
         special_chars (bool, optional): Whether to include special characters or not. Defaults to True.
+        n (int, optional): Number of passwords to generate at once. Defaults to a single one.
     Returns:
-        str: Random password."""
-    chars = string.ascii_lowercase * lowercase + string.ascii_uppercase * uppercase + string.digits * digits + string.punctuation * special_chars
-    return ''.join(random.choice(chars) for _ in range(length))
-
+        str: Random password, a list of n passwords if n is given.
+    Raises:
+        ValueError: If no class is enabled or length is negative."""
+    classes = tuple(chars for chars, enabled in (
+        (string.ascii_lowercase, lowercase), (string.ascii_uppercase, uppercase), (string.digits, digits), (string.punctuation, special_chars),
+    ) if enabled)
+    if not classes:
+        raise ValueError("At least one character class must be enabled")
+    generator = get_token_generator("".join(classes), length, classes if length >= len(classes) else ())
+    return generator.token() if n is None else generator.tokens(n)
 
-bs4_installed = check_if_package_exists("bs4")
-markdown_installed = check_if_package_exists("markdown")
 
-if bs4_installed and markdown_installed:
-    import markdown
-    from bs4 import BeautifulSoup
-
-@run_in_exc
+@run_in_exc(pool="short", mode="auto")
 def md_to_text(raw_text: str) -> str:
-    """Convert markdown to text.
+    """Convert markdown to text, HTML tags are removed and entities decoded too.
     Parameters:
         raw_text (str): Markdown text.
     Returns:
         str: Text converted from markdown."""
-    if bs4_installed and markdown_installed:
-        html = markdown.markdown(raw_text)
-        soup = BeautifulSoup(html, features="html.parser")
-        return soup.get_text()
-    text = re.sub(r'<[^>]*>', '', raw_text)
-    text = re.sub(r'&nbsp;|&amp;|&lt;|&gt;|&quot;|&#39;', '', text)
-    return html_entity_decode(text)
-
-@run_in_exc
+    return to_text(raw_text)
+
+@run_in_exc(pool="short", mode="auto")
 def html_entity_decode(text: str) -> str:
-    """Decode HTML entities in the text.
+    """Decode HTML entities in the text, named, decimal and hexadecimal ones.
     Parameters:
         text (str): Text to decode.
     Returns:
         str: Decoded text."""
-    entities = {'&nbsp;': ' ', '&amp;': '&', '&lt;': '<', '&gt;': '>', '&quot;': '"', '&#39;': "'", '&lt;': '<', '&gt;': '>'}
-    for entity, char in entities.items():
-        text = text.replace(entity, char)
-    return text
-
-@run_in_exc        
-def clean_html(text: str) -> str:
-    """"Clean HTML tags from text.
+    return html.unescape(text)
+
+@run_in_exc(pool="short", mode="auto")
+def clean_html(text: str, decode_entities: bool = False) -> str:
+    """"Clean HTML tags and comments from text.
     Parameters:
         text (str): Text to clean.
+        decode_entities (bool, optional): Whether to decode HTML entities in the same pass, escaped markup like &lt;b&gt; becomes a tag then. Defaults to False.
     Returns:
         str: Cleaned text."""
-    return re.sub(r"<[^>]*>", "", text)
-
-platforms = {
-        "Macintosh": ["68K", "PPC"],
-        "Windows": [
-            "Win3.11",
-            "WinNT3.51",
-            "WinNT4.0",
-            "Windows NT 5.0",
-            "Windows NT 5.1",
-            "Windows NT 5.2",
-            "Windows NT 6.0",
-            "Windows NT 6.1",
-            "Windows NT 6.2",
-            "Win95",
-            "Win98",
-            "Win 9x 4.90",
-            "WindowsCE",
-        ],
-        "X11": ["Linux i686", "Linux x86_64"],
-    }
-
-@run_in_exc
-def gen_random_useragent() -> str:
-    """Generate a random user agent.
+    if decode_entities:
+        return to_text(text, markdown=False)
+    return strip_tags(text)
+
+@run_in_exc(mode="inline")
+def gen_random_useragent(session=None) -> str:
+    """Pick a realistic user agent, weighted by browser and version share.
+    Parameters:
+        session (str, optional): Session identifier, the same session always gets the same user agent. Defaults to a random pick.
     Returns:
         str: Random user agent."""
-    platform = random.choice(["Macintosh", "Windows", "X11"])
-    gen_os = random.choice(platforms[platform])    
-    browser = random.choice(["chrome", "firefox", "ie"])
-    if browser == "chrome":
-        return f"Mozilla/5.0 ({gen_os}) AppleWebKit/{random.randint(500, 599)}.0 (KHTML, live Gecko) Chrome/{random.randint(0, 24)}.0.{random.randint(0, 999)} Safari/{random.randint(500, 599)}"
-    elif browser == "firefox":
-        return f"Mozilla/5.0 ({gen_os}; rv:{random.choice(range(1, 16))}.0) Gecko/{random.randint(20000101, 20121231)} Firefox/{random.choice(range(1, 16))}.0"
-    elif browser == "ie":
-        version = f"{random.randint(1, 10)}.0"
-        engine = f"{random.randint(1, 5)}.0"
-        token = f"{random.choice(['.NET CLR', 'SV1', 'Tablet PC', 'Win64; IA64', 'Win64; x64', 'WOW64'])}; " if random.choice([True, False]) else ""
-        return f"Mozilla/5.0 (compatible; MSIE {version}; {gen_os}; {token}Trident/{engine})"
+    pool = get_useragent_pool()
+    return pool.sample() if session is None else pool.for_session(session)
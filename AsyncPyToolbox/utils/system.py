@@ -6,51 +6,206 @@
 #
 # All rights reserved.
 
+import os
 import sys
 import shlex
+import codecs
+import signal
 import asyncio
 import traceback
+import contextvars
 from ..errors import SafeMode
 from . import *
-from io import StringIO
+from .evaluator import EvalPool, capture_output, compile_code, get_eval_pool, is_async_code
+from .network import PingResult, ping, ping_many, clear_dns_cache
+from .metrics import HostInfo, SystemMetrics, MetricsCollector, get_metrics_collector, is_psutil_installed
+from .convertors import humanbytes
 
 
 async def ping_server(host: str, port: int, timeout: int = 5) -> tuple[bool, str]:
-    """Ping a server.
+    """Ping a server, see network.ping for latency and network.ping_many for many hosts at once.
     Parameters:
         host (str): Host to ping.
         port (int): Port to ping.
-        timeout (int, optional): Timeout in seconds. Defaults to 5.
+        timeout (int, optional): Timeout in seconds, DNS lookup included. Defaults to 5.
     Returns:
-        tuple: (success, output)"""
-    try:
-        reader, writer = await asyncio.open_connection(host, port)
-        writer.close()
-        await writer.wait_closed()
+        tuple: (success, output), output is the short reason of a failure."""
+    result = await ping(host, port, timeout)
+    if result.ok:
         return True, "Ping successful!"
-    except Exception:
-        return False, traceback.format_exc()
+    return False, result.error
+
+_POSIX = os.name == "posix"
+_READ_SIZE = 65536
+
 
-async def exec_terminal(command: str) -> tuple[bool, str, int]:
+def _kill_group(process) -> None:
+    """Kill a process started by TerminalStream and everything it spawned."""
+    try:
+        if _POSIX:
+            # the process leads its own session, its pid is the group id
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class TerminalStream:
+    """Output of a terminal command, read while it runs.
+    Iterate it with async for to get (stream, text) tuples, stream being "stdout" or "stderr".
+    Only a few chunks are buffered, a process writing faster than they are consumed is paused by its pipe.
+    The attributes are filled in while iterating and final once the iteration ends.
+    Parameters:
+        command (str): Command to execute.
+        timeout (float, optional): Seconds the command may run, its whole process group is killed past it. Defaults to none.
+        max_bytes (int, optional): Output bytes to keep, the rest is read and discarded. Defaults to unlimited.
+        lines (bool, optional): Yield lines without their line ending instead of chunks as they arrive. Defaults to True.
+        merge_stderr (bool, optional): Send stderr to stdout, keeping their relative order. Defaults to False.
+        max_line (int, optional): Longer lines are split at this many bytes. Defaults to 65536.
+    Attributes:
+        pid (int): Process id once started.
+        return_code (int): Exit code, negative if killed by a signal, None until the process ended.
+        timed_out (bool): Whether the process was killed by the timeout.
+        truncated (bool): Whether output past max_bytes was discarded.
+        bytes_read (int): Output bytes kept."""
+    def __init__(self, command: str, timeout: float = None, max_bytes: int = None, lines: bool = True, merge_stderr: bool = False, max_line: int = 65536) -> None:
+        self.command = command
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.lines = lines
+        self.merge_stderr = merge_stderr
+        self.max_line = max_line
+        self.pid = None
+        self.return_code = None
+        self.timed_out = False
+        self.truncated = False
+        self.bytes_read = 0
+        self._started = False
+
+    def __aiter__(self):
+        if self._started:
+            raise RuntimeError("A TerminalStream can only be iterated once")
+        self._started = True
+        return self._iterate()
+
+    def _keep(self, chunk: bytes) -> bytes:
+        if self.max_bytes is None:
+            self.bytes_read += len(chunk)
+            return chunk
+        allowed = self.max_bytes - self.bytes_read
+        if len(chunk) > allowed:
+            chunk = chunk[:max(allowed, 0)]
+            self.truncated = True
+        self.bytes_read += len(chunk)
+        return chunk
+
+    async def _read(self, stream, name: str, queue: asyncio.Queue) -> None:
+        pending = b""
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        while True:
+            chunk = await stream.read(_READ_SIZE)
+            if not chunk:
+                break
+            if self.truncated:
+                # keep draining so the process never blocks on a full pipe
+                continue
+            chunk = self._keep(chunk)
+            if not self.lines:
+                text = decoder.decode(chunk)
+                if text:
+                    await queue.put((name, text))
+                continue
+            pending += chunk
+            *complete, pending = pending.split(b"\n")
+            for line in complete:
+                await queue.put((name, line.rstrip(b"\r").decode("utf-8", "replace")))
+            while len(pending) > self.max_line:
+                await queue.put((name, pending[:self.max_line].decode("utf-8", "replace")))
+                pending = pending[self.max_line:]
+        if self.lines and pending:
+            await queue.put((name, pending.rstrip(b"\r").decode("utf-8", "replace")))
+        elif not self.lines:
+            text = decoder.decode(b"", final=True)
+            if text:
+                await queue.put((name, text))
+        await queue.put(None)
+
+    async def _iterate(self):
+        process = await asyncio.create_subprocess_exec(
+            *shlex.split(self.command),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT if self.merge_stderr else asyncio.subprocess.PIPE,
+            start_new_session=_POSIX,
+        )
+        self.pid = process.pid
+        loop = asyncio.get_running_loop()
+        deadline = None if self.timeout is None else loop.time() + self.timeout
+        queue = asyncio.Queue(maxsize=16)
+        readers = [asyncio.ensure_future(self._read(process.stdout, "stdout", queue))]
+        if not self.merge_stderr:
+            readers.append(asyncio.ensure_future(self._read(process.stderr, "stderr", queue)))
+        open_streams = len(readers)
+        try:
+            while open_streams:
+                try:
+                    item = await asyncio.wait_for(queue.get(), None if deadline is None else max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    self.timed_out = True
+                    _kill_group(process)
+                    break
+                if item is None:
+                    open_streams -= 1
+                    continue
+                yield item
+            self.return_code = await process.wait()
+        finally:
+            if process.returncode is None:
+                # the consumer stopped early or was cancelled
+                _kill_group(process)
+                self.return_code = await process.wait()
+            for reader in readers:
+                reader.cancel()
+
+
+def stream_terminal(command: str, timeout: float = None, max_bytes: int = None, lines: bool = True, merge_stderr: bool = False) -> TerminalStream:
+    """Execute a terminal command and read its output while it runs, see TerminalStream.
+    Parameters:
+        command (str): Command to execute.
+        timeout (float, optional): Seconds the command may run before its process group is killed. Defaults to none.
+        max_bytes (int, optional): Output bytes to keep. Defaults to unlimited.
+        lines (bool, optional): Yield lines instead of chunks. Defaults to True.
+        merge_stderr (bool, optional): Send stderr to stdout. Defaults to False.
+    Returns:
+        TerminalStream: Async iterable of (stream, text) tuples, holding the return code once exhausted."""
+    return TerminalStream(command, timeout=timeout, max_bytes=max_bytes, lines=lines, merge_stderr=merge_stderr)
+
+
+async def exec_terminal(command: str, timeout: float = None, max_bytes: int = None) -> tuple[bool, str, int]:
     """Execute a terminal command.
     Parameters:
         command (str): Command to execute.
+        timeout (float, optional): Seconds the command may run before its process group is killed. Defaults to none.
+        max_bytes (int, optional): Output bytes to keep. Defaults to unlimited.
     Returns:
-        tuple: (success, output, return_code)"""
+        tuple: (success, output, return_code), success is False if the command couldn't be started or timed out."""
     success = True
-    return_code = 0
-    command = shlex.split(command)
+    return_code = None
     output = ""
+    stream = stream_terminal(command, timeout=timeout, max_bytes=max_bytes)
+    stdout, stderr = [], []
     try:
-        process = await asyncio.create_subprocess_exec(
-            *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-        )
-        return_code = process.returncode
-        stdout, stderr = await process.communicate()
-        output += stdout.decode("utf-8").strip()
+        async for name, line in stream:
+            (stdout if name == "stdout" else stderr).append(line)
+        output += "\n".join(stdout).strip()
         if stderr:
-            output += "\n" + stderr.decode("utf-8").strip()
-        success = True
+            output += "\n" + "\n".join(stderr).strip()
+        if stream.truncated:
+            output += "\n[output truncated]"
+        if stream.timed_out:
+            success = False
+            output += f"\n[killed after {timeout}s]"
+        return_code = stream.return_code
     except Exception:
         exc_type, exc_obj, exc_tb = sys.exc_info()
         errors = traceback.format_exception(exc_type, value=exc_obj, tb=exc_tb)
@@ -58,65 +213,54 @@ async def exec_terminal(command: str) -> tuple[bool, str, int]:
         output += errors[-1]
     return success, output, return_code
 
-async def execute_code(code: str, safe_mode: bool = False) -> dict:
-    """Execute Python code.
+async def execute_code(code: str, safe_mode: bool = False, namespace: dict = None) -> dict:
+    """Execute Python code, top level await is allowed.
+    Code without await runs in a thread of the "cpu" pool so it never blocks the event loop, code with
+    await runs as a coroutine on the loop. In the thread there is no running loop, so synchronous
+    code calling asyncio.get_running_loop() fails and asyncio.get_event_loop() doesn't return the
+    caller's loop, code that needs the loop has to use await somewhere to run on it.
     Parameters:
         code (str): Python code to execute.
         safe_mode (bool, optional): Whether to enable safe mode or not. Defaults to False.
+        namespace (dict, optional): Globals to execute the code in. Defaults to a new dict.
     Returns:
         dict: Namespace of the executed code."""
-    if safe_mode:
-        restricted_commands = ["open", "os.", "sys.", "subprocess."]
-        for cmd in restricted_commands:
-            if cmd in code:
-                raise SafeMode("Unsafe command detected in safe mode")
-    compiled_code = compile(code, filename="<string>", mode="exec")
-    namespace = {}
-    exec(compiled_code, namespace)
+    compiled_code = compile_code(code, safe_mode)
+    namespace = {} if namespace is None else namespace
+    if is_async_code(compiled_code):
+        await eval(compiled_code, namespace)
+    else:
+        # the copied context carries the output capture of evaluate_code into the thread
+        await get_pool("cpu").run(contextvars.copy_context().run, exec, compiled_code, namespace)
     return namespace
 
-async def evaluate_code(code: str, safe_mode: bool = False) -> tuple[str, str, str, dict]:
+async def evaluate_code(code: str, safe_mode: bool = False, isolated: bool = False) -> tuple[str, str, str, dict]:
     """Evaluate Python code.
+    Output is captured per evaluation, concurrent evaluations and other tasks never mix their output.
     Parameters:
-        code (str): Python code to evaluate.
+        code (str): Python code to evaluate, top level await is allowed.
         safe_mode (bool, optional): Whether to enable safe mode or not. Defaults to False.
+        isolated (bool, optional): Run in a worker process of the EvalPool from get_eval_pool, with CPU, memory and time limits. Defaults to False.
     Returns:
         tuple: (exception, stdout, stderr, namespace)"""
-    old_stderr = sys.stderr
-    old_stdout = sys.stdout
-    redirected_output = sys.stdout = StringIO()
-    redirected_error = sys.stderr = StringIO()
-    stdout, stderr, exc = None, None, None
-    try:
-        namespace = await execute_code(code, safe_mode=safe_mode)
-    except Exception:
-        exc = traceback.format_exc()
-    stdout = redirected_output.getvalue()
-    stderr = redirected_error.getvalue()
-    sys.stdout = old_stdout
-    sys.stderr = old_stderr
-    return exc, stdout, stderr, namespace
-
-is_psutil_installed = check_if_package_exists("psutil")
-if is_psutil_installed:
-    from platform import system as pt_system, release as pt_release, version as pt_version, machine as pt_machine, processor as pt_processor
-    from psutil import virtual_memory as psl_virtual_memory, cpu_freq as psl_cpu_freq, disk_usage as psl_disk_usage, disk_io_counters as psl_disk_io_counters, Process as psl_Process
-    from socket import gethostname as skt_gethostname, gethostbyname as skt_gethostbyname
-    from contextlib import suppress
-    import os
-    import re
-    import uuid
-    from .convertors import humanbytes
+    if isolated:
+        return await get_eval_pool().evaluate(code, safe_mode)
+    namespace = {}
+    exc = None
+    with capture_output() as (redirected_output, redirected_error):
+        try:
+            await execute_code(code, safe_mode=safe_mode, namespace=namespace)
+        except Exception:
+            exc = traceback.format_exc()
+    return exc, redirected_output.getvalue(), redirected_error.getvalue(), namespace
 
 @run_in_exc
 def get_system_info(value=False) -> tuple:
-    if not is_psutil_installed:
-        raise ModuleNotFoundError("This function requires psutil to be installed. Install it by running pip install psutil")
     """
     Get Info
         fetches information about your system
         hides MAC and IP until explicitly referenced
-        incompatible with termux due to problem with ethtool.h file .so objects
+        host facts are collected once, see metrics.MetricsCollector for raw numbers and I/O rates
     Parameters:
         value (bool, optional): Whether to fetch IP and MAC or not. Defaults to False.
     Returns:
@@ -124,42 +268,30 @@ def get_system_info(value=False) -> tuple:
     Raises:
         ModuleNotFoundError: If psutil is not installed.
     """
-    splatform = pt_system()
-    platform_release = pt_release()
-    platform_version = pt_version()
-    architecture = pt_machine()
-    hostname = skt_gethostname()
-    ip_address = "Unable to fetch"
-    mac_address = "Unable to fetch"
-    with suppress(Exception):
-        ip_address = skt_gethostbyname(skt_gethostname())
-    with suppress(Exception):
-        mac_address = ":".join(re.findall("..", "%012x" % uuid.getnode()))
-    processor = pt_processor()
-    ram = humanbytes(round(psl_virtual_memory().total))
-    cpu_freq = psl_cpu_freq().current
-    if cpu_freq >= 1000:
-        cpu_freq = f"{round(cpu_freq / 1000, 2)}GHz"
+    collector = get_metrics_collector()
+    host = collector.host
+    # the background sampler, when running and healthy, already has fresh numbers
+    metrics = collector.recent() or collector.sample()
+    if metrics.cpu_freq_per_core:
+        cpu_freq = sum(metrics.cpu_freq_per_core) / len(metrics.cpu_freq_per_core)
+        cpu_freq = f"{round(cpu_freq / 1000, 2)}GHz" if cpu_freq >= 1000 else f"{round(cpu_freq, 2)}MHz"
     else:
-        cpu_freq = f"{round(cpu_freq, 2)}MHz"
-    du = psl_disk_usage(os.getcwd())
-    psl_disk_io_counters()
+        cpu_freq = "Unable to fetch"
     disk = (
-        f"{humanbytes(du.used)}/{humanbytes(du.total)}"
-        f"({du.percent}%)"
+        f"{humanbytes(metrics.disk_used)}/{humanbytes(metrics.disk_total)}"
+        f"({metrics.disk_percent}%)"
     )
-    cpu_len = len(psl_Process().cpu_affinity())
     return (
-        splatform,
-        platform_release,
-        platform_version,
-        architecture,
-        hostname,
-        ip_address if value else None,
-        mac_address if value else None,
-        processor,
-        ram,
-        cpu_len,
+        host.platform,
+        host.release,
+        host.version,
+        host.architecture,
+        host.hostname,
+        (host.ip_address or "Unable to fetch") if value else None,
+        (host.mac_address or "Unable to fetch") if value else None,
+        host.processor,
+        humanbytes(host.memory_total),
+        host.cpu_count,
         cpu_freq,
         disk,
     )
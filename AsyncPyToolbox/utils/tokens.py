@@ -0,0 +1,93 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import os
+from functools import lru_cache
+
+HEX_ALPHABET = "0123456789abcdef"
+URLSAFE_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
+
+class TokenGenerator:
+    """Random tokens drawn from the operating system CSPRNG, every character uniform over the alphabet.
+    Random bytes are fetched in bulk and mapped to the alphabet with bytes.translate, bytes that would
+    bias the mapping are deleted in the same call (rejection sampling), so no character is picked in Python.
+    With required classes, tokens missing a class are drawn again, which keeps the accepted tokens uniform.
+    Parameters:
+        alphabet (str): ASCII characters to draw from, 256 at most and without repeats.
+        length (int): Length of each token.
+        required (tuple, optional): Strings of characters, every token contains at least one character of each. Defaults to none.
+    Raises:
+        ValueError: If the alphabet is empty, too large, repeats characters or isn't ASCII, if length is negative or too short for the required classes."""
+    __slots__ = ("alphabet", "length", "required", "_table", "_rejected", "_acceptance")
+
+    def __init__(self, alphabet: str, length: int, required: tuple = ()) -> None:
+        if not alphabet or len(alphabet) > 256 or not alphabet.isascii() or len(set(alphabet)) != len(alphabet):
+            raise ValueError("The alphabet must hold 1 to 256 distinct ASCII characters")
+        if length < 0:
+            raise ValueError("The token length can't be negative")
+        if length < len(required):
+            raise ValueError(f"A token of length {length} can't contain {len(required)} required character classes")
+        self.alphabet = alphabet
+        self.length = length
+        self.required = tuple(frozenset(chars) for chars in required)
+        size = len(alphabet)
+        # the largest multiple of the alphabet size that fits in a byte, higher bytes are rejected
+        limit = 256 - 256 % size
+        encoded = alphabet.encode("ascii")
+        self._table = bytes(encoded[byte % size] for byte in range(256))
+        self._rejected = bytes(range(limit, 256))
+        self._acceptance = limit / 256
+
+    def _characters(self, count: int) -> str:
+        chunks = []
+        missing = count
+        while missing > 0:
+            # a little more than the expected need, so a second read is rarely needed
+            data = os.urandom(int(missing / self._acceptance * 1.05) + 16).translate(self._table, self._rejected)
+            chunks.append(data)
+            missing -= len(data)
+        return b"".join(chunks)[:count].decode("ascii")
+
+    def tokens(self, n: int) -> list:
+        """Generate n tokens at once, from as few reads of the CSPRNG as possible.
+        Returns:
+            list: n tokens."""
+        length = self.length
+        if not length:
+            return [""] * n
+        result = []
+        while len(result) < n:
+            missing = n - len(result)
+            characters = self._characters(missing * length)
+            candidates = [characters[start:start + length] for start in range(0, missing * length, length)]
+            if self.required:
+                candidates = [token for token in candidates if not any(chars.isdisjoint(token) for chars in self.required)]
+            result.extend(candidates)
+        return result
+
+    def token(self) -> str:
+        """Generate a single token."""
+        return self.tokens(1)[0]
+
+
+@lru_cache(maxsize=64)
+def get_token_generator(alphabet: str, length: int, required: tuple = ()) -> TokenGenerator:
+    """Get a TokenGenerator, generators are cached per alphabet, length and required classes."""
+    return TokenGenerator(alphabet, length, required)
+
+
+def random_tokens(n: int, length: int = 32, alphabet: str = URLSAFE_ALPHABET) -> list:
+    """Generate n cryptographically secure random tokens, for session tokens, invite codes and the like.
+    Parameters:
+        n (int): Number of tokens.
+        length (int, optional): Characters per token. Defaults to 32 (192 bits with the default alphabet).
+        alphabet (str, optional): ASCII characters to draw from. Defaults to the URL safe base64 alphabet.
+    Returns:
+        list: n tokens."""
+    return get_token_generator(alphabet, length).tokens(n)
@@ -0,0 +1,126 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import random
+import hashlib
+
+# (share of traffic, template, versions newest first), {version} and {major} are filled from each version
+DEFAULT_TEMPLATES = (
+    (0.34, "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{major}.0.0.0 Safari/537.36", ("141", "140", "139", "138")),
+    (0.08, "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{major}.0.0.0 Safari/537.36", ("141", "140", "139", "138")),
+    (0.03, "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{major}.0.0.0 Safari/537.36", ("141", "140", "139")),
+    (0.16, "Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{major}.0.0.0 Mobile Safari/537.36", ("141", "140", "139", "138")),
+    (0.10, "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/{major}.0.0.0 Safari/537.36 Edg/{major}.0.0.0", ("141", "140", "139")),
+    (0.05, "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:{major}.0) Gecko/20100101 Firefox/{major}.0", ("144", "143", "142", "140")),
+    (0.02, "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:{major}.0) Gecko/20100101 Firefox/{major}.0", ("144", "143", "142")),
+    (0.01, "Mozilla/5.0 (X11; Linux x86_64; rv:{major}.0) Gecko/20100101 Firefox/{major}.0", ("144", "143", "142")),
+    (0.08, "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/{version} Safari/605.1.15", ("26.0", "18.6", "18.5")),
+    (0.13, "Mozilla/5.0 (iPhone; CPU iPhone OS 18_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/{version} Mobile/15E148 Safari/604.1", ("26.0", "18.6", "18.5")),
+)
+# how the share of a template is split between its versions, newest first
+_VERSION_SHARES = (0.55, 0.25, 0.12, 0.08)
+
+
+def _expand(templates) -> tuple:
+    """Turn a template table into (user agents, weights)."""
+    agents = []
+    weights = []
+    for share, template, versions in templates:
+        splits = _VERSION_SHARES[:len(versions)] + (_VERSION_SHARES[-1],) * (len(versions) - len(_VERSION_SHARES))
+        total = sum(splits)
+        for version, split in zip(versions, splits):
+            agents.append(template.format(version=version, major=version.split(".")[0]))
+            weights.append(share * split / total)
+    return agents, weights
+
+
+def _alias_tables(weights: list) -> tuple:
+    """Vose's alias method, each slot keeps its own item with probability prob[i] and hands over to alias[i] otherwise."""
+    size = len(weights)
+    total = sum(weights)
+    scaled = [weight * size / total for weight in weights]
+    prob = [1.0] * size
+    alias = list(range(size))
+    small = [index for index, value in enumerate(scaled) if value < 1.0]
+    large = [index for index, value in enumerate(scaled) if value >= 1.0]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        prob[less] = scaled[less]
+        alias[less] = more
+        scaled[more] -= 1.0 - scaled[less]
+        (small if scaled[more] < 1.0 else large).append(more)
+    # whatever is left is 1 up to rounding errors
+    return prob, alias
+
+
+class UserAgentPool:
+    """Realistic user agents picked by market share in constant time.
+    The template table is expanded once into concrete user agents and alias tables, after that a pick
+    is one random index and one comparison, whatever the size of the pool.
+    Parameters:
+        templates (iterable, optional): (share, template, versions) rows, see DEFAULT_TEMPLATES. Defaults to DEFAULT_TEMPLATES.
+        agents (dict, optional): Explicit {user agent: weight} mapping, used instead of templates.
+    Raises:
+        ValueError: If the pool is empty."""
+    __slots__ = ("agents", "weights", "_prob", "_alias", "_random")
+
+    def __init__(self, templates=DEFAULT_TEMPLATES, agents: dict = None) -> None:
+        if agents is not None:
+            self.agents, self.weights = list(agents), list(agents.values())
+        else:
+            self.agents, self.weights = _expand(templates)
+        if not self.agents or sum(self.weights) <= 0:
+            raise ValueError("A user agent pool needs at least one user agent with a positive weight")
+        self._prob, self._alias = _alias_tables(self.weights)
+        self._random = random.Random()
+
+    def _pick(self, point: float) -> str:
+        """Map a uniform number in [0, 1) to a user agent, the integer part picks the slot and the rest decides."""
+        point *= len(self._prob)
+        # rounding can push the product up to the size itself
+        index = min(int(point), len(self._prob) - 1)
+        return self.agents[index if point - index < self._prob[index] else self._alias[index]]
+
+    def sample(self, n: int = None):
+        """Pick user agents at random by weight.
+        Parameters:
+            n (int, optional): Number of user agents to pick. Defaults to a single one.
+        Returns:
+            str: A user agent, a list of n user agents if n is given."""
+        if n is None:
+            return self._pick(self._random.random())
+        pick = self._pick
+        rand = self._random.random
+        return [pick(rand()) for _ in range(n)]
+
+    def for_session(self, key) -> str:
+        """Pick the user agent of a session, the same key always gets the same user agent, across
+        processes too, and keys are spread by weight like sample.
+        Parameters:
+            key (str, bytes or int): Session, account or connection identifier.
+        Returns:
+            str: The user agent of the session."""
+        if not isinstance(key, bytes):
+            key = str(key).encode("utf-8", "surrogatepass")
+        digest = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+        # 53 bits, as many as a float holds, so the point stays below 1
+        return self._pick((digest >> 11) / 2 ** 53)
+
+    def __len__(self) -> int:
+        return len(self.agents)
+
+
+_default_pool = None
+
+
+def get_useragent_pool() -> UserAgentPool:
+    """Get the UserAgentPool used by gen_random_useragent, built from DEFAULT_TEMPLATES on first use."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = UserAgentPool()
+    return _default_pool
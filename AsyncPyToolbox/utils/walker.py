@@ -0,0 +1,188 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+from . import *
+import os
+import re
+import asyncio
+import fnmatch
+import threading
+
+_SYMLINK_POLICIES = ("skip", "files", "follow")
+# entries handed from a worker thread to the event loop at once by stream_files
+_BATCH_SIZE = 512
+
+
+def _compile_patterns(patterns) -> re.Pattern:
+    if not patterns:
+        return None
+    if isinstance(patterns, str):
+        patterns = (patterns,)
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns))
+
+
+def _normalize_extensions(ext) -> frozenset:
+    if not ext:
+        return None
+    if isinstance(ext, str):
+        ext = (ext,)
+    return frozenset(("." + e.lstrip(".")).lower() for e in ext)
+
+
+class _Walk:
+    """Filters of one walk and the scan of a single directory, shared by iter_files and stream_files."""
+    def __init__(self, ext=None, glob=None, exclude=None, min_size=None, max_size=None, modified_after=None,
+                 modified_before=None, max_depth=None, symlinks="files", onerror=None) -> None:
+        if symlinks not in _SYMLINK_POLICIES:
+            raise ValueError(f"Unknown symlink policy {symlinks!r}, expected one of {', '.join(_SYMLINK_POLICIES)}")
+        self.extensions = _normalize_extensions(ext)
+        self.glob = _compile_patterns(glob)
+        self.exclude = _compile_patterns(exclude)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.modified_after = modified_after
+        self.modified_before = modified_before
+        self.needs_stat = any(value is not None for value in (min_size, max_size, modified_after, modified_before))
+        self.max_depth = max_depth
+        self.symlinks = symlinks
+        self.onerror = onerror
+        self._visited = set()
+        self._visited_lock = threading.Lock()
+
+    def _first_visit(self, path: str) -> bool:
+        """Guard against symlink loops and directories reached twice, only used when symlinked directories
+        are followed. Every directory entered is recorded, not only symlinked ones, so a symlink to a
+        directory the walk already passed through, or will pass through, is entered once."""
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            return False
+        key = (stat_result.st_dev, stat_result.st_ino)
+        with self._visited_lock:
+            if key in self._visited:
+                return False
+            self._visited.add(key)
+        return True
+
+    def _matches(self, entry: os.DirEntry) -> bool:
+        if self.extensions is not None and os.path.splitext(entry.name)[1].lower() not in self.extensions:
+            return False
+        if self.glob is not None and not self.glob.match(entry.name):
+            return False
+        if self.needs_stat:
+            stat_result = entry.stat(follow_symlinks=True)
+            if self.min_size is not None and stat_result.st_size < self.min_size:
+                return False
+            if self.max_size is not None and stat_result.st_size > self.max_size:
+                return False
+            if self.modified_after is not None and stat_result.st_mtime < self.modified_after:
+                return False
+            if self.modified_before is not None and stat_result.st_mtime > self.modified_before:
+                return False
+        return True
+
+    def scan(self, path: str, depth: int, subdirs: list):
+        """Yield the matching files of one directory and append its subdirectories to subdirs as (path, depth)."""
+        descend = self.max_depth is None or depth < self.max_depth
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if self.exclude is not None and self.exclude.match(entry.name):
+                        continue
+                    try:
+                        is_symlink = entry.is_symlink()
+                        if is_symlink and self.symlinks == "skip":
+                            continue
+                        if entry.is_dir(follow_symlinks=self.symlinks == "follow"):
+                            if descend and (self.symlinks != "follow" or self._first_visit(entry.path)):
+                                subdirs.append((entry.path, depth + 1))
+                        elif entry.is_file() and self._matches(entry):
+                            yield entry
+                    except OSError as exc:
+                        # vanished or unreadable entry, the rest of the directory is still walked
+                        if self.onerror is not None:
+                            self.onerror(exc)
+        except OSError as exc:
+            if self.onerror is not None:
+                self.onerror(exc)
+
+    def start(self, root: str) -> list:
+        if self.symlinks == "follow":
+            self._first_visit(root)
+        return [(os.fspath(root), 0)]
+
+
+def iter_files(root: str, ext=None, glob=None, exclude=None, min_size: int = None, max_size: int = None,
+               modified_after: float = None, modified_before: float = None, max_depth: int = None,
+               symlinks: str = "files", onerror=None):
+    """Walk a directory tree lazily, one directory open at a time, without recursion.
+    Memory use does not depend on the number of files, only directories still to visit are kept.
+    Parameters:
+        root (str): Directory to walk.
+        ext (str or list, optional): Extensions to keep, with or without the dot, case insensitive.
+        glob (str or list, optional): fnmatch patterns the file name must match.
+        exclude (str or list, optional): fnmatch patterns of file and directory names to skip, excluded directories are not entered.
+        min_size (int, optional): Minimum size in bytes.
+        max_size (int, optional): Maximum size in bytes.
+        modified_after (float, optional): Only files modified at or after this timestamp.
+        modified_before (float, optional): Only files modified at or before this timestamp.
+        max_depth (int, optional): How many directory levels below root to enter, 0 only lists root. Defaults to unlimited.
+        symlinks (str, optional): "skip" ignores symlinks, "files" keeps symlinked files but doesn't enter symlinked directories,
+            "follow" enters them too (each directory once, so loops end). Defaults to "files".
+        onerror (function, optional): Called with the OSError of every directory or entry that can't be read, they are skipped silently otherwise.
+    Yields:
+        os.DirEntry: Every matching file.
+    Raises:
+        ValueError: If the symlink policy is unknown."""
+    walk = _Walk(ext, glob, exclude, min_size, max_size, modified_after, modified_before, max_depth, symlinks, onerror)
+    stack = walk.start(root)
+    while stack:
+        path, depth = stack.pop()
+        yield from walk.scan(path, depth, stack)
+
+
+def _next_batch(iterator, size: int) -> list:
+    batch = []
+    for entry in iterator:
+        batch.append(entry)
+        if len(batch) >= size:
+            break
+    return batch
+
+
+async def stream_files(root: str, concurrency: int = 8, **kwargs):
+    """Async iter_files, up to concurrency directories are scanned in parallel in the "io" pool.
+    Directories are handed out one at a time from a shared stack, so deep and wide subtrees are
+    balanced across workers. Files of one directory are yielded in order, directories in no particular order.
+    Parameters:
+        root (str): Directory to walk.
+        concurrency (int, optional): Number of directories scanned at once. Defaults to 8.
+        **kwargs: Filters, see iter_files.
+    Yields:
+        os.DirEntry: Every matching file."""
+    walk = _Walk(**kwargs)
+    pool = get_pool("io")
+    stack = walk.start(root)
+    running = {}
+    try:
+        while stack or running:
+            while stack and len(running) < concurrency:
+                scan = walk.scan(*stack.pop(), stack)
+                running[asyncio.ensure_future(pool.run(_next_batch, scan, _BATCH_SIZE))] = scan
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                scan = running.pop(task)
+                batch = task.result()
+                if len(batch) >= _BATCH_SIZE:
+                    # the directory may have more, continue it where it stopped
+                    running[asyncio.ensure_future(pool.run(_next_batch, scan, _BATCH_SIZE))] = scan
+                for entry in batch:
+                    yield entry
+    finally:
+        for task in running:
+            task.cancel()
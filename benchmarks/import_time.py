@@ -0,0 +1,81 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+"""Measure how long importing the package and its modules takes, each in a fresh interpreter.
+Exits with an error if importing the package loads optional dependencies, creates an executor or
+takes longer than the budget, so it can guard against startup regressions in CI.
+Run from the repository root: python benchmarks/import_time.py [--budget-ms 30]"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = (
+    "AsyncPyToolbox",
+    "AsyncPyToolbox.utils.executors",
+    "AsyncPyToolbox.utils.string",
+    "AsyncPyToolbox.utils.markup",
+    "AsyncPyToolbox.utils.file",
+    "AsyncPyToolbox.utils.system",
+    "AsyncPyToolbox.utils.dedupe",
+    "AsyncPyToolbox.utils.dirindex",
+    "AsyncPyToolbox.utils.monitor",
+)
+# never loaded by a bare import of the package
+HEAVY_MODULES = ("PIL", "psutil", "bs4", "markdown", "xxhash", "multiprocessing", "asyncio", "concurrent.futures")
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+executors = sys.modules.get("AsyncPyToolbox.utils.executors")
+pools = [name for name, pool in executors._pools.items() if pool.started] if executors else []
+print(elapsed, ",".join(name for name in {heavy!r} if name in sys.modules), ",".join(pools))
+"""
+
+
+def measure(module: str, repeat: int) -> tuple:
+    """Best import time of module over repeat fresh interpreters, with the heavy modules and started pools seen."""
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.split(" ")
+        elapsed = float(output[0])
+        best = elapsed if best is None else min(best, elapsed)
+    return best, output[1].split(",") if output[1] else [], output[2].strip().split(",") if output[2].strip() else []
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=30.0, help="maximum import time of the package itself")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module, the best time is kept")
+    args = parser.parse_args()
+    failures = []
+    print(f"{'module':<36}{'import ms':>12}  loaded")
+    for module in MODULES:
+        elapsed, heavy, pools = measure(module, args.repeat)
+        print(f"{module:<36}{elapsed * 1e3:>12.2f}  {', '.join(heavy) or '-'}")
+        if pools:
+            failures.append(f"importing {module} started the {', '.join(pools)} pool")
+        if module == "AsyncPyToolbox":
+            if heavy:
+                failures.append(f"importing the package loaded {', '.join(heavy)}")
+            if elapsed * 1e3 > args.budget_ms:
+                failures.append(f"importing the package took {elapsed * 1e3:.1f}ms, over the {args.budget_ms}ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
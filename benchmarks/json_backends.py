@@ -0,0 +1,65 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+"""Compare the installed JSON backends on representative documents.
+Run from the repository root: python benchmarks/json_backends.py"""
+
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AsyncPyToolbox.utils.json_backends import BACKENDS, available_json_backends
+
+
+def make_documents() -> dict:
+    rnd = random.Random(0)
+    words = ["alpha", "beta", "gamma", "delta", "ünïcode", "https://example.com/a?b=c"]
+    # small bot state written on every change
+    state = {str(rnd.randrange(10**9)): {"lang": rnd.choice(["en", "de"]), "warns": rnd.randrange(5), "admin": rnd.random() < 0.1} for _ in range(50)}
+    # many flat records, like a message log
+    records = [
+        {"id": i, "chat": rnd.randrange(-10**12, 10**12), "text": " ".join(rnd.choices(words, k=8)), "ts": rnd.random() * 1e9, "tags": rnd.sample(words, 3)}
+        for i in range(20000)
+    ]
+    # deep nesting
+    nested = {"level": 0}
+    node = nested
+    for depth in range(1, 200):
+        node["child"] = {"level": depth, "values": list(range(10))}
+        node = node["child"]
+    return {"state": state, "records": records, "nested": nested}
+
+
+def bench(backend, document, indent, number: int) -> tuple:
+    encoded = backend.dumps(document, indent)
+    dumps = min(timeit.repeat(lambda: backend.dumps(document, indent), number=number, repeat=3)) / number
+    loads = min(timeit.repeat(lambda: backend.loads(encoded), number=number, repeat=3)) / number
+    return dumps, loads, len(encoded)
+
+
+def main() -> None:
+    documents = make_documents()
+    reference = BACKENDS["json"]()
+    print(f"{'document':<10}{'indent':>8}{'backend':>10}{'dumps ms':>12}{'loads ms':>12}{'bytes':>10}{'speedup':>10}")
+    for name, document in documents.items():
+        number = 5 if name == "records" else 200
+        for indent in (None, 4):
+            base = None
+            for backend_name in reversed(available_json_backends()):
+                backend = BACKENDS[backend_name]()
+                assert backend.loads(backend.dumps(document, indent)) == reference.loads(reference.dumps(document, indent))
+                dumps, loads, size = bench(backend, document, indent, number)
+                base = base or dumps + loads
+                print(f"{name:<10}{str(indent):>8}{backend_name:>10}{dumps * 1e3:>12.3f}{loads * 1e3:>12.3f}{size:>10}{base / (dumps + loads):>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
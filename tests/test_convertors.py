@@ -0,0 +1,133 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import io
+import json
+import time
+import asyncio
+import pytest
+from AsyncPyToolbox.utils import convertors
+from AsyncPyToolbox.utils.convertors import (
+    _JsonReader, iter_json, iter_json_lines, stream_json, stream_json_lines, write_json_stream, append_json_lines,
+)
+
+DOCUMENT = [1, -2.5e-3, "tr\\u00e9s \"quoted\"", None, True, False, {"nested": [1, {"a": "b"}]}, [], {}, 12345678901234567890, "x" * 100]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 65536])
+def test_iter_json_array_and_object(tmp_path, chunk_size):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(DOCUMENT, indent=2))
+    assert list(iter_json(str(path), chunk_size)) == DOCUMENT
+    mapping = {f"key{i}": value for i, value in enumerate(DOCUMENT)}
+    path.write_text(json.dumps(mapping))
+    assert dict(iter_json(str(path), chunk_size)) == mapping
+
+
+def test_iter_json_empty_and_scalar(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(" [ ] ")
+    assert list(iter_json(str(path))) == []
+    path.write_text("42")
+    with pytest.raises(ValueError):
+        list(iter_json(str(path)))
+
+
+@pytest.mark.parametrize("text", ['[1, 2 3]', '[{"a": 1 x}]', '[1, tru, 2]', '{"a" 1}', '[1, 2'])
+def test_iter_json_malformed(tmp_path, text):
+    path = tmp_path / "data.json"
+    path.write_text(text)
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json(str(path), 4))
+
+
+def test_malformed_value_is_raised_without_reading_the_rest():
+    text = '{"a": 1 x} ' + " " * 100 + "0" * 1_000_000
+    file = io.StringIO(text)
+    reader = _JsonReader(file, 64)
+    with pytest.raises(json.JSONDecodeError):
+        reader.decode()
+    assert file.tell() < 1024
+
+
+def test_values_cut_by_the_buffer_are_completed():
+    for text in ('"a long string with \\u00e9scapes"', "-Infinity", "12.5e3", "[true, false, null]"):
+        reader = _JsonReader(io.StringIO(text), 2)
+        assert reader.decode() == json.loads(text)
+
+
+def test_stream_json_and_lines(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(DOCUMENT))
+    lines = tmp_path / "data.jsonl"
+    asyncio.run(append_json_lines(str(lines), DOCUMENT[:4]))
+    asyncio.run(append_json_lines(str(lines), DOCUMENT[4:]))
+
+    async def collect():
+        return [item async for item in stream_json(str(path), batch_size=3)], [item async for item in stream_json_lines(str(lines), batch_size=3)]
+    streamed, streamed_lines = asyncio.run(collect())
+    assert streamed == DOCUMENT and streamed_lines == DOCUMENT == list(iter_json_lines(str(lines)))
+
+
+def test_cancelled_stream_closes_the_iterator_after_its_batch():
+    closed = []
+
+    def slow_items():
+        try:
+            while True:
+                time.sleep(0.05)
+                yield 1
+        finally:
+            closed.append(True)
+
+    async def run():
+        async def consume():
+            async for _ in convertors._stream_from(slow_items(), 4):
+                pass
+        task = asyncio.ensure_future(consume())
+        # cancel while a batch is being read in the worker
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert closed == [True]
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_write_json_stream(tmp_path, indent):
+    path = tmp_path / "out.json"
+
+    async def items():
+        for item in DOCUMENT:
+            yield item
+
+    assert asyncio.run(write_json_stream(str(path), items(), indent=indent, batch_size=4)) == len(DOCUMENT)
+    assert json.loads(path.read_text()) == DOCUMENT
+    pairs = [(f"key{i}", value) for i, value in enumerate(DOCUMENT)]
+    asyncio.run(write_json_stream(str(path), pairs, indent=indent, pairs=True))
+    assert json.loads(path.read_text()) == dict(pairs)
+    asyncio.run(write_json_stream(str(path), [], indent=indent))
+    assert json.loads(path.read_text()) == []
+    asyncio.run(write_json_stream(str(path), DOCUMENT, lines=True))
+    assert list(iter_json_lines(str(path))) == DOCUMENT
+
+
+def test_write_json_stream_error_closes_a_valid_prefix(tmp_path):
+    path = tmp_path / "out.json"
+
+    def items():
+        yield 1
+        yield 2
+        raise RuntimeError("source failed")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(write_json_stream(str(path), items(), batch_size=1))
+    # what was written is still closed as a complete document
+    assert json.loads(path.read_text()) == [1, 2]
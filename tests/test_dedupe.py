@@ -0,0 +1,57 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import os
+import asyncio
+import pytest
+from AsyncPyToolbox.utils import dedupe
+from AsyncPyToolbox.utils.dedupe import find_duplicates, hash_file, partial_hash
+
+
+def _groups(root, **kwargs) -> list:
+    async def collect():
+        return [group async for group in find_duplicates(root, **kwargs)]
+    return asyncio.run(collect())
+
+
+def test_duplicates_small_and_large(tmp_path, monkeypatch):
+    monkeypatch.setattr(dedupe, "PARTIAL_SIZE", 4)
+    (tmp_path / "a.txt").write_bytes(b"same")
+    (tmp_path / "b.txt").write_bytes(b"same")
+    (tmp_path / "c.txt").write_bytes(b"diff")
+    # same head and tail, only the full hash tells them apart
+    (tmp_path / "big1").write_bytes(b"head" + b"x" * 100 + b"tail")
+    (tmp_path / "big2").write_bytes(b"head" + b"x" * 100 + b"tail")
+    (tmp_path / "big3").write_bytes(b"head" + b"y" * 100 + b"tail")
+    groups = _groups(tmp_path)
+    assert [[os.path.basename(path) for path in group.paths] for group in groups] == [["a.txt", "b.txt"], ["big1", "big2"]]
+    assert groups[1].wasted == 108
+
+
+def test_empty_files_only_without_min_size(tmp_path):
+    (tmp_path / "a").write_bytes(b"")
+    (tmp_path / "b").write_bytes(b"")
+    assert _groups(tmp_path) == []
+    assert len(_groups(tmp_path, min_size=None)[0].paths) == 2
+
+
+@pytest.mark.skipif(not hasattr(os, "link"), reason="needs hard links")
+def test_hard_links_count_once(tmp_path):
+    (tmp_path / "a").write_bytes(b"content")
+    os.link(tmp_path / "a", tmp_path / "link")
+    assert _groups(tmp_path, min_size=None) == []
+    (tmp_path / "copy").write_bytes(b"content")
+    groups = _groups(tmp_path)
+    assert len(groups) == 1 and len(groups[0].paths) == 2
+
+
+def test_hash_helpers(tmp_path):
+    path = tmp_path / "file"
+    path.write_bytes(b"data")
+    assert partial_hash(str(path)) == partial_hash(str(path), 4)
+    assert asyncio.run(hash_file(str(path))) == partial_hash(str(path)).hex()
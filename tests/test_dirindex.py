@@ -0,0 +1,140 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import os
+import shutil
+import asyncio
+import threading
+import pytest
+from AsyncPyToolbox.utils import dirindex
+from AsyncPyToolbox.utils.dirindex import DirIndex, _subtree
+from AsyncPyToolbox.utils.sniffer import clear_sniff_cache
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(16)
+PDF = b"%PDF-1.7\n"
+
+
+@pytest.fixture
+def tree(tmp_path):
+    clear_sniff_cache()
+    root = tmp_path / "tree"
+    for name, data in {"a.png": PNG, "docs/b.pdf": PDF, "docs/old/c.pdf": PDF}.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    yield root
+    clear_sniff_cache()
+
+
+@pytest.fixture
+def index(tmp_path):
+    with DirIndex(str(tmp_path / "index.db")) as index:
+        yield index
+
+
+def _names(infos, root):
+    return sorted(os.path.relpath(getattr(info, "path", info), root).replace(os.sep, "/") for info in infos)
+
+
+def test_first_scan_adds_every_file(tree, index):
+    result = asyncio.run(index.scan(str(tree)))
+    assert _names(result.added, tree) == ["a.png", "docs/b.pdf", "docs/old/c.pdf"]
+    assert (result.changed, result.removed, result.dirs_scanned, result.dirs_skipped) == ([], [], 3, 0)
+
+
+def test_rescan_only_lists_changed_directories(tree, index):
+    index.scan_sync(str(tree))
+    result = index.scan_sync(str(tree))
+    assert not result and (result.dirs_scanned, result.dirs_skipped) == (0, 3)
+
+    (tree / "docs" / "new.png").write_bytes(PNG)
+    (tree / "a.png").unlink()
+    shutil.rmtree(tree / "docs" / "old")
+    result = index.scan_sync(str(tree))
+    assert _names(result.added, tree) == ["docs/new.png"]
+    assert _names(result.removed, tree) == ["a.png", "docs/old/c.pdf"]
+    assert index.get(str(tree / "docs" / "old" / "c.pdf")) is None
+    assert _names(index.files(str(tree)), tree) == ["docs/b.pdf", "docs/new.png"]
+
+
+def test_verify_catches_in_place_rewrites(tree, index):
+    index.scan_sync(str(tree))
+    path = tree / "docs" / "b.pdf"
+    dir_stat = os.stat(tree / "docs")
+    path.write_bytes(PNG)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000_000))
+    # a rewrite in place leaves the directory mtime alone
+    os.utime(tree / "docs", ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+    assert not index.scan_sync(str(tree))
+    result = index.scan_sync(str(tree), verify=True)
+    assert _names(result.changed, tree) == ["docs/b.pdf"]
+    assert index.get(str(path)).kind == "photo"
+
+
+def test_removed_root_is_forgotten(tree, index):
+    index.scan_sync(str(tree))
+    shutil.rmtree(tree)
+    result = index.scan_sync(str(tree))
+    assert _names(result.removed, tree) == ["a.png", "docs/b.pdf", "docs/old/c.pdf"]
+    assert index.files(str(tree)) == []
+
+
+def test_get_and_files(tree, index):
+    index.scan_sync(str(tree))
+    info = index.get(str(tree / "a.png"))
+    assert (info.kind, info.mime_type, info.extension, info.sniffed, info.size) == ("photo", "image/png", "png", True, len(PNG))
+    assert index.get(str(tree / "missing.png")) is None
+    assert _names(index.files(str(tree), kind="document"), tree) == ["docs/b.pdf", "docs/old/c.pdf"]
+    assert _names(index.files(str(tree / "docs")), tree) == ["docs/b.pdf", "docs/old/c.pdf"]
+    # a sibling sharing the prefix is not part of the tree
+    assert index.files(str(tree / "doc")) == []
+    assert len(index.files(os.sep)) == 3
+
+
+def test_index_persists_between_instances(tree, tmp_path):
+    with DirIndex(str(tmp_path / "persist.db")) as index:
+        index.scan_sync(str(tree))
+    with DirIndex(str(tmp_path / "persist.db")) as index:
+        assert not index.scan_sync(str(tree))
+        assert len(index.files(str(tree))) == 3
+
+
+def test_subtree_of_the_filesystem_root_covers_top_level_directories():
+    low, high = _subtree(os.sep)
+    assert low == os.sep
+    for path in (os.sep + ".cache", os.sep + "home" + os.sep + "user", os.sep + "~"):
+        assert low <= path < high
+    low, high = _subtree(os.sep + "home")
+    assert low <= os.sep + "home" + os.sep + ".x" < high
+    assert not low <= os.sep + "homer" < high
+
+
+def test_readers_do_not_wait_for_a_whole_scan(tree, index, monkeypatch):
+    index.scan_sync(str(tree / "docs"))
+    entered, release = threading.Event(), threading.Event()
+    real_sniff = dirindex.sniff
+
+    def slow_sniff(path, stat_result=None):
+        entered.set()
+        release.wait(10)
+        return real_sniff(path, stat_result)
+
+    monkeypatch.setattr(dirindex, "sniff", slow_sniff)
+    scan = threading.Thread(target=index.scan_sync, args=(str(tree),))
+    scan.start()
+    try:
+        assert entered.wait(10)
+        answers = []
+        reader = threading.Thread(target=lambda: answers.append((index.get(str(tree / "docs" / "b.pdf")), index.files(str(tree)))))
+        reader.start()
+        reader.join(2)
+        assert answers and answers[0][0].kind == "document"
+    finally:
+        release.set()
+        scan.join(10)
+    assert len(index.files(str(tree))) == 3
@@ -0,0 +1,103 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+import threading
+import pytest
+from AsyncPyToolbox.utils import evaluator
+from AsyncPyToolbox.errors import SafeMode
+from AsyncPyToolbox.utils.evaluator import EvalPool, compile_code
+
+
+def test_eval_pool_evaluates_and_replaces_workers(monkeypatch):
+    kill_threads = []
+    real_kill = evaluator._Worker.kill
+
+    def kill(worker):
+        kill_threads.append(threading.current_thread())
+        real_kill(worker)
+
+    monkeypatch.setattr(evaluator._Worker, "kill", kill)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        async with EvalPool(workers=1, timeout=1) as pool:
+            task = asyncio.ensure_future(ticker())
+            results = [
+                await pool.evaluate("import time\ntime.sleep(0.3)\nprint('done')\nx = 3"),
+                await pool.evaluate("while True: pass"),
+                await pool.evaluate("import os\nos._exit(3)"),
+                await pool.evaluate("import asyncio\nawait asyncio.sleep(0)\ny = 5"),
+            ]
+            task.cancel()
+        return results, ticks
+
+    (first, timed_out, died, awaited), ticks = asyncio.run(run())
+    assert first[:3] == (None, "done\n", "") and first[3]["x"] == 3
+    assert timed_out[0].startswith("TimeoutError")
+    assert died[0].startswith("RuntimeError: evaluation worker died")
+    assert awaited[0] is None and awaited[3]["y"] == 5
+    # the loop kept running while the workers evaluated, and killed workers were joined off it
+    assert ticks > 50
+    assert kill_threads and threading.main_thread() not in kill_threads
+
+
+@pytest.mark.parametrize("code", [
+    "open('x')",
+    "import os",
+    "from subprocess import run",
+    "import io\nio.open('x')",
+    "import builtins\nbuiltins.open('x')",
+    "getattr(__builtins__, 'op' + 'en')('x')",
+    "__import__('o' + 's').system('id')",
+    "eval('op' + 'en')('x')",
+    "exec('import os')",
+    "from pathlib import Path\nPath('x').read_text()",
+    "import importlib\nimportlib.import_module('o' + 's')",
+    "f = print.__self__.open",
+    "globals()['__builtins__']['open']('x')",
+    "vars()['__builtins__']",
+    "locals()",
+    "dir(print)",
+    "().__class__.__base__.__subclasses__()",
+    "type(()).mro()",
+    "object.mro()",
+    "print.__self__",
+    "f = lambda: 0\nf.__globals__",
+    "__loader__.load_module('o' + 's')",
+    "import math\nmath.__dict__",
+    "ns = {'key': 'open'}",
+    "match 1:\n    case int(__class__=cls): pass",
+])
+def test_safe_mode_rejects(code):
+    with pytest.raises(SafeMode):
+        compile_code(code, safe_mode=True)
+    # the cached verdict only applies in safe mode
+    compile_code(code)
+
+
+@pytest.mark.parametrize("code", [
+    "if __name__ == '__main__':\n    result = 1",
+    "text = 'opening hours'",
+    "class Point:\n    def __init__(self, x):\n        self.x = x",
+])
+def test_safe_mode_allows(code):
+    compile_code(code, safe_mode=True)
+
+
+def test_safe_mode_allows_plain_code():
+    namespace = {}
+    exec(compile_code("import math\nresult = sorted([math.floor(2.5), len('abc')])", safe_mode=True), namespace)
+    assert namespace["result"] == [2, 3]
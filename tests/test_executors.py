@@ -0,0 +1,62 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import os
+import asyncio
+import threading
+import multiprocessing
+from AsyncPyToolbox.utils.executors import run_in_exc, get_pool, _CallCost, _input_size
+
+
+@run_in_exc(mode="process")
+def total(values, lock=None):
+    return sum(values)
+
+
+@run_in_exc(mode="process")
+def worker_start_method():
+    return os.getpid(), multiprocessing.get_start_method()
+
+
+def test_process_mode_runs_in_worker():
+    assert asyncio.run(total([1, 2, 3])) == 6
+    pid, start_method = asyncio.run(worker_start_method())
+    # spawned, never forked from the threaded parent
+    assert pid != os.getpid() and start_method == "spawn"
+    assert get_pool("process").executor._mp_context.get_start_method() == "spawn"
+
+
+def test_process_mode_falls_back_for_unpicklable_arguments():
+    assert asyncio.run(total([1, 2], lock=threading.Lock())) == 3
+
+
+def test_auto_mode_scales_cost_with_input_size():
+    calls = []
+
+    @run_in_exc(mode="auto", inline_below=1e-3)
+    def measure(values):
+        calls.append(threading.current_thread() is threading.main_thread())
+        return len(values)
+
+    async def main():
+        await measure([0])
+        # pretend a call costs 10us per item, cheap for one item and expensive for a million
+        measure.call_cost.average = 10e-6
+        await measure([0])
+        await measure([0] * 1_000_000)
+
+    asyncio.run(main())
+    assert calls == [False, True, False]
+
+
+def test_call_cost_is_per_unit_of_input():
+    cost = _CallCost()
+    cost.add(1.0, 100)
+    assert cost.estimate(1) == 0.01
+    assert cost.estimate(1000) == 10.0
+    assert _input_size((b"abcd", 3), {"x": [1, 2]}) == 7
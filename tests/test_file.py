@@ -0,0 +1,95 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import os
+import asyncio
+import pytest
+from AsyncPyToolbox.utils.file import AsyncFileHelpers, scandir
+from AsyncPyToolbox.utils.sniffer import clear_sniff_cache
+
+
+def _collect(paths, **kwargs):
+    async def main():
+        return [item async for item in AsyncFileHelpers.classify_many(paths, **kwargs)]
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def media(tmp_path):
+    clear_sniff_cache()
+    files = {
+        "photo.png": b"\x89PNG\r\n\x1a\n" + bytes(16),
+        "doc.pdf": b"%PDF-1.7\n",
+        "clip.mp4": b"\x00\x00\x00\x18ftypisom" + bytes(16),
+    }
+    for name, data in files.items():
+        (tmp_path / name).write_bytes(data)
+    yield {str(tmp_path / name): name for name in files}
+    clear_sniff_cache()
+
+
+@pytest.mark.parametrize("concurrency", [1, 2, 32])
+def test_classify_many_pairs_each_result_with_its_path(media, concurrency):
+    results = dict(_collect(list(media), concurrency=concurrency))
+    assert set(results) == set(media)
+    assert {path: info.kind for path, info in results.items()} == {
+        path: {"photo.png": "photo", "doc.pdf": "document", "clip.mp4": "video"}[name] for path, name in media.items()
+    }
+    assert all(info.path == path for path, info in results.items())
+
+
+def test_classify_many_takes_async_iterables(media):
+    async def paths():
+        for path in media:
+            yield path
+
+    assert {path for path, _ in _collect(paths())} == set(media)
+
+
+def test_classify_many_names_the_unreadable_path(media, tmp_path):
+    missing = str(tmp_path / "missing.bin")
+    results = dict(_collect([*media, missing], concurrency=2, return_exceptions=True))
+    assert isinstance(results.pop(missing), FileNotFoundError)
+    assert set(results) == set(media)
+
+
+def test_classify_many_raises_without_return_exceptions(media, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        _collect([str(tmp_path / "missing.bin"), *media])
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for name in ("a.JPG", "b.txt", "sub/c.jpg", "sub/deeper/d.png", "sub/deeper/e.txt"):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+    return tmp_path
+
+
+def _names(paths, root):
+    return sorted(os.path.relpath(path, root).replace(os.sep, "/") for path in paths)
+
+
+def test_scandir_lists_every_file_recursively(tree):
+    assert _names(scandir(str(tree)), tree) == ["a.JPG", "b.txt", "sub/c.jpg", "sub/deeper/d.png", "sub/deeper/e.txt"]
+
+
+@pytest.mark.parametrize("ext", [[".jpg", ".png"], ["jpg", "png"], "jpg"])
+def test_scandir_filters_by_extension(tree, ext):
+    expected = ["a.JPG", "sub/c.jpg", "sub/deeper/d.png"] if ext != "jpg" else ["a.JPG", "sub/c.jpg"]
+    assert _names(scandir(str(tree), ext=ext), tree) == expected
+
+
+def test_scandir_appends_to_the_given_list_only(tree):
+    files = ["existing"]
+    assert scandir(str(tree / "sub" / "deeper"), files=files) is files
+    assert files[0] == "existing" and len(files) == 3
+    # the default list is not shared between calls
+    assert len(scandir(str(tree / "sub" / "deeper"))) == 2
+    assert len(scandir(str(tree / "sub" / "deeper"))) == 2
@@ -0,0 +1,41 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import struct
+import pytest
+from AsyncPyToolbox.utils.image import read_image_size
+
+
+def _segment(marker: int, payload: bytes) -> bytes:
+    return struct.pack(">BBH", 0xFF, marker, len(payload) + 2) + payload
+
+
+def _sof(width: int, height: int) -> bytes:
+    return _segment(0xC0, struct.pack(">BHHB", 8, height, width, 1) + b"\x01\x11\x00")
+
+
+def test_jpeg_size_skips_segments(tmp_path):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"\xff\xd8" + _segment(0xE1, b"Exif\x00\x00" + bytes(5000)) + _sof(640, 480) + b"\xff\xd9")
+    assert read_image_size(str(path)) == (640, 480)
+
+
+def test_jpeg_end_of_image_before_frame(tmp_path):
+    path = tmp_path / "broken.jpg"
+    # a frame header after the end of image belongs to appended data, not to this image
+    path.write_bytes(b"\xff\xd8" + _segment(0xE0, b"JFIF\x00" + bytes(9)) + b"\xff\xd9" + _sof(640, 480))
+    assert read_image_size(str(path)) == (0, 0)
+
+
+def test_png_and_gif_size(tmp_path):
+    png = tmp_path / "image.png"
+    png.write_bytes(b"\x89PNG\r\n\x1a\n" + struct.pack(">I4sII", 13, b"IHDR", 300, 200) + bytes(9))
+    gif = tmp_path / "image.gif"
+    gif.write_bytes(b"GIF89a" + struct.pack("<HH", 32, 16) + bytes(16))
+    assert read_image_size(str(png)) == (300, 200)
+    assert read_image_size(str(gif)) == (32, 16)
@@ -0,0 +1,221 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import os
+import sys
+import shlex
+import asyncio
+import pytest
+from AsyncPyToolbox.utils import jobs
+from AsyncPyToolbox.utils.jobs import CommandRunner
+
+
+def _python(code: str) -> str:
+    return f"{shlex.quote(sys.executable)} -c {shlex.quote(code)}"
+
+
+class FakeTerminal:
+    """Stands in for exec_terminal, commands named "block..." wait until released."""
+    def __init__(self) -> None:
+        self.started = []
+        self.cancelled = []
+        self.release = None
+
+    async def __call__(self, command, timeout=None, max_bytes=None):
+        self.started.append(command)
+        if command.startswith("block"):
+            self.release = self.release or asyncio.Event()
+            try:
+                await self.release.wait()
+            except asyncio.CancelledError:
+                self.cancelled.append(command)
+                raise
+        return True, f"{command} {timeout} {max_bytes}", 0
+
+
+@pytest.fixture
+def terminal(monkeypatch):
+    terminal = FakeTerminal()
+    monkeypatch.setattr(jobs, "exec_terminal", terminal)
+    return terminal
+
+
+async def _until(predicate):
+    for _ in range(1000):
+        if predicate():
+            return
+        await asyncio.sleep(0)
+    raise AssertionError("condition never became true")
+
+
+def test_lower_priority_runs_first_and_ties_keep_submission_order(terminal):
+    async def main():
+        runner = CommandRunner(concurrency=1)
+        runner.submit("block")
+        await _until(lambda: terminal.started)
+        for command, priority in (("c", 5), ("a", 1), ("b", 1), ("first", -1)):
+            runner.submit(command, priority=priority)
+        terminal.release.set()
+        await runner.close()
+
+    asyncio.run(main())
+    assert terminal.started == ["block", "first", "a", "b", "c"]
+
+
+def test_concurrency_bounds_running_commands(terminal):
+    async def main():
+        runner = CommandRunner(concurrency=2)
+        submitted = [runner.submit(f"block {i}") for i in range(5)]
+        await _until(lambda: len(terminal.started) == 2)
+        await asyncio.sleep(0.01)
+        stats = runner.stats()
+        terminal.release.set()
+        results = await asyncio.gather(*submitted)
+        await runner.close()
+        return stats, results
+
+    stats, results = asyncio.run(main())
+    assert (stats["running"], stats["queued"]) == (2, 3)
+    assert [output for _, output, _ in results] == [f"block {i} None None" for i in range(5)]
+
+
+def test_identical_commands_share_one_job(terminal):
+    async def main():
+        runner = CommandRunner(timeout=30)
+        first = runner.submit("block")
+        second = runner.submit("block", priority=-5)
+        other_timeout = runner.submit("block", timeout=5)
+        await _until(lambda: len(terminal.started) == 2)
+        terminal.release.set()
+        results = await asyncio.gather(first, second, other_timeout)
+        # finished jobs are not reused
+        again = runner.submit("block")
+        await again
+        stats = runner.stats()
+        await runner.close()
+        return first, second, other_timeout, again, results, stats
+
+    first, second, other_timeout, again, results, stats = asyncio.run(main())
+    assert first is second and first.holders == 2
+    assert other_timeout is not first and again is not first
+    assert results[0] == results[1] == (True, "block 30 None", 0)
+    assert terminal.started == ["block", "block", "block"]
+    assert (stats["deduplicated"], stats["completed"]) == (1, 3)
+
+
+def test_dedupe_can_be_turned_off(terminal):
+    async def main():
+        async with CommandRunner(dedupe=False) as runner:
+            return runner.submit("echo"), runner.submit("echo")
+
+    first, second = asyncio.run(main())
+    assert first is not second
+    assert terminal.started == ["echo", "echo"]
+
+
+def test_cancelling_a_queued_job_never_starts_it(terminal):
+    async def main():
+        runner = CommandRunner(concurrency=1)
+        blocker = runner.submit("block")
+        queued = runner.submit("never")
+        await _until(lambda: terminal.started)
+        assert queued.cancel() and not queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        terminal.release.set()
+        await blocker
+        await runner.close()
+        return queued, runner.stats()
+
+    queued, stats = asyncio.run(main())
+    assert queued.state == "cancelled" and queued.started is None and queued.run_time is None
+    assert terminal.started == ["block"]
+    assert (stats["cancelled"], stats["completed"], stats["queued"], stats["running"]) == (1, 1, 0, 0)
+
+
+def test_cancelling_a_running_job_cancels_its_command(terminal):
+    async def main():
+        runner = CommandRunner()
+        job = runner.submit("block")
+        await _until(lambda: terminal.started)
+        assert job.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await job
+        await runner.join()
+        await runner.close()
+        return job, runner.stats()
+
+    job, stats = asyncio.run(main())
+    assert job.state == "cancelled" and job.done()
+    assert terminal.cancelled == ["block"]
+    assert stats["cancelled"] == 1
+
+
+def test_close_with_cancel_drops_queued_jobs(terminal):
+    async def main():
+        runner = CommandRunner(concurrency=1)
+        submitted = [runner.submit(f"block {i}") for i in range(3)]
+        await _until(lambda: terminal.started)
+        await runner.close(cancel=True)
+        return submitted
+
+    submitted = asyncio.run(main())
+    assert [job.state for job in submitted] == ["cancelled"] * 3
+    assert terminal.started == ["block 0"]
+
+
+def test_wait_and_run_times_are_measured(terminal):
+    async def main():
+        runner = CommandRunner(concurrency=1)
+        first = runner.submit("block")
+        second = runner.submit("quick")
+        await _until(lambda: terminal.started)
+        await asyncio.sleep(0.05)
+        terminal.release.set()
+        await asyncio.gather(first, second)
+        await runner.close()
+        return first, second, runner.stats()
+
+    first, second, stats = asyncio.run(main())
+    assert first.run_time >= 0.05 and second.wait_time >= 0.05
+    assert stats["run_max"] == pytest.approx(first.run_time)
+    assert stats["wait_max"] == pytest.approx(second.wait_time)
+    assert stats["wait_avg"] == pytest.approx((first.wait_time + second.wait_time) / 2)
+    assert stats["run_avg"] == pytest.approx((first.run_time + second.run_time) / 2)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="signal return codes are POSIX only")
+def test_timeouts_and_return_codes_of_real_commands():
+    async def main():
+        async with CommandRunner(timeout=0.5) as runner:
+            return await asyncio.gather(
+                runner.run(_python("import time; time.sleep(30)")),
+                runner.run(_python("import sys; print('bye'); sys.exit(7)")),
+                runner.run(_python("import time; time.sleep(0.8); print('late')"), timeout=10),
+            )
+
+    slept, exited, overridden = asyncio.run(main())
+    assert slept[0] is False and slept[2] == -9 and slept[1].endswith("[killed after 0.5s]")
+    assert exited == (True, "bye", 7)
+    assert overridden == (True, "late", 0)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="signal return codes are POSIX only")
+def test_cancelling_a_real_command_kills_it():
+    async def main():
+        runner = CommandRunner()
+        job = runner.submit(_python("import time; time.sleep(30)"))
+        await _until(lambda: job.state == "running")
+        await asyncio.sleep(0.2)
+        job.cancel()
+        await asyncio.wait_for(runner.join(), 10)
+        await runner.close()
+        return job
+
+    job = asyncio.run(main())
+    assert job.state == "cancelled" and job.run_time < 10
@@ -0,0 +1,72 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import json
+import asyncio
+import datetime
+import dataclasses
+import pytest
+from AsyncPyToolbox.utils import json_backends
+from AsyncPyToolbox.utils.json_backends import BACKENDS, available_json_backends, _has_long_number
+from AsyncPyToolbox.utils.convertors import write_to_json
+
+DOCUMENT = {"text": "héllo ✓", "count": 3, "nested": {"values": [1.5, None, True]}, "big": 2 ** 70}
+
+
+@pytest.mark.parametrize("name", available_json_backends())
+@pytest.mark.parametrize("indent", [None, 0, 2, 4])
+def test_backends_match_the_standard_library(name, indent):
+    backend = BACKENDS[name]()
+    encoded = backend.dumps(DOCUMENT, indent)
+    assert backend.loads(encoded) == DOCUMENT
+    assert json.loads(encoded) == DOCUMENT
+    assert backend.dumps(DOCUMENT, indent, ensure_ascii=True) == json.dumps(
+        DOCUMENT, indent=indent, separators=(",", ":") if indent is None else (",", ": ")
+    ).encode()
+
+
+PLAIN = {"a": [], "b": {}, "c": [1, {"d": [2.5, "x\ny"]}], "e": {"f": {"g": None}}, "h": "  indented"}
+
+
+@pytest.mark.parametrize("name", available_json_backends())
+@pytest.mark.parametrize("indent", [None, 0, 1, 2, 4, 8])
+def test_indentation_matches_the_standard_library_without_falling_back(name, indent, monkeypatch):
+    backend = BACKENDS[name]()
+    expected = json.dumps(PLAIN, indent=indent, separators=(",", ":") if indent is None else (",", ": ")).encode()
+    if name != "json":
+        monkeypatch.setattr(json_backends, "_stdlib", None)
+    assert backend.dumps(PLAIN, indent) == expected
+
+
+@dataclasses.dataclass
+class Point:
+    x: int
+    y: int
+
+
+@pytest.mark.parametrize("name", [name for name in available_json_backends() if name != "msgspec"])
+@pytest.mark.parametrize("value", [datetime.datetime(2024, 1, 2), datetime.date(2024, 1, 2), Point(1, 2), object()])
+@pytest.mark.parametrize("indent", [None, 4])
+def test_types_the_standard_library_refuses_raise(name, value, indent):
+    with pytest.raises(TypeError):
+        BACKENDS[name]().dumps({"value": value}, indent)
+
+
+def test_long_number_found_across_scan_chunks(monkeypatch):
+    monkeypatch.setattr(json_backends, "_SCAN_CHUNK", 8)
+    assert _has_long_number(b'{"a": 123456789012345678901}')
+    assert not _has_long_number(b'{"a": 1234567890123456789, "b": 1234567890}')
+
+
+def test_write_to_json_escapes_like_json_dump_by_default(tmp_path):
+    path = tmp_path / "out.json"
+    asyncio.run(write_to_json(str(path), DOCUMENT))
+    assert path.read_bytes().isascii()
+    asyncio.run(write_to_json(str(path), DOCUMENT, ensure_ascii=False))
+    assert "héllo ✓" in path.read_text(encoding="utf-8")
+    assert json.loads(path.read_text(encoding="utf-8")) == DOCUMENT
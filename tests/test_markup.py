@@ -0,0 +1,154 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import time
+import asyncio
+import pytest
+from AsyncPyToolbox.utils import markup
+from AsyncPyToolbox.utils.markup import to_text, strip_tags, iter_text, stream_text
+from AsyncPyToolbox.utils.string import clean_html
+
+DOCUMENT = """# Title
+
+Some **bold** and *italic* text with a [link](https://example.com) and `a < b`.
+<!-- a comment
+over two lines -->
+> quoted &amp; escaped \\*stars\\*
+
+```python
+x = "**not bold**"
+```
+- item one
+- item <b>two</b>
+"""
+
+
+def test_to_text_markdown():
+    assert to_text(DOCUMENT) == (
+        "Title\n\nSome bold and italic text with a link and a < b.\n\nquoted & escaped *stars*\n\n"
+        'x = "**not bold**"\nitem one\nitem two\n'
+    )
+
+
+def test_html_only():
+    assert to_text("<p>Fish &amp; chips</p><!-- note -->", markdown=False) == "Fish & chips"
+    assert strip_tags("<p>Fish &amp; chips</p>") == "Fish &amp; chips"
+
+
+@pytest.mark.parametrize("size", [1, 7, 64])
+def test_chunked_conversion_matches_whole_document(size):
+    chunks = [DOCUMENT[i:i + size] for i in range(0, len(DOCUMENT), size)]
+    assert "".join(iter_text(chunks)) == to_text(DOCUMENT)
+
+    async def stream():
+        async def source():
+            for chunk in chunks:
+                yield chunk
+        return "".join([text async for text in stream_text(source())])
+    assert asyncio.run(stream()) == to_text(DOCUMENT)
+
+
+def _stream(chunks, **kwargs):
+    async def main():
+        async def source():
+            for chunk in chunks:
+                yield chunk
+        return [text async for text in stream_text(source(), **kwargs)]
+    return asyncio.run(main())
+
+
+MULTILINE_LINKS = "See [the\nlong link](https://example.com/a\nb) and ![an\nimage](x.png\n) here.\n[ref\ntext][1] end\n"
+
+
+@pytest.mark.parametrize("size", [1, 3, 10, 1000])
+def test_links_spanning_lines_and_chunks_match_whole_document(size):
+    chunks = [MULTILINE_LINKS[i:i + size] for i in range(0, len(MULTILINE_LINKS), size)]
+    expected = to_text(MULTILINE_LINKS)
+    assert expected == "See the\nlong link and an\nimage here.\nref\ntext end\n"
+    assert "".join(iter_text(chunks)) == expected
+    assert "".join(_stream(chunks)) == expected
+
+
+CODE_AND_TAGS = """Intro with a < b and `x<y`.
+
+```c
+if (a<b && c[i) {}
+```
+<a
+href="x">multi line tag</a> and <!-- a
+comment --> done
+"""
+
+
+@pytest.mark.parametrize("size", [1, 5, 17, 1000])
+def test_code_blocks_and_multi_line_tags_match_whole_document(size):
+    chunks = [CODE_AND_TAGS[i:i + size] for i in range(0, len(CODE_AND_TAGS), size)]
+    assert "".join(iter_text(chunks)) == to_text(CODE_AND_TAGS)
+    assert "".join(iter_text(chunks, markdown=False)) == to_text(CODE_AND_TAGS, markdown=False)
+
+
+def _first_output_after(chunks, markdown: bool = True, max_buffer: int = 1 << 20) -> tuple:
+    """Number of chunks fed before iter_text produced its first output, and that output."""
+    fed = 0
+
+    def source():
+        nonlocal fed
+        for chunk in chunks:
+            fed += 1
+            yield chunk
+
+    first = next(iter_text(source(), markdown, max_buffer))
+    return fed, first
+
+
+def test_text_before_an_unclosed_tag_is_not_held():
+    chunks = ["intro\nsecond\nvalue <x never closed\n", *["filler\n"] * 100]
+    assert _first_output_after(chunks) == (1, "intro\nsecond\n")
+    assert _first_output_after(chunks, markdown=False) == (1, "intro\nsecond\n")
+    assert "".join(iter_text(chunks)) == to_text("".join(chunks))
+
+
+@pytest.mark.parametrize("line", ["compare `a<b` in code\n", "escaped \\[x only\n", "a < b and [ok] text\n"])
+def test_brackets_that_cannot_start_a_tag_or_link_are_not_held(line):
+    chunks = [line, *["filler\n"] * 100]
+    assert _first_output_after(chunks)[0] == 1
+    assert "".join(iter_text(chunks)) == to_text("".join(chunks))
+
+
+def test_max_buffer_still_cuts_constructs_that_never_close():
+    chunks = ["```\n", *["code line\n"] * 200]
+    assert _first_output_after(chunks, max_buffer=100)[0] < 20
+    assert "".join(iter_text(chunks, max_buffer=100)) == "".join(iter_text(chunks))
+
+
+def test_long_open_construct_is_scanned_once():
+    # an open fence held for 60k lines used to be rescanned on every chunk
+    document = "```\n" + "x = 1  # a line of code\n" * 60_000 + "```\nafter\n"
+    chunks = document.splitlines(keepends=True)
+    started = time.perf_counter()
+    assert "".join(iter_text(chunks, max_buffer=1 << 24)) == to_text(document)
+    assert time.perf_counter() - started < 5
+
+
+def test_stream_text_converts_in_batches(monkeypatch):
+    calls = []
+    real_to_text = markup.to_text
+    monkeypatch.setattr(markup, "to_text", lambda text, markdown=True: calls.append(len(text)) or real_to_text(text, markdown))
+    small = "line with **bold**\n" * 1000
+    assert "".join(_stream(small.splitlines(keepends=True))) == real_to_text(small)
+    assert len(calls) == 1
+    calls.clear()
+    large = small * 10
+    assert "".join(_stream(large.splitlines(keepends=True))) == real_to_text(large)
+    assert 1 < len(calls) <= len(large) // markup._STREAM_BATCH + 1
+
+
+def test_clean_html_keeps_entities_by_default():
+    text = "<i>Use</i> &lt;script&gt; tags"
+    assert asyncio.run(clean_html(text)) == "Use &lt;script&gt; tags"
+    assert asyncio.run(clean_html(text, decode_entities=True)) == "Use <script> tags"
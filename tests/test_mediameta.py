@@ -0,0 +1,62 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import struct
+import pytest
+from AsyncPyToolbox.utils.mediameta import read_metadata
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", len(payload) + 8, box_type) + payload
+
+
+def _mvhd(version: int, timescale: int, duration: int) -> bytes:
+    if version:
+        times = struct.pack(">QQIQ", 0, 0, timescale, duration)
+    else:
+        times = struct.pack(">IIII", 0, 0, timescale, duration)
+    return _box(b"mvhd", bytes((version, 0, 0, 0)) + times + bytes(80))
+
+
+def _tkhd(version: int, width: int, height: int) -> bytes:
+    # creation and modification times, track id, reserved, duration
+    times = struct.pack(">QQIIQ", 0, 0, 1, 0, 0) if version else struct.pack(">IIIII", 0, 0, 1, 0, 0)
+    # reserved, layer, alternate group, volume, reserved, matrix
+    middle = bytes(8 + 2 + 2 + 2 + 2 + 36)
+    return _box(b"tkhd", bytes((version, 0, 0, 7)) + times + middle + struct.pack(">II", width << 16, height << 16))
+
+
+def _mp4(version: int) -> bytes:
+    ftyp = _box(b"ftyp", b"isom" + bytes(4) + b"isomiso2mp41")
+    audio = _box(b"trak", _tkhd(version, 0, 0))
+    video = _box(b"trak", _tkhd(version, 1920, 1080))
+    return ftyp + _box(b"moov", _mvhd(version, 1000, 12500) + audio + video)
+
+
+@pytest.mark.parametrize("version", [0, 1])
+def test_mp4_dimensions_and_duration(tmp_path, version):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(_mp4(version))
+    meta = read_metadata(str(path))
+    assert (meta.width, meta.height, meta.duration) == (1920, 1080, 12.5)
+
+
+def test_truncated_tkhd_is_ignored(tmp_path):
+    data = _mp4(1)
+    path = tmp_path / "clip.mp4"
+    # cut the file in the middle of the video track header
+    path.write_bytes(data[:-10])
+    meta = read_metadata(str(path))
+    assert (meta.width, meta.height) == (0, 0)
+
+
+def test_unknown_format(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("not media")
+    meta = read_metadata(str(path))
+    assert (meta.duration, meta.width, meta.title) == (0.0, 0, None)
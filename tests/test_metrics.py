@@ -0,0 +1,100 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import time
+import asyncio
+import pytest
+from types import SimpleNamespace
+from collections import namedtuple
+from AsyncPyToolbox.utils import metrics
+from AsyncPyToolbox.utils.metrics import MetricsCollector
+from AsyncPyToolbox.utils.system import get_system_info
+
+
+CpuTimes = namedtuple("CpuTimes", "user system idle")
+
+
+class FakePsutil:
+    """Counters that grow by a fixed step on every read."""
+    def __init__(self) -> None:
+        self.reads = 0
+
+    def cpu_times(self, percpu=False):
+        self.reads += 1
+        # each core is busy a quarter of the time
+        return [CpuTimes(self.reads, 0, 3 * self.reads) for _ in range(2)]
+
+    def cpu_freq(self, percpu=False):
+        return [SimpleNamespace(current=2400.0), SimpleNamespace(current=2600.0)]
+
+    def virtual_memory(self):
+        return SimpleNamespace(total=8 << 30, used=2 << 30, available=6 << 30, percent=25.0)
+
+    def disk_usage(self, path):
+        return SimpleNamespace(total=100 << 30, used=40 << 30, percent=40.0)
+
+    def disk_io_counters(self):
+        return SimpleNamespace(read_bytes=1000 * self.reads, write_bytes=0)
+
+    def net_io_counters(self):
+        return None
+
+    def boot_time(self):
+        return 0.0
+
+
+@pytest.fixture
+def psutil(monkeypatch):
+    fake = FakePsutil()
+    monkeypatch.setattr(metrics, "_import_psutil", lambda: fake)
+    return fake
+
+
+def test_rates_come_from_the_previous_sample(psutil):
+    collector = MetricsCollector(disk_path="/")
+    first = collector.sample()
+    assert first.cpu_percent is None and first.disk_read_rate is None
+    second = collector.sample()
+    assert second.cpu_percent == 25.0 and second.cpu_per_core == (25.0, 25.0)
+    assert second.disk_read_rate > 0 and second.net_sent_rate is None
+    assert collector.latest is second and collector.error is None
+
+
+def test_failed_background_sample_drops_latest(psutil, monkeypatch):
+    async def run():
+        collector = MetricsCollector(disk_path="/", interval=0.01)
+        async with collector:
+            while collector.latest is None:
+                await asyncio.sleep(0.01)
+            assert collector.recent() is collector.latest
+            monkeypatch.setattr(psutil, "disk_usage", lambda path: 1 / 0)
+            while collector.error is None:
+                await asyncio.sleep(0.01)
+            return collector
+
+    collector = asyncio.run(asyncio.wait_for(run(), 10))
+    assert collector.latest is None and isinstance(collector.error, ZeroDivisionError)
+    assert collector.recent() is None
+
+
+def test_stale_sample_is_not_recent(psutil, monkeypatch):
+    async def run():
+        collector = MetricsCollector(disk_path="/", interval=60)
+        monkeypatch.setattr(metrics, "_default_collector", collector)
+        async with collector:
+            while collector.latest is None:
+                await asyncio.sleep(0.01)
+            collector.latest.timestamp = time.time() - 121
+            reads = psutil.reads
+            info = await get_system_info()
+            return collector, reads, info
+
+    collector, reads, info = asyncio.run(asyncio.wait_for(run(), 10))
+    # get_system_info took a new sample instead of reporting the stale one
+    assert psutil.reads == reads + 1
+    assert info[10] == "2.5GHz" and info[11].endswith("(40.0%)")
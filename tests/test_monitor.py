@@ -0,0 +1,64 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import socket
+import asyncio
+import pytest
+from AsyncPyToolbox.utils.monitor import HealthMonitor
+from AsyncPyToolbox.utils.network import PingResult
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_monitor_probes_local_servers_on_schedule():
+    async def run():
+        server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        closed = _closed_port()
+        monitor = HealthMonitor(interval=0.02, timeout=1, window=8)
+        monitor.add("127.0.0.1", port)
+        monitor.add("127.0.0.1", closed)
+        async with monitor:
+            while min(stats.samples for stats in monitor.all_stats()) < 8:
+                await asyncio.sleep(0.01)
+        server.close()
+        await server.wait_closed()
+        return monitor.stats("127.0.0.1", port), monitor.stats("127.0.0.1", closed)
+
+    up, down = asyncio.run(asyncio.wait_for(run(), 10))
+    assert up.samples == 8 and up.availability == 1.0 and up.last_error is None
+    assert up.p50 <= up.p95 <= up.p99
+    assert down.availability == 0.0 and down.p50 is None and down.last_error
+
+
+def test_window_statistics():
+    monitor = HealthMonitor(window=4)
+    monitor.add("host", 1)
+    target = monitor._targets[("host", 1)]
+    for latency in (100, 300, None, 200, 400):
+        target.record(PingResult("host", 1, latency is not None, latency, error=None if latency else "refused"))
+    stats = monitor.stats("host", 1)
+    # the oldest probe fell out of the window
+    assert (stats.samples, stats.availability) == (4, 0.75)
+    assert (stats.p50, stats.p95, stats.p99) == (300, 400, 400)
+    assert stats.jitter > 0
+
+
+def test_add_remove():
+    monitor = HealthMonitor()
+    monitor.add("host", 1)
+    monitor.add("host", 1, interval=5)
+    assert len(monitor) == 1 and ("host", 1) in monitor
+    monitor.remove("host", 1)
+    assert ("host", 1) not in monitor
+    with pytest.raises(KeyError):
+        monitor.stats("host", 1)
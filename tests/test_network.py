@@ -0,0 +1,81 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import socket
+import asyncio
+import pytest
+from AsyncPyToolbox.utils import network
+from AsyncPyToolbox.utils.network import ping, ping_many
+
+
+async def _with_server(func):
+    """Run func(port) while a local server accepts connections on port."""
+    server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0)
+    try:
+        return await func(server.sockets[0].getsockname()[1])
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_ping_open_and_closed_port():
+    result = asyncio.run(_with_server(lambda port: ping("127.0.0.1", port, timeout=2)))
+    assert result.ok and result.address == "127.0.0.1" and result.latency_us >= 0 and result.error is None
+    result = asyncio.run(ping("127.0.0.1", _closed_port(), timeout=2))
+    assert not result.ok and result.latency_us is None and result.error
+
+
+@pytest.mark.parametrize("host, port", [("a..com", 80), ("127.0.0.1", 70000), ("::1", -1)])
+def test_ping_invalid_target(host, port):
+    result = asyncio.run(ping(host, port, timeout=2))
+    assert not result.ok and result.error
+
+
+def test_ping_many_reports_every_target():
+    async def sweep(port):
+        targets = [("127.0.0.1", port), ("a..com", 80), ("127.0.0.1", 70000), ("127.0.0.1", _closed_port())]
+        return [result async for result in ping_many(targets, concurrency=2, timeout=2)]
+    results = asyncio.run(_with_server(sweep))
+    assert len(results) == 4
+    assert sorted(result.ok for result in results) == [False, False, False, True]
+
+
+def test_ping_many_unexpected_error_fails_one_target(monkeypatch):
+    real_ping = network.ping
+
+    async def flaky_ping(host, port, timeout):
+        if host == "boom":
+            raise RuntimeError("unexpected")
+        return await real_ping(host, port, timeout)
+
+    monkeypatch.setattr(network, "ping", flaky_ping)
+
+    async def sweep(port):
+        return [result async for result in ping_many([("boom", 1), ("127.0.0.1", port)], timeout=2)]
+    results = {result.host: result for result in asyncio.run(_with_server(sweep))}
+    assert results["127.0.0.1"].ok
+    assert not results["boom"].ok and "unexpected" in results["boom"].error
+
+
+def test_ping_many_deadline(monkeypatch):
+    async def slow_ping(host, port, timeout):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(network, "ping", slow_ping)
+
+    async def sweep():
+        return [result async for result in ping_many([("a", 1), ("b", 2), ("c", 3)], concurrency=1, deadline=0.05)]
+    results = asyncio.run(sweep())
+    assert [result.host for result in results] == ["a", "b", "c"]
+    assert all(result.error == "deadline exceeded" for result in results)
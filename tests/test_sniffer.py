@@ -0,0 +1,84 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import os
+import gzip
+import pytest
+from AsyncPyToolbox.utils import sniffer
+from AsyncPyToolbox.utils.sniffer import classify, detect_mime_type, sniff, clear_sniff_cache
+
+
+@pytest.mark.parametrize("header, mime_type", [
+    (b"\xff\xd8\xff\xe0\x00\x10JFIF", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n\x00\x00", "image/png"),
+    (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "image/webp"),
+    (b"RIFF\x00\x00\x00\x00WAVEfmt ", "audio/wav"),
+    (b"\x00\x00\x00\x18ftypisom\x00\x00\x02\x00", "video/mp4"),
+    (b"\x00\x00\x00\x18ftypM4A \x00\x00\x02\x00", "audio/mp4"),
+    (b"\x1a\x45\xdf\xa3\x9f\x42\x82\x84webm", "video/webm"),
+    (b"ID3\x04\x00\x00\x00\x00\x00\x00", "audio/mpeg"),
+    (b"\xff\xfb\x90\x64\x00", "audio/mpeg"),
+    (b"%PDF-1.7\n", "application/pdf"),
+    (b"BM" + bytes(12) + b"\x28\x00\x00\x00", "image/bmp"),
+    (b"BMW owners club\nmeeting notes", None),
+    (b"BM" + bytes(12) + b"\x29\x00\x00\x00", None),
+    (b"\x00\x00\x01\x00\x01\x00\x10\x10\x00\x00\x01\x00", "image/x-icon"),
+    (b"\x00\x00\x01\x00\x00\x00\x10\x10\x00\x00\x01\x00", None),
+    (b"\x00\x00\x01\x00\x01\x00\x10\x10\x00\x07\x05\x00", None),
+    (b"\x00\x00\x01\x00", None),
+    (b"plain text", None),
+    (b"", None),
+])
+def test_detect_mime_type(header, mime_type):
+    assert detect_mime_type(header) == mime_type
+
+
+def test_classify_prefers_contents_over_extension():
+    info = classify("holiday.txt", b"\x89PNG\r\n\x1a\n")
+    assert (info.mime_type, info.kind, info.extension, info.sniffed) == ("image/png", "photo", "txt", True)
+    info = classify("notes.PDF", b"not a known header")
+    assert (info.mime_type, info.kind, info.extension, info.sniffed) == ("application/pdf", "document", "pdf", False)
+
+
+def _webp(width, height):
+    # VP8X chunk with the canvas size minus one
+    return b"RIFF\x00\x00\x00\x00WEBPVP8X" + bytes(8) + (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+
+
+@pytest.mark.parametrize("width, height, kind", [
+    (512, 512, "sticker"),
+    (512, 300, "sticker"),
+    (200, 512, "sticker"),
+    (1024, 768, "photo"),
+    (100, 100, "photo"),
+])
+def test_only_sticker_sized_webp_images_are_stickers(width, height, kind):
+    assert classify("image.webp", _webp(width, height)).kind == kind
+
+
+def test_classify_stickers():
+    assert classify("truncated.webp", b"RIFF\x00\x00\x00\x00WEBPVP8 ").kind == "photo"
+    animated = classify("animated.tgs", gzip.compress(b"{}"))
+    assert (animated.mime_type, animated.kind) == ("application/x-tgsticker", "animated_sticker")
+
+
+def test_sniff_reads_each_version_once(tmp_path, monkeypatch):
+    clear_sniff_cache()
+    path = tmp_path / "clip.bin"
+    path.write_bytes(b"\x00\x00\x00\x18ftypisom" + bytes(100))
+    reads = []
+    real_classify = sniffer.classify
+    monkeypatch.setattr(sniffer, "classify", lambda *args: reads.append(args[0]) or real_classify(*args))
+    first = sniff(str(path))
+    assert sniff(str(path)) is first
+    assert (first.kind, first.size) == ("video", 112)
+    path.write_bytes(b"%PDF-1.7\n")
+    os.utime(path, ns=(0, first.mtime + 1_000_000_000))
+    assert sniff(str(path)).mime_type == "application/pdf"
+    assert len(reads) == 2
+    clear_sniff_cache()
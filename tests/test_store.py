@@ -0,0 +1,157 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import json
+import asyncio
+import time
+import pytest
+from AsyncPyToolbox.utils import store
+from AsyncPyToolbox.utils.store import JsonStore
+
+
+def _read(path) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def test_changes_are_coalesced_into_one_write(tmp_path):
+    path = tmp_path / "db.json"
+
+    async def main():
+        db = JsonStore(str(path), delay=0.05)
+        for i in range(100):
+            db[str(i)] = i
+        await asyncio.sleep(0.2)
+        return db
+
+    db = asyncio.run(main())
+    assert db.writes == 1
+    assert _read(path) == {str(i): i for i in range(100)}
+
+
+def test_close_writes_after_a_failed_background_write(tmp_path, monkeypatch):
+    path = tmp_path / "db.json"
+    real_write = store._write_atomically
+    failures = [OSError(28, "No space left on device")]
+
+    def flaky_write(file_path, data):
+        if failures:
+            raise failures.pop()
+        real_write(file_path, data)
+
+    monkeypatch.setattr(store, "_write_atomically", flaky_write)
+
+    async def main():
+        async with JsonStore(str(path), delay=0.05) as db:
+            db["a"] = 1
+            await asyncio.sleep(0.07)
+            # the background write failed, the change is still pending
+            assert db.writes == 0
+            db["b"] = 2
+
+    asyncio.run(main())
+    assert _read(path) == {"a": 1, "b": 2}
+
+
+def test_failed_background_write_is_retried_without_new_changes(tmp_path, monkeypatch):
+    path = tmp_path / "db.json"
+    real_write = store._write_atomically
+    failures = [OSError(28, "No space left on device")]
+
+    def flaky_write(file_path, data):
+        if failures:
+            raise failures.pop()
+        real_write(file_path, data)
+
+    monkeypatch.setattr(store, "_write_atomically", flaky_write)
+
+    async def main():
+        db = JsonStore(str(path), delay=0.02)
+        db["a"] = 1
+        await asyncio.sleep(0.2)
+        return db
+
+    db = asyncio.run(main())
+    assert db.writes == 1 and not failures
+    assert _read(path) == {"a": 1}
+
+
+def test_flush_reports_the_earlier_error_when_the_retry_fails(tmp_path, monkeypatch):
+    def broken_write(file_path, data):
+        raise OSError(5, "I/O error")
+
+    monkeypatch.setattr(store, "_write_atomically", broken_write)
+
+    async def main():
+        db = JsonStore(str(tmp_path / "db.json"), delay=0.01)
+        db["a"] = 1
+        await asyncio.sleep(0.1)
+        with pytest.raises(OSError) as info:
+            await db.flush()
+        assert isinstance(info.value.__cause__, OSError)
+
+    asyncio.run(main())
+
+
+def test_changes_during_a_write_go_out_with_the_next_one(tmp_path):
+    path = tmp_path / "db.json"
+
+    async def main():
+        db = JsonStore(str(path), delay=0)
+        db["users"] = {str(i): i for i in range(10_000)}
+        flush = asyncio.ensure_future(db.flush())
+        await asyncio.sleep(0)
+        # changed while the write is in flight
+        db["users"] = {}
+        await flush
+        first = _read(path)
+        await db.close()
+        return first
+
+    first = asyncio.run(main())
+    assert len(first["users"]) == 10_000
+    assert _read(path) == {"users": {}}
+
+
+def test_nested_change_during_encoding_still_writes_a_valid_document(tmp_path):
+    path = tmp_path / "db.json"
+
+    async def main():
+        db = JsonStore(str(path), delay=0)
+        db["users"] = {str(i): i for i in range(100_000)}
+        flush = asyncio.ensure_future(db.flush())
+        for _ in range(20):
+            await asyncio.sleep(0.001)
+            # grows while a worker may be encoding it
+            db["users"][f"new{_}"] = 0
+        await flush
+
+    asyncio.run(main())
+    assert len(_read(path)["users"]) >= 100_000
+
+
+def test_flush_does_not_block_the_loop(tmp_path):
+    path = tmp_path / "db.json"
+    gaps = []
+
+    async def main():
+        db = JsonStore(str(path), delay=0)
+        db["rows"] = [{"id": i, "name": f"row {i}", "tags": ["a", "b"]} for i in range(200_000)]
+        flush = asyncio.ensure_future(db.flush())
+        last = time.perf_counter()
+        while not flush.done():
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+        await flush
+
+    asyncio.run(main())
+    assert len(_read(path)["rows"]) == 200_000
+    # the loop kept ticking while the document was encoded
+    assert len(gaps) > 5 and max(gaps) < 0.5
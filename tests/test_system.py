@@ -0,0 +1,123 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import os
+import sys
+import time
+import shlex
+import socket
+import asyncio
+import pytest
+from AsyncPyToolbox.utils import system
+from AsyncPyToolbox.utils.network import PingResult
+from AsyncPyToolbox.utils.system import TerminalStream, exec_terminal, ping_server
+
+posix_only = pytest.mark.skipif(os.name != "posix", reason="process groups are POSIX only")
+
+
+def _python(code: str) -> str:
+    return f"{shlex.quote(sys.executable)} -c {shlex.quote(code)}"
+
+
+def _alive(pid: int) -> bool:
+    # a killed child of a killed process may linger as a zombie until it is reaped
+    try:
+        with open(f"/proc/{pid}/stat") as file:
+            return file.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+    except OSError:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        return True
+
+
+def test_exec_terminal_returns_output_and_the_real_return_code():
+    assert asyncio.run(exec_terminal(_python("print('hello')"))) == (True, "hello", 0)
+    success, output, return_code = asyncio.run(exec_terminal(_python("import sys; print('out'); print('err', file=sys.stderr); sys.exit(3)")))
+    assert (success, output, return_code) == (True, "out\nerr", 3)
+
+
+def test_exec_terminal_reports_commands_that_cannot_start():
+    success, output, return_code = asyncio.run(exec_terminal("/nonexistent/command --flag"))
+    assert not success and return_code is None
+    assert "FileNotFoundError" in output
+
+
+@posix_only
+def test_timeout_kills_the_whole_process_group():
+    code = (
+        "import subprocess, sys, time\n"
+        "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])\n"
+        "print(child.pid, flush=True)\n"
+        "time.sleep(60)\n"
+    )
+    started = time.monotonic()
+    success, output, return_code = asyncio.run(exec_terminal(_python(code), timeout=1))
+    assert time.monotonic() - started < 10
+    assert not success and return_code == -9
+    assert output.endswith("[killed after 1s]")
+    child = int(output.split()[0])
+    deadline = time.monotonic() + 5
+    while _alive(child) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _alive(child)
+
+
+def test_max_bytes_truncates_and_keeps_draining():
+    # far more than a pipe buffer, the process must still finish
+    code = "import sys; sys.stdout.write('x' * 1_000_000 + '\\n'); print('done')"
+    success, output, return_code = asyncio.run(exec_terminal(_python(code), max_bytes=100))
+    assert (success, return_code) == (True, 0)
+    assert output == "x" * 100 + "\n[output truncated]"
+
+
+def test_stream_attributes_after_truncation():
+    async def main():
+        stream = TerminalStream(_python("print('a' * 50); print('b' * 50)"), max_bytes=60, lines=False)
+        chunks = [text async for _, text in stream]
+        return stream, "".join(chunks)
+
+    stream, text = asyncio.run(main())
+    assert stream.truncated and stream.bytes_read == 60 and stream.return_code == 0
+    assert text == "a" * 50 + "\n" + "b" * 9
+
+
+def test_ping_server_delegates_to_network_ping(monkeypatch):
+    calls = []
+
+    async def fake_ping(host, port, timeout):
+        calls.append((host, port, timeout))
+        return PingResult(host, port, port == 443, 1200 if port == 443 else None, error=None if port == 443 else "timed out")
+
+    monkeypatch.setattr(system, "ping", fake_ping)
+    assert asyncio.run(ping_server("example.org", 443)) == (True, "Ping successful!")
+    assert asyncio.run(ping_server("example.org", 81, timeout=2)) == (False, "timed out")
+    assert calls == [("example.org", 443, 5), ("example.org", 81, 2)]
+
+
+def test_ping_server_against_a_local_port():
+    async def main():
+        server = await asyncio.start_server(lambda reader, writer: writer.close(), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            up = await ping_server("127.0.0.1", port, timeout=5)
+        finally:
+            server.close()
+            await server.wait_closed()
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            closed_port = probe.getsockname()[1]
+        down = await ping_server("127.0.0.1", closed_port, timeout=5)
+        return up, down
+
+    up, down = asyncio.run(main())
+    assert up == (True, "Ping successful!")
+    assert down[0] is False and down[1]
@@ -0,0 +1,50 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import string
+import asyncio
+import pytest
+from AsyncPyToolbox.utils.tokens import TokenGenerator, random_tokens, HEX_ALPHABET, URLSAFE_ALPHABET
+from AsyncPyToolbox.utils.string import random_hash, generate_random_password
+
+
+def test_tokens_use_the_alphabet():
+    tokens = random_tokens(200, 16)
+    assert len(tokens) == 200 and len(set(tokens)) == 200
+    assert all(len(token) == 16 and set(token) <= set(URLSAFE_ALPHABET) for token in tokens)
+    # 10 doesn't divide 256, the biased bytes are rejected rather than mapped
+    assert set("".join(random_tokens(500, 8, string.digits))) == set(string.digits)
+
+
+def test_required_classes():
+    generator = TokenGenerator(string.ascii_letters + string.digits, 3, (string.ascii_lowercase, string.ascii_uppercase, string.digits))
+    for token in generator.tokens(300):
+        assert any(c.islower() for c in token) and any(c.isupper() for c in token) and any(c.isdigit() for c in token)
+
+
+@pytest.mark.parametrize("alphabet, length, required", [("", 8, ()), ("aa", 8, ()), ("é", 8, ()), ("ab", 1, ("a", "b")), ("ab", -1, ())])
+def test_invalid_generators(alphabet, length, required):
+    with pytest.raises(ValueError):
+        TokenGenerator(alphabet, length, required)
+
+
+def test_zero_length():
+    assert asyncio.run(random_hash(0)) == ""
+    assert asyncio.run(random_hash(0, n=3)) == ["", "", ""]
+    assert asyncio.run(generate_random_password(0)) == ""
+
+
+def test_random_hash_and_password():
+    assert len(asyncio.run(random_hash())) == 8
+    assert set(asyncio.run(random_hash(64))) <= set(HEX_ALPHABET)
+    password = asyncio.run(generate_random_password(12, special_chars=False))
+    assert len(password) == 12 and password.isalnum()
+    # shorter than the number of classes, the classes can't all be present
+    assert len(asyncio.run(generate_random_password(2))) == 2
+    with pytest.raises(ValueError):
+        asyncio.run(generate_random_password(8, False, False, False, False))
@@ -0,0 +1,51 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import asyncio
+import pytest
+from collections import Counter
+from AsyncPyToolbox.utils.useragent import UserAgentPool, DEFAULT_TEMPLATES, get_useragent_pool
+from AsyncPyToolbox.utils.string import gen_random_useragent
+
+
+def test_default_pool_expands_templates():
+    pool = get_useragent_pool()
+    assert len(pool) == sum(len(versions) for _, _, versions in DEFAULT_TEMPLATES)
+    assert all("{" not in agent for agent in pool.agents)
+    assert abs(sum(pool.weights) - sum(share for share, _, _ in DEFAULT_TEMPLATES)) < 1e-9
+
+
+def test_sample_follows_weights():
+    pool = UserAgentPool(agents={"a": 0.7, "b": 0.2, "c": 0.1})
+    counts = Counter(pool.sample(20000))
+    assert set(counts) == {"a", "b", "c"}
+    assert abs(counts["a"] / 20000 - 0.7) < 0.03
+    assert abs(counts["c"] / 20000 - 0.1) < 0.02
+    assert pool.sample() in ("a", "b", "c")
+
+
+def test_alias_tables_match_weights_exactly():
+    pool = UserAgentPool(agents={"a": 5, "b": 3, "c": 1, "d": 1})
+    # walk a fine grid of points, every agent gets its exact share
+    points = 100000
+    counts = Counter(pool._pick(i / points) for i in range(points))
+    assert {agent: round(count / points, 3) for agent, count in counts.items()} == {"a": 0.5, "b": 0.3, "c": 0.1, "d": 0.1}
+
+
+def test_for_session_is_stable():
+    pool = UserAgentPool()
+    assert pool.for_session("account-1") == pool.for_session("account-1") == pool.for_session(b"account-1")
+    assert pool.for_session(42) == pool.for_session("42")
+    assert len({pool.for_session(key) for key in range(500)}) > 5
+    assert asyncio.run(gen_random_useragent("account-1")) == get_useragent_pool().for_session("account-1")
+
+
+@pytest.mark.parametrize("agents", [{}, {"a": 0}])
+def test_empty_pool(agents):
+    with pytest.raises(ValueError):
+        UserAgentPool(agents=agents)
@@ -0,0 +1,49 @@
+# Copyright (C) 2023-present by TelegramExtended@Github, < https://github.com/TelegramExtended >.
+#
+# This file is part of < https://github.com/TelegramExtended/AsyncPyToolBox > project,
+# and is released under the "GNU v3.0 License Agreement".
+# Please see < https://github.com/TelegramExtended/AsyncPyToolBox/blob/main/LICENSE >
+#
+# All rights reserved.
+
+import os
+import asyncio
+import pytest
+from AsyncPyToolbox.utils.walker import iter_files, stream_files
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "photos" / "2023").mkdir(parents=True)
+    (tmp_path / "photos" / "a.JPG").write_bytes(b"x" * 10)
+    (tmp_path / "photos" / "2023" / "b.png").write_bytes(b"x" * 100)
+    (tmp_path / "notes.txt").write_text("hello")
+    (tmp_path / "cache").mkdir()
+    (tmp_path / "cache" / "c.png").write_bytes(b"x")
+    return tmp_path
+
+
+def _names(entries) -> list:
+    return sorted(entry.name for entry in entries)
+
+
+def test_filters(tree):
+    assert _names(iter_files(tree)) == ["a.JPG", "b.png", "c.png", "notes.txt"]
+    assert _names(iter_files(tree, ext=["jpg", ".png"], exclude="cache")) == ["a.JPG", "b.png"]
+    assert _names(iter_files(tree, min_size=10, max_depth=1)) == ["a.JPG"]
+
+
+def test_stream_files_matches_iter_files(tree):
+    async def collect():
+        return [entry async for entry in stream_files(tree, concurrency=2, ext="png")]
+    assert _names(asyncio.run(collect())) == ["b.png", "c.png"]
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="needs symlinks")
+def test_follow_enters_each_directory_once(tree):
+    # a loop back to the root, and a second path to a directory that is also reached directly
+    os.symlink(tree, tree / "photos" / "2023" / "loop", target_is_directory=True)
+    os.symlink(tree / "photos", tree / "alias", target_is_directory=True)
+    assert _names(iter_files(tree, symlinks="follow")) == ["a.JPG", "b.png", "c.png", "notes.txt"]
+    assert _names(iter_files(tree, symlinks="files")) == ["a.JPG", "b.png", "c.png", "notes.txt"]
+    assert _names(iter_files(tree, symlinks="follow", exclude="photos")) == ["a.JPG", "b.png", "c.png", "notes.txt"]